@@ -1,66 +1,130 @@
 from flask import Flask, g
-from flask_cors import CORS
 
+from lib.archive import Archive
 from lib.db import Db
+from lib.cache import ResponseCache
+from lib.jobs import JobRunner
+from lib.json_provider import FastJSONProvider
+from lib.metrics import Metrics
+from lib.origins import AllowedOrigins
+from lib.singleflight import SingleFlight
+from lib.snapshot import VocabularySnapshot
+from lib.tenants import TenantDb
 
 import routes.words
 import routes.groups
 import routes.study_sessions
 import routes.dashboard
 import routes.study_activities
-
-def get_allowed_origins(app):
-    try:
-        cursor = app.db.cursor()
-        cursor.execute('SELECT url FROM study_activities')
-        urls = cursor.fetchall()
-        # Convert URLs to origins (e.g., https://example.com/app -> https://example.com)
-        origins = set()
-        for url in urls:
-            try:
-                from urllib.parse import urlparse
-                parsed = urlparse(url['url'])
-                origin = f"{parsed.scheme}://{parsed.netloc}"
-                origins.add(origin)
-            except:
-                continue
-        return list(origins) if origins else ["*"]
-    except:
-        return ["*"]  # Fallback to allow all origins if there's an error
+import routes.metrics
+import routes.jobs
+import routes.archive
 
 def create_app(test_config=None):
     app = Flask(__name__)
     
-    if test_config is None:
-        app.config.from_mapping(
-            DATABASE='words.db'
+    app.config.from_mapping(
+        DATABASE='words.db',
+        DB_PROFILE='wal',  # Storage profile from lib.db.STORAGE_PROFILES
+        DB_POOL_SIZE=5,  # Should be at least the number of worker threads
+        DB_PRAGMAS={},  # Applied once to every new pooled connection
+        DB_PARALLEL_READS=0,  # Worker threads for independent reads, 0 runs them serially
+        RESPONSE_CACHE=True,  # Cache polled read endpoints until the database changes
+        RESPONSE_CACHE_MAX_AGE=60,  # Seconds, bounds staleness of clock dependent stats
+        SINGLE_FLIGHT=True,  # Run concurrent identical requests to expensive views once
+        JOBS_BACKGROUND=True,  # Run jobs like the history reset on a background thread
+        RESET_BATCH_SIZE=5000,  # Rows deleted per transaction by the history reset
+        ARCHIVE_DATABASE=None,  # File old review items are moved to, words.archive.db by default
+        ARCHIVE_AFTER_DAYS=365,  # Review items older than this are archived by POST /api/archive
+        ARCHIVE_BATCH_SIZE=5000,  # Review items moved per transaction
+        WORDS_SNAPSHOT=False,  # Serve GET /words from a pre-sorted in-memory snapshot
+        FAST_JSON=True,  # Serialize responses with orjson when it is installed
+        METRICS=True,  # Time every SQL statement and request for /metrics
+        SLOW_QUERY_MS=100,  # Statements slower than this are logged with their query plan
+        TENANTS=False,  # A database file per learner, chosen by TENANT_HEADER
+        TENANT_HEADER='X-Learner-Id',  # Request header naming the learner
+        TENANT_DIRECTORY='learners',  # Where the learner databases are kept
+        TENANT_TEMPLATE=None,  # Database new learners are cloned from, DATABASE by default
+        TENANT_MAX_OPEN=32,  # Learner databases kept open at most
+        TENANT_IDLE_SECONDS=300  # Learner databases unused for this long are closed
+    )
+    if test_config is not None:
+        app.config.update(test_config)
+    
+    if app.config['FAST_JSON']:
+        app.json = FastJSONProvider(app)
+    
+    # Request and SQL statistics, served at /metrics
+    app.metrics = Metrics(slow_query_ms=app.config['SLOW_QUERY_MS'], enabled=app.config['METRICS'])
+    app.metrics.init_app(app)
+    
+    # Connections are opened on first use, creating the app runs no queries
+    def open_db(database):
+        return Db(
+            database=database,
+            pool_size=app.config['DB_POOL_SIZE'],
+            pragmas=app.config['DB_PRAGMAS'],
+            profile=app.config['DB_PROFILE'],
+            metrics=app.metrics,
+            parallel_reads=app.config['DB_PARALLEL_READS']
         )
+
+    tenants = app.config['TENANTS']
+    # The shared vocabulary. In tenant mode it is only the template learner
+    # databases are cloned from and where the study activity origins are read
+    shared_db = open_db(app.config['DATABASE'])
+    if tenants:
+        # Every learner gets a database file of their own, see lib/tenants.py
+        app.db = TenantDb(
+            open_db,
+            directory=app.config['TENANT_DIRECTORY'],
+            template=app.config['TENANT_TEMPLATE'] or app.config['DATABASE'],
+            header=app.config['TENANT_HEADER'],
+            max_open=app.config['TENANT_MAX_OPEN'],
+            idle_seconds=app.config['TENANT_IDLE_SECONDS']
+        )
+        app.db.init_app(app, exempt=('get_metrics', 'get_slow_queries'))
     else:
-        app.config.update(test_config)
+        app.db = shared_db
+    
+    # Cache for read endpoints, invalidated by the database write generation
+    app.response_cache = ResponseCache(
+        app.db,
+        max_age=app.config['RESPONSE_CACHE_MAX_AGE'],
+        enabled=app.config['RESPONSE_CACHE']
+    )
     
-    # Initialize database first since we need it for CORS configuration
-    app.db = Db(database=app.config['DATABASE'])
+    # Concurrent identical requests to opted-in views share one execution
+    app.single_flight = SingleFlight(app.db, enabled=app.config['SINGLE_FLIGHT'])
     
-    # Get allowed origins from study_activities table
-    allowed_origins = get_allowed_origins(app)
+    # Long running maintenance work. An in-memory database has one connection,
+    # which the request holds, so its jobs run inline
+    app.jobs = JobRunner(app, background=app.config['JOBS_BACKGROUND'] and app.config['DATABASE'] != ':memory:')
     
-    # In development, add localhost to allowed origins
-    if app.debug:
-        allowed_origins.extend(["http://localhost:8080", "http://127.0.0.1:8080"])
+    # Old review items, attached on demand (see lib/archive.py). Learners each
+    # have an archive next to their database
+    app.archive = Archive(app.db, None if tenants else app.config['ARCHIVE_DATABASE'])
     
-    # Configure CORS with combined origins
-    CORS(app, resources={
-        r"/*": {
-            "origins": allowed_origins,
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
-        }
-    })
+    # Pre-sorted copy of the vocabulary for GET /words, built on first use. It
+    # holds the review counts of one database, so not with a database per learner
+    app.snapshot = VocabularySnapshot(app.db) if app.config['WORDS_SNAPSHOT'] and not tenants else None
+    
+    # CORS for the study activity origins, read on the first cross-origin
+    # request. Preflight requests carry no learner header, so the origins come
+    # from the shared database
+    app.allowed_origins = AllowedOrigins(
+        shared_db,
+        methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        allow_headers=["Content-Type", "Authorization"]
+    )
+    app.allowed_origins.init_app(app)
 
-    # Close database connection
+    # Return the database connections to their pools
     @app.teardown_appcontext
     def close_db(exception):
         app.db.close()
+        if shared_db is not app.db:
+            shared_db.close()
 
     # load routes -----------
     routes.words.load(app)
@@ -68,10 +132,23 @@ def create_app(test_config=None):
     routes.study_sessions.load(app)
     routes.dashboard.load(app)
     routes.study_activities.load(app)
+    routes.metrics.load(app)
+    routes.jobs.load(app)
+    routes.archive.load(app)
     
     return app
 
-app = create_app()
+_app = None
+
+def __getattr__(name):
+    # The module level app is created on first access, e.g. when a WSGI server
+    # or `flask run` loads app:app, so importing create_app stays cheap
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
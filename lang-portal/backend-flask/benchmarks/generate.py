@@ -0,0 +1,102 @@
+import random
+from datetime import datetime, time, timedelta, timezone
+from itertools import islice
+
+# Data set sizes, pick one by name or pass the counts to generate() directly
+SCALES = {
+  'tiny': {'words': 500, 'groups': 5, 'sessions': 100, 'reviews': 5000},
+  'small': {'words': 10000, 'groups': 20, 'sessions': 2000, 'reviews': 200000},
+  'medium': {'words': 100000, 'groups': 100, 'sessions': 20000, 'reviews': 1000000},
+  'large': {'words': 100000, 'groups': 200, 'sessions': 200000, 'reviews': 10000000}
+}
+
+ACTIVITIES = [
+  ('Flashcards', 'http://localhost:8081/flashcards'),
+  ('Typing Tutor', 'http://localhost:8082/typing'),
+  ('Kanji Quiz', 'http://localhost:8083/quiz')
+]
+
+SYLLABLES = ['ka', 'ki', 'ku', 'ke', 'ko', 'sa', 'shi', 'su', 'ta', 'chi', 'tsu', 'na', 'ni', 'ha', 'mo', 'ri', 'n']
+
+# Share of review items answered correctly
+CORRECT_RATE = 0.7
+
+def batched(rows, size):
+  rows = iter(rows)
+  while True:
+    batch = list(islice(rows, size))
+    if not batch:
+      return
+    yield batch
+
+def word_rows(rng, count):
+  for i in range(count):
+    kanji = ''.join(chr(0x4E00 + rng.randrange(20000)) for _ in range(rng.randint(1, 3)))
+    romaji = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+    parts = '[{"kanji":"%s","romaji":["%s"]}]' % (kanji[0], romaji)
+    yield (kanji, romaji, f'word {i}', parts)
+
+def session_rows(rng, sessions, groups, days, end):
+  # Sessions spread over the last days, oldest first, with a few per day
+  for i in range(sessions):
+    created_at = end - timedelta(seconds=(sessions - i) * days * 86400 // sessions)
+    yield (rng.randrange(groups) + 1, rng.randrange(len(ACTIVITIES)) + 1, created_at.strftime('%Y-%m-%d %H:%M:%S'))
+
+def review_rows(rng, reviews, sessions, session_groups, session_starts, words, groups):
+  # Review items are spread evenly over the sessions, each reviewing words of
+  # the session's group ten seconds apart
+  per_session, remainder = divmod(reviews, sessions)
+  for session_id in range(1, sessions + 1):
+    group = session_groups[session_id - 1] - 1
+    group_size = (words - group + groups - 1) // groups
+    start = session_starts[session_id - 1]
+    for item in range(per_session + (session_id <= remainder)):
+      word_id = 1 + group + groups * rng.randrange(group_size)
+      created_at = (start + timedelta(seconds=10 * item)).strftime('%Y-%m-%d %H:%M:%S')
+      yield (word_id, session_id, rng.random() < CORRECT_RATE, created_at)
+
+def generate(cursor, scale='small', seed=0, days=365, end=None, batch_size=10000, **counts):
+  # Fill an empty database (tables already set up) with a deterministic data
+  # set. The same scale and seed always produce the same rows; only the dates
+  # are relative to end, today by default, so streaks and recent activity
+  # look like a live database.
+  sizes = {**SCALES[scale], **counts}
+  words, groups, sessions, reviews = sizes['words'], sizes['groups'], sizes['sessions'], sizes['reviews']
+  rng = random.Random(seed)
+  if end is None:
+    end = datetime.combine(datetime.now(timezone.utc).date(), time(12))
+
+  cursor.executemany('INSERT INTO study_activities (name, url) VALUES (?, ?)', ACTIVITIES)
+  cursor.executemany('INSERT INTO groups (name) VALUES (?)', [(f'Group {i + 1}',) for i in range(groups)])
+
+  for batch in batched(word_rows(rng, words), batch_size):
+    cursor.executemany('INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)', batch)
+
+  # Word n belongs to group n % groups, every tenth word to the next group too
+  links = ((word_id, (word_id - 1) % groups + 1) for word_id in range(1, words + 1))
+  for batch in batched(links, batch_size):
+    cursor.executemany('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', batch)
+  if groups > 1:
+    extra = ((word_id, word_id % groups + 1) for word_id in range(10, words + 1, 10))
+    for batch in batched(extra, batch_size):
+      cursor.executemany('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', batch)
+
+  session_groups = []
+  session_starts = []
+  for batch in batched(session_rows(rng, sessions, groups, days, end), batch_size):
+    cursor.executemany('INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, ?, ?)', batch)
+    session_groups.extend(row[0] for row in batch)
+    session_starts.extend(datetime.strptime(row[2], '%Y-%m-%d %H:%M:%S') for row in batch)
+
+  # The rollup and counter triggers run for every review item, as they would
+  # for items recorded through the API
+  if sessions:
+    items = review_rows(rng, reviews, sessions, session_groups, session_starts, words, groups)
+    for batch in batched(items, batch_size):
+      cursor.executemany('''
+        INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
+        VALUES (?, ?, ?, ?)
+      ''', batch)
+
+  cursor.connection.commit()
+  return {**sizes, 'activities': len(ACTIVITIES)}
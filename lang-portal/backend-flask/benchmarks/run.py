@@ -0,0 +1,225 @@
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Run from anywhere, the app lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate import SCALES, SYLLABLES, generate
+
+# Endpoints measured, ids are filled in at random from the generated data
+ENDPOINTS = {
+  'words': '/words',
+  'words_page': '/words?page={words_page}&sort_by=english&order=desc',
+  'words_cursor': '/words?cursor=&sort_by=kanji',
+  'word': '/words/{word_id}',
+  'words_ids': '/words?ids={word_ids}',
+  'words_search': '/words/search?q={romaji_prefix}',
+  'groups': '/groups',
+  'group': '/groups/{group_id}',
+  'group_words': '/groups/{group_id}/words',
+  'group_words_raw': '/groups/{group_id}/words/raw',
+  'group_study_sessions': '/groups/{group_id}/study_sessions',
+  'study_sessions': '/api/study-sessions',
+  'study_session': '/api/study-sessions/{session_id}',
+  'study_activities': '/api/study-activities',
+  'study_activity_sessions': '/api/study-activities/{activity_id}/sessions',
+  'dashboard_recent_session': '/dashboard/recent-session',
+  'dashboard_stats': '/dashboard/stats'
+}
+
+# Slack allowed over the baseline p95 before an endpoint counts as regressed
+DEFAULT_TOLERANCE = 0.25
+
+def percentile(sorted_values, fraction):
+  # Nearest rank percentile of an already sorted list
+  if not sorted_values:
+    return 0.0
+  rank = max(1, round(fraction * len(sorted_values) + 0.5))
+  return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def create_benchmark_app(database, config=None):
+  from app import create_app
+
+  app = create_app({
+    'TESTING': True,
+    'DATABASE': database,
+    'RESPONSE_CACHE': False,  # Measure the queries, not the cache
+    'METRICS': True,  # Statements per request are taken from the metrics
+    **(config or {})
+  })
+
+  # Keep the statements each request recorded for the metrics (see
+  # lib/metrics.py), including those run by concurrent reads on other threads
+  app.statements = []
+
+  @app.before_request
+  def keep_statements():
+    app.statements = app.metrics.statement_records()
+
+  return app
+
+def run_benchmarks(scale='small', requests=50, warmup=3, seed=0, database=None, endpoints=None, config=None, counts=None):
+  # Generate the data set into a database file and request every endpoint
+  # repeatedly through the Flask test client
+  with tempfile.TemporaryDirectory() as directory:
+    database = database or os.path.join(directory, 'benchmark.db')
+    app = create_benchmark_app(database, config)
+
+    generate_started = time.perf_counter()
+    with app.app_context():
+      cursor = app.db.cursor()
+      if is_generated(cursor):
+        sizes = existing_sizes(app.db, cursor)
+      else:
+        app.db.setup_tables(cursor)
+        sizes = generate(cursor, scale, seed=seed, **(counts or {}))
+    generate_seconds = time.perf_counter() - generate_started
+
+    client = app.test_client()
+    rng = random.Random(seed)
+    results = {}
+    for name in endpoints or ENDPOINTS:
+      latencies = []
+      queries = 0
+      for i in range(warmup + requests):
+        url = ENDPOINTS[name].format(**random_ids(rng, sizes))
+        started = time.perf_counter()
+        response = client.get(url)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+          raise RuntimeError(f'{url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        if i >= warmup:
+          latencies.append(elapsed * 1000)
+          queries += len(app.statements)
+
+      latencies.sort()
+      results[name] = {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'queries_per_request': round(queries / requests, 2)
+      }
+
+    app.db.close_all()
+
+  return {
+    'scale': scale,
+    'seed': seed,
+    'sizes': sizes,
+    'generate_seconds': round(generate_seconds, 2),
+    'endpoints': results
+  }
+
+def is_generated(cursor):
+  cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'row_counts'")
+  if cursor.fetchone() is None:
+    return False
+  cursor.execute("SELECT row_count FROM row_counts WHERE table_name = 'words'")
+  row = cursor.fetchone()
+  return bool(row and row['row_count'])
+
+def existing_sizes(db, cursor):
+  # Sizes of a database generated by an earlier run
+  cursor.execute('SELECT reviews_count FROM study_totals WHERE id = 1')
+  totals = cursor.fetchone()
+  cursor.execute('SELECT COUNT(*) FROM study_activities')
+  return {
+    'words': db.row_count('words'),
+    'groups': db.row_count('groups'),
+    'sessions': db.row_count('study_sessions'),
+    'reviews': totals['reviews_count'] if totals else 0,
+    'activities': cursor.fetchone()[0]
+  }
+
+def random_ids(rng, sizes):
+  return {
+    'word_id': rng.randint(1, max(sizes['words'], 1)),
+    'word_ids': ','.join(str(rng.randint(1, max(sizes['words'], 1))) for _ in range(50)),
+    'romaji_prefix': rng.choice(SYLLABLES) + rng.choice(SYLLABLES),
+    'words_page': rng.randint(1, max(sizes['words'] // 50, 1)),
+    'group_id': rng.randint(1, max(sizes['groups'], 1)),
+    'session_id': rng.randint(1, max(sizes['sessions'], 1)),
+    'activity_id': rng.randint(1, sizes.get('activities', 3))
+  }
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+  # Regressions against a saved baseline: a p95 more than tolerance slower or
+  # more queries per request than before. A tolerance of None only compares
+  # queries, which unlike latencies carry over to other machines
+  regressions = []
+  if baseline.get('sizes') != results.get('sizes'):
+    regressions.append(f"baseline was recorded with {baseline.get('sizes')}, not {results.get('sizes')}")
+  for name, result in results['endpoints'].items():
+    before = baseline['endpoints'].get(name)
+    if before is None:
+      continue
+    if tolerance is not None and result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+      regressions.append(f"{name}: p95 {result['p95_ms']:.2f}ms, baseline {before['p95_ms']:.2f}ms")
+    if result['queries_per_request'] > before['queries_per_request']:
+      regressions.append(f"{name}: {result['queries_per_request']} queries per request, baseline {before['queries_per_request']}")
+  return regressions
+
+def print_results(results, output=sys.stdout):
+  sizes = results['sizes']
+  print(f"scale {results['scale']}: {sizes['words']} words, {sizes['groups']} groups, "
+        f"{sizes['sessions']} sessions, {sizes['reviews']} review items "
+        f"(generated in {results['generate_seconds']}s)", file=output)
+  print(f"{'endpoint':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}", file=output)
+  for name, result in results['endpoints'].items():
+    print(f"{name:<26}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+          f"{result['queries_per_request']:>9}", file=output)
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Benchmark every route against a synthetic data set')
+  parser.add_argument('--scale', choices=SCALES, default='small')
+  parser.add_argument('--requests', type=int, default=50, help='measured requests per endpoint')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--database', help='reuse this database file instead of generating a temporary one')
+  parser.add_argument('--endpoint', action='append', choices=ENDPOINTS, help='only run these endpoints')
+  parser.add_argument('--baseline', help='JSON baseline to compare against')
+  parser.add_argument('--save-baseline', help='write the results as a JSON baseline')
+  parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+  parser.add_argument('--queries-only', action='store_true',
+                      help='only compare queries per request, e.g. with a baseline from another machine')
+  parser.add_argument('--config', action='append', default=[], metavar='KEY=VALUE',
+                      help='app config override, the value is parsed as JSON, e.g. WORDS_SNAPSHOT=true')
+  for size in ('words', 'groups', 'sessions', 'reviews'):
+    parser.add_argument(f'--{size}', type=int, help=f'override the number of {size} of the scale')
+  args = parser.parse_args(argv)
+
+  config = {}
+  for setting in args.config:
+    key, _, value = setting.partition('=')
+    config[key] = json.loads(value)
+
+  # Slow queries are expected at large scales, keep the report readable
+  logging.getLogger('lib.metrics').setLevel(logging.ERROR)
+
+  counts = {size: getattr(args, size) for size in ('words', 'groups', 'sessions', 'reviews') if getattr(args, size) is not None}
+  results = run_benchmarks(args.scale, requests=args.requests, seed=args.seed, database=args.database,
+                           endpoints=args.endpoint, config=config, counts=counts)
+  print_results(results)
+
+  if args.save_baseline:
+    with open(args.save_baseline, 'w') as file:
+      json.dump(results, file, indent=2)
+
+  if args.baseline:
+    with open(args.baseline) as file:
+      regressions = compare(results, json.load(file), None if args.queries_only else args.tolerance)
+    for regression in regressions:
+      print(f'REGRESSION {regression}')
+    if regressions:
+      return 1
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
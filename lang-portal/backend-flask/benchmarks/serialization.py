@@ -0,0 +1,86 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import timeit
+
+# Run from anywhere, the app lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.generate import word_rows
+from lib import json_provider
+from lib.json_provider import FastJSONProvider
+from lib.rows import project
+
+QUERY = '''
+  SELECT id, kanji, romaji, english, correct_count, wrong_count
+  FROM words
+'''
+
+def load_rows(count, seed=0):
+  # Word rows as the /words queries return them
+  connection = sqlite3.connect(':memory:')
+  connection.row_factory = sqlite3.Row
+  connection.execute('''
+    CREATE TABLE words (
+      id INTEGER PRIMARY KEY, kanji TEXT, romaji TEXT, english TEXT, parts TEXT,
+      correct_count INTEGER, wrong_count INTEGER
+    )
+  ''')
+  rng = random.Random(seed)
+  connection.executemany('''
+    INSERT INTO words (kanji, romaji, english, parts, correct_count, wrong_count)
+    VALUES (?, ?, ?, ?, ?, ?)
+  ''', ((*row, rng.randint(0, 50), rng.randint(0, 50)) for row in word_rows(rng, count)))
+  return connection
+
+def by_hand(cursor, rows):
+  # How the routes built their responses before lib/rows.py
+  return [{
+    "id": row["id"],
+    "kanji": row["kanji"],
+    "romaji": row["romaji"],
+    "english": row["english"],
+    "correct_count": row["correct_count"],
+    "wrong_count": row["wrong_count"]
+  } for row in rows]
+
+def measure(count=1000, repeat=7, number=20):
+  # Milliseconds per 1,000 rows for fetching, mapping and serializing a page
+  connection = load_rows(count)
+  app = Flask(__name__)
+  providers = {'stdlib': DefaultJSONProvider(app)}
+  if json_provider.orjson is not None:
+    providers['orjson'] = FastJSONProvider(app)
+
+  results = {}
+  with app.app_context():
+    for mapping_name, mapping in (('by hand', by_hand), ('projected', project)):
+      for provider_name, provider in providers.items():
+        def run():
+          cursor = connection.execute(QUERY)
+          provider.response({'words': mapping(cursor, cursor.fetchall())}).get_data()
+        seconds = min(timeit.repeat(run, repeat=repeat, number=number)) / number
+        results[f'{mapping_name} + {provider_name}'] = seconds * 1000 * 1000 / count
+  return results
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Measure the cost of turning word rows into a JSON response')
+  parser.add_argument('--rows', type=int, default=1000)
+  args = parser.parse_args(argv)
+
+  results = measure(args.rows)
+  baseline = results['by hand + stdlib']
+  print(f"{'rows to response':<26}{'ms / 1,000 rows':>16}{'speedup':>10}")
+  for name, milliseconds in results.items():
+    print(f'{name:<26}{milliseconds:>16.3f}{baseline / milliseconds:>9.1f}x')
+  if json_provider.orjson is None:
+    print('orjson is not installed, only the stdlib provider was measured')
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Run from anywhere, the app lives one directory up
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.generate import generate
+
+# Run in a fresh interpreter for every sample, so nothing is imported yet.
+# Prints the milliseconds spent in each stage of a worker boot as JSON.
+BOOT_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app({'DATABASE': sys.argv[1]})
+created = time.perf_counter()
+response = application.test_client().get('/api/study-activities', headers={'Origin': 'http://localhost:8081'})
+assert response.status_code == 200, response.status_code
+served = time.perf_counter()
+print(json.dumps({
+  'import': (imported - started) * 1000,
+  'create_app': (created - imported) * 1000,
+  'first_request': (served - created) * 1000
+}))
+'''
+
+STAGES = ('import', 'create_app', 'first_request')
+
+def boot(database):
+  # One worker boot in a new process
+  output = subprocess.run(
+    [sys.executable, '-c', BOOT_SCRIPT, database],
+    cwd=ROOT, check=True, capture_output=True, text=True
+  ).stdout
+  return json.loads(output.strip().splitlines()[-1])
+
+def measure(samples=10, database=None, scale='tiny'):
+  # Median milliseconds of each boot stage over samples fresh processes,
+  # against a generated database
+  with tempfile.TemporaryDirectory() as directory:
+    if database is None:
+      database = os.path.join(directory, 'startup.db')
+      from app import create_app
+      app = create_app({'DATABASE': database})
+      with app.app_context():
+        cursor = app.db.cursor()
+        app.db.setup_tables(cursor)
+        generate(cursor, scale)
+      app.db.pool.close_all()
+      if app.db.read_pool is not None:
+        app.db.read_pool.close_all()
+
+    runs = [boot(database) for _ in range(samples)]
+
+  results = {stage: round(statistics.median(run[stage] for run in runs), 3) for stage in STAGES}
+  results['total'] = round(statistics.median(sum(run[stage] for stage in STAGES) for run in runs), 3)
+  return results
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Measure how long a worker takes to import the app, create it and serve a first request')
+  parser.add_argument('--samples', type=int, default=10, help='fresh processes to boot')
+  parser.add_argument('--database', help='boot against this database instead of a generated one')
+  args = parser.parse_args(argv)
+
+  results = measure(args.samples, args.database)
+  print(f"{'stage':<16}{'median ms':>12}")
+  for stage, milliseconds in results.items():
+    print(f'{stage:<16}{milliseconds:>12.2f}')
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,129 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from lib.jobs import job_context
+
+# Rows moved per transaction
+DEFAULT_BATCH_SIZE = 5000
+
+ARCHIVE_SCHEMA = (
+  '''
+  CREATE TABLE IF NOT EXISTS archive.word_review_items (
+    id INTEGER PRIMARY KEY,  -- Same id as in the main database
+    word_id INTEGER NOT NULL,
+    study_session_id INTEGER NOT NULL,
+    correct BOOLEAN NOT NULL,
+    created_at DATETIME
+  )
+  ''',
+  '''
+  CREATE INDEX IF NOT EXISTS archive.idx_archived_review_items_session_word
+    ON word_review_items (study_session_id, word_id, correct)
+  ''',
+  '''
+  CREATE INDEX IF NOT EXISTS archive.idx_archived_review_items_word
+    ON word_review_items (word_id, id)
+  '''
+)
+
+def archive_path(database):
+  # words.db -> words.archive.db, an in-memory database gets an in-memory archive
+  if database == ':memory:':
+    return ':memory:'
+  root, _ = os.path.splitext(database)
+  return root + '.archive.db'
+
+class Archive:
+  """Old review items, moved out of word_review_items into a separate file.
+
+  The archive is a second SQLite database, ATTACHed as "archive" to the
+  connections that need it, on first use. Request-path queries only ever
+  read the main word_review_items, which stays small; archived history is
+  read through the archive API.
+
+  Moving items does not change any rollup. word_reviews, daily_activity,
+  study_totals and the session summaries are folded in by triggers when an
+  item is inserted and nothing undoes that on delete, so the dashboard
+  keeps counting archived items.
+  """
+
+  def __init__(self, db, path=None):
+    self.db = db
+    self._path = path
+
+  @property
+  def path(self):
+    # Next to the database unless configured, per learner in tenant mode
+    return self._path or archive_path(self.db.database)
+
+  def exists(self):
+    return self.path == ':memory:' or os.path.exists(self.path)
+
+  def attach(self, cursor, create=False):
+    # Attach the archive to the cursor's connection unless it already is.
+    # Returns False when there is no archive yet and create is off, e.g. on
+    # read-only connections.
+    cursor.execute('PRAGMA database_list')
+    if any(row[1] == 'archive' for row in cursor.fetchall()):
+      return True
+    if not create and not self.exists():
+      return False
+
+    cursor.execute('ATTACH DATABASE ? AS archive', (self.path,))
+    # An in-memory archive is new on every connection it is attached to
+    if create or self.path == ':memory:':
+      for statement in ARCHIVE_SCHEMA:
+        cursor.execute(statement)
+    return True
+
+def cutoff(days, now=None):
+  # created_at of the newest review item old enough to be archived, in the
+  # format SQLite's CURRENT_TIMESTAMP writes
+  now = now or datetime.now(timezone.utc)
+  return (now - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+def archive_review_items(app, job, days, batch_size=DEFAULT_BATCH_SIZE):
+  # Move review items older than days into the archive, in short
+  # transactions over id ranges. A transaction spanning two WAL databases
+  # is not atomic, so each batch is copied and committed first and deleted
+  # in a second transaction, only where the copy is in the archive. A crash
+  # in between leaves items in both files, never in neither; copying
+  # ignores ids already archived, so an interrupted run is simply repeated
+  # and deletes them then.
+  db, archive = app.db, app.archive
+  before = cutoff(days)
+
+  with job_context(app):
+    cursor = db.cursor()
+    archive.attach(cursor, create=True)
+    cursor.execute('SELECT MIN(id), MAX(id) FROM word_review_items WHERE created_at < ?', (before,))
+    first, last = cursor.fetchone()
+    db.commit()
+
+  job.progress.update({'cutoff': before, 'review_items_moved': 0, 'last_id': last, 'next_id': first})
+
+  if first is not None:
+    start = first
+    while start <= last:
+      end = min(start + batch_size - 1, last)
+      with job_context(app):
+        cursor = db.cursor()
+        archive.attach(cursor, create=True)
+        cursor.execute('''
+          INSERT OR IGNORE INTO archive.word_review_items (id, word_id, study_session_id, correct, created_at)
+          SELECT id, word_id, study_session_id, correct, created_at
+          FROM main.word_review_items
+          WHERE id BETWEEN ? AND ? AND created_at < ?
+        ''', (start, end, before))
+        db.commit()
+
+        cursor.execute('''
+          DELETE FROM main.word_review_items
+          WHERE id IN (SELECT id FROM archive.word_review_items WHERE id BETWEEN ? AND ?)
+        ''', (start, end))
+        job.progress['review_items_moved'] += max(cursor.rowcount, 0)
+        db.commit()
+      start = end + 1
+      job.progress['next_id'] = start
+
+  return {'cutoff': before, 'review_items_moved': job.progress['review_items_moved']}
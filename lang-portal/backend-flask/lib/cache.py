@@ -0,0 +1,89 @@
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, request
+
+class ResponseCache:
+  """In-memory cache of GET responses, keyed by path and query arguments.
+
+  Entries are stamped with the database write generation (Db.generation) and
+  served until the generation changes or they are older than max_age. Every
+  response carries an ETag of its body, so clients polling with If-None-Match
+  get a 304 without a body while nothing has changed.
+  """
+
+  def __init__(self, db, max_entries=256, max_age=60, enabled=True):
+    self.db = db
+    self.max_entries = max_entries
+    self.max_age = max_age  # Bounds staleness of answers that depend on the clock
+    self.enabled = enabled
+    self._entries = OrderedDict()  # key -> (generation, stored_at, etag, body, mimetype)
+    self._lock = threading.Lock()
+    self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+  def _lookup(self, key, generation):
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        return None
+      if entry[0] != generation or time.monotonic() - entry[1] >= self.max_age:
+        del self._entries[key]
+        return None
+      self._entries.move_to_end(key)
+      return entry
+
+  def _store(self, key, entry):
+    with self._lock:
+      self._entries[key] = entry
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def _count(self, name):
+    with self._lock:
+      self.stats[name] += 1
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+
+  def status(self):
+    with self._lock:
+      return {'entries': len(self._entries), **self.stats}
+
+  def cached(self, view):
+    # Decorator for GET views whose response only depends on the database
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+      if not self.enabled:
+        return view(*args, **kwargs)
+
+      # tenant is None unless every learner has a database of their own
+      key = (self.db.tenant, request.path, tuple(sorted(request.args.items(multi=True))))
+      # Read the generation before running the view, so a write committed
+      # while it runs makes the stored entry stale rather than the new data
+      generation = self.db.generation()
+
+      entry = self._lookup(key, generation)
+      if entry is not None:
+        self._count('hits')
+      else:
+        self._count('misses')
+        response = view(*args, **kwargs)
+        if not isinstance(response, Response) or response.status_code != 200 or response.is_streamed:
+          return response  # Errors and streams are never cached
+
+        body = response.get_data()
+        etag = hashlib.sha1(body).hexdigest()
+        entry = (generation, time.monotonic(), etag, body, response.mimetype)
+        self._store(key, entry)
+
+      response = Response(entry[3], mimetype=entry[4])
+      response.set_etag(entry[2])
+      response = response.make_conditional(request)
+      if response.status_code == 304:
+        self._count('not_modified')
+      return response
+    return wrapper
@@ -1,34 +1,257 @@
+import itertools
 import sqlite3
 import json
-from flask import g
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import pathname2url
+from flask import g, request, has_request_context
+
+from lib import importer
+from lib.metrics import InstrumentedCursor
+from lib.pool import ConnectionPool
+
+# Storage profiles are sets of PRAGMAs applied to every new connection
+STORAGE_PROFILES = {
+  'default': {},
+  'wal': {
+    'journal_mode': 'WAL',  # Readers never wait for the writer and vice versa
+    'synchronous': 'NORMAL',  # Safe with WAL, fsync only at checkpoints
+    'mmap_size': 268435456,  # Read pages through a 256MB memory map
+    'cache_size': -16000,  # 16MB page cache per connection
+    'temp_store': 'MEMORY'  # Keep sorter and temp tables off disk
+  }
+}
+
+# PRAGMAs that need write access and are left out on read-only connections
+WRITE_PRAGMAS = ('journal_mode', 'synchronous')
+
+# Request methods that are served from read-only connections
+READ_METHODS = ('GET', 'HEAD')
+
+# A migration starting with "-- requires: <feature> ..." is skipped while the
+# SQLite library lacks one of them, see Db.sqlite_features
+REQUIRES = re.compile(r'\A-- requires: (.+)$', re.M)
+
+# SQL files live next to lib/, so they are found from any working directory
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql')
 
 class Db:
-  def __init__(self, database='words.db'):
+  tenant = None  # Learner this database belongs to, see lib/tenants.py
+  _ids = itertools.count(1)
+
+  def __init__(self, database='words.db', pool_size=5, pragmas=None, profile='default', metrics=None, parallel_reads=0):
     self.database = database
-    self.connection = None
+    # Names of the request's connections in g, one pair per Db, so several
+    # databases can be used in one request (see lib/tenants.py)
+    number = next(Db._ids)
+    self._writer_key = f'db_{number}'
+    self._reader_key = f'db_reader_{number}'
+    self.profile = profile
+    self.metrics = metrics  # lib.metrics.Metrics recording the statements of each request
+    pragmas = {**STORAGE_PROFILES[profile], **(pragmas or {})}
+    # auto_vacuum only takes effect on a new database before anything else is
+    # written to it, switching to WAL included, so it goes first
+    pragmas = dict(sorted(pragmas.items(), key=lambda item: item[0] != 'auto_vacuum'))
+    self._auto_vacuum = pragmas.get('auto_vacuum')
+
+    # Connection only used to watch PRAGMA data_version, see generation()
+    self._watcher = None
+    self._watcher_lock = threading.Lock()
+
+    # Worker threads running independent reads concurrently, see read_concurrently()
+    self.parallel_pool = None
+    self._executor = None
+    self._executor_lock = threading.Lock()
+
+    # An in-memory database only lives as long as its connection, so it is
+    # served from a single long-lived connection instead of a pool
+    if database == ':memory:':
+      self.pool = ConnectionPool(database, max_size=1, pragmas=pragmas)
+      self.read_pool = None
+      return
+
+    # With WAL, reads go to a pool of read-only connections while all writes
+    # are serialized through a single writer connection
+    if pragmas.get('journal_mode', '').upper() == 'WAL':
+      self.pool = ConnectionPool(database, max_size=1, pragmas=pragmas)
+      read_pragmas = {name: value for name, value in pragmas.items() if name not in WRITE_PRAGMAS}
+      read_uri = 'file:' + pathname2url(os.path.abspath(database)) + '?mode=ro'
+      self.read_pool = ConnectionPool(read_uri, max_size=pool_size, pragmas=read_pragmas, uri=True)
+      self._journal_mode = pragmas['journal_mode']
+      self._journal_lock = threading.Lock()
+
+      # Each worker gets a read-only connection of its own, so concurrent
+      # reads never wait for connections held by requests
+      if parallel_reads > 1:
+        self.parallel_pool = ConnectionPool(read_uri, max_size=parallel_reads, pragmas=read_pragmas, uri=True)
+    else:
+      self.pool = ConnectionPool(database, max_size=pool_size, pragmas=pragmas)
+      self.read_pool = None
 
-  def get(self):
-    if 'db' not in g:
-      g.db = sqlite3.connect(self.database)
-      g.db.row_factory = sqlite3.Row  # Return rows as dictionaries
-    return g.db
+  def _prepare_journal(self):
+    # journal_mode is stored in the database file, so it has to be set once
+    # before the first read-only connection opens it
+    with self._journal_lock:
+      if self._journal_mode is None:
+        return
+      connection = sqlite3.connect(self.database)
+      try:
+        if self._auto_vacuum is not None:
+          connection.execute(f'PRAGMA auto_vacuum = {self._auto_vacuum}')
+        connection.execute(f'PRAGMA journal_mode = {self._journal_mode}')
+      finally:
+        connection.close()
+      self._journal_mode = None
+
+  def is_read_request(self):
+    return has_request_context() and request.method in READ_METHODS
+
+  def get(self, readonly=None):
+    if readonly is None:
+      readonly = self.is_read_request()
+
+    if readonly and self.read_pool is not None:
+      if self._reader_key not in g:
+        if self._journal_mode is not None:
+          self._prepare_journal()
+        setattr(g, self._reader_key, self.read_pool.acquire())
+      return g.get(self._reader_key)
+
+    if self._writer_key not in g:
+      setattr(g, self._writer_key, self.pool.acquire())
+    return g.get(self._writer_key)
+
+  def generation(self):
+    # A number that changes whenever a write is committed to the database, by
+    # this process or any other. data_version changes when any connection other
+    # than the one asking commits, so a dedicated connection watches it. An
+    # in-memory database has only one connection, which counts its own changes.
+    if self.database == ':memory:':
+      return self.get().total_changes
+
+    with self._watcher_lock:
+      if self._watcher is None:
+        self._watcher = sqlite3.connect(self.database, check_same_thread=False)
+      return self._watcher.execute('PRAGMA data_version').fetchone()[0]
 
   def commit(self):
-    self.get().commit()
+    self.get(readonly=False).commit()
+
+  def rollback(self):
+    self.get(readonly=False).rollback()
 
-  def cursor(self):
+  def cursor(self, readonly=None):
     # Ensure the connection is valid before getting a cursor
-    connection = self.get()
-    return connection.cursor()
+    connection = self.get(readonly)
+    cursor = connection.cursor()
+
+    # During a request every statement is timed for the metrics
+    if self.metrics is not None and has_request_context():
+      records = self.metrics.statement_records()
+      if records is not None:
+        return InstrumentedCursor(cursor, records)
+    return cursor
 
   def close(self):
-    db = g.pop('db', None)
+    # Hand the connections back to their pools instead of closing them
+    db = g.pop(self._writer_key, None)
     if db is not None:
-      db.close()
+      self.pool.release(db)
+    db_reader = g.pop(self._reader_key, None)
+    if db_reader is not None:
+      self.read_pool.release(db_reader)
+
+  def pools(self):
+    # (name, pool) of every pool this database opens connections from
+    pools = [('writer', self.pool)]
+    if self.read_pool is not None:
+      pools.append(('reader', self.read_pool))
+    if self.parallel_pool is not None:
+      pools.append(('parallel', self.parallel_pool))
+    return pools
+
+  def in_use(self):
+    # Connections currently checked out of any pool
+    return sum(pool.status()['in_use'] for _, pool in self.pools())
+
+  def close_all(self):
+    # Close every idle connection, the watcher and the read workers, e.g.
+    # before the database file is dropped
+    with self._executor_lock:
+      executor, self._executor = self._executor, None
+    if executor is not None:
+      executor.shutdown(wait=True)
+    for _, pool in self.pools():
+      pool.close_all()
+    with self._watcher_lock:
+      watcher, self._watcher = self._watcher, None
+    if watcher is not None:
+      watcher.close()
+
+  def read_concurrently(self, reads):
+    # Run independent reads, a dict of name -> function(cursor), and return
+    # their results by name. With parallel reads enabled every function runs
+    # on a worker thread with its own read-only connection; SQLite releases
+    # the GIL while a statement runs, so the total time approaches that of
+    # the slowest read. Reads on different connections may see different
+    # commits. Without a read pool (in-memory and rollback journal databases)
+    # the functions run one after the other on the request connection.
+    if self.parallel_pool is None or len(reads) < 2:
+      cursor = self.cursor()
+      return {name: read(cursor) for name, read in reads.items()}
+
+    if self._journal_mode is not None:
+      self._prepare_journal()
+    records = self.metrics.statement_records() if self.metrics is not None and has_request_context() else None
+    executor = self._get_executor()
+    futures = {name: executor.submit(self._run_read, read, records) for name, read in reads.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+  def _get_executor(self):
+    with self._executor_lock:
+      if self._executor is None:
+        self._executor = ThreadPoolExecutor(max_workers=self.parallel_pool.max_size, thread_name_prefix='db-read')
+      return self._executor
+
+  def _run_read(self, read, records):
+    # Statements are recorded on a list of their own, which is released
+    # before the connection goes back to the pool
+    statements = [] if records is not None else None
+    connection = self.parallel_pool.acquire()
+    try:
+      cursor = connection.cursor()
+      if statements is not None:
+        cursor = InstrumentedCursor(cursor, statements)
+      return read(cursor)
+    finally:
+      if statements is not None:
+        self.metrics.release(statements)
+        records.extend(statements)
+      self.parallel_pool.release(connection)
+
+  def row_count(self, table_name, cursor=None):
+    # Row totals are kept current by triggers (see sql/migrations), so this
+    # is a primary key lookup instead of a COUNT(*) scan
+    if cursor is None:
+      cursor = self.cursor()
+    cursor.execute('SELECT row_count FROM row_counts WHERE table_name = ?', (table_name,))
+    row = cursor.fetchone()
+    return row['row_count'] if row else 0
+
+  def table_version(self, table_name, cursor=None):
+    # A number triggers bump on every change to the table's rows (see
+    # sql/migrations), None for tables without one
+    if cursor is None:
+      cursor = self.cursor()
+    cursor.execute('SELECT version FROM table_versions WHERE table_name = ?', (table_name,))
+    row = cursor.fetchone()
+    return row['version'] if row else None
 
   # Function to load SQL from a file
   def sql(self, filepath):
-    with open('sql/' + filepath, 'r') as file:
+    with open(os.path.join(SQL_DIR, filepath), 'r') as file:
       return file.read()
 
   # Function to load the words from a JSON file
@@ -71,6 +294,62 @@ class Db:
     cursor.execute(self.sql('setup/create_table_study_session_reviews.sql'))
     self.get().commit()
 
+    # Bring the schema up to date with the versioned migrations
+    self.migrate(cursor)
+
+  def migrate(self, cursor):
+    # Apply the migrations in sql/migrations that have not been applied yet,
+    # in order of their numeric prefix, each one in its own transaction
+    cursor.execute(self.sql('setup/create_table_schema_migrations.sql'))
+    self.get().commit()
+
+    cursor.execute('SELECT version FROM schema_migrations')
+    applied_versions = {row['version'] for row in cursor.fetchall()}
+
+    applied = []
+    features = None
+    for filename in sorted(os.listdir(os.path.join(SQL_DIR, 'migrations'))):
+      version = filename.split('_', 1)[0]
+      if not filename.endswith('.sql') or not version.isdigit() or version in applied_versions:
+        continue
+
+      script = self.sql('migrations/' + filename)
+      requires = REQUIRES.match(script)
+      if requires:
+        # Not recorded, so it is applied once SQLite supports it
+        if features is None:
+          features = self.sqlite_features(cursor)
+        if not set(requires.group(1).split()) <= features:
+          continue
+
+      try:
+        # The script leaves its transaction open, so the migration and its
+        # record are committed together
+        cursor.executescript('BEGIN;\n' + script + ';')
+        cursor.execute('INSERT INTO schema_migrations (version, name) VALUES (?, ?)', (version, filename))
+        self.get().commit()
+      except sqlite3.Error:
+        self.get().rollback()
+        raise
+      applied.append(filename)
+    return applied
+
+  def sqlite_features(self, cursor):
+    # Optional SQLite features migrations can require. The trigram tokenizer
+    # of FTS5 came with SQLite 3.34, it is probed with a table that is
+    # rolled back right away.
+    features = set()
+    cursor.execute('SAVEPOINT probe_features')
+    try:
+      cursor.execute("CREATE VIRTUAL TABLE temp.probe_trigram USING fts5(text, tokenize='trigram')")
+      features.add('trigram')
+    except sqlite3.OperationalError:
+      pass
+    finally:
+      cursor.execute('ROLLBACK TO probe_features')
+      cursor.execute('RELEASE probe_features')
+    return features
+
   def import_study_activities_json(self,cursor,data_json_path):
     study_actvities = self.load_json(data_json_path)
     for activity in study_actvities:
@@ -80,46 +359,14 @@ class Db:
     self.get().commit()
 
   def import_word_json(self,cursor,group_name,data_json_path):
-      # Insert a new group
-      cursor.execute('''
-        INSERT INTO groups (name) VALUES (?)
-      ''', (group_name,))
-      self.get().commit()
-
-      # Get the ID of the group
-      cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
-      core_verbs_group_id = cursor.fetchone()[0]
-
-      # Insert some sample words (verbs) from JSON file and associate with the group
-      words = self.load_json(data_json_path)
-
-      for word in words:
-        # Insert the word into the words table
-        cursor.execute('''
-          INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)
-        ''', (word['kanji'], word['romaji'], word['english'], json.dumps(word['parts'])))
-        
-        # Get the last inserted word's ID
-        word_id = cursor.lastrowid
-
-        # Insert the word-group relationship into word_groups table
-        cursor.execute('''
-          INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)
-        ''', (word_id, core_verbs_group_id))
-      self.get().commit()
-
-      # Update the words_count in the groups table by counting all words in the group
-      cursor.execute('''
-        UPDATE groups
-        SET words_count = (
-          SELECT COUNT(*) FROM word_groups WHERE group_id = ?
-        )
-        WHERE id = ?
-      ''', (core_verbs_group_id, core_verbs_group_id))
-
-      self.get().commit()
+      # Import a JSON, JSONL or CSV vocabulary file into the group
+      result = self.import_words(cursor, group_name, data_json_path)
+      print(f"Successfully added {result['words_linked']} words to the '{group_name}' group.")
+      return result
 
-      print(f"Successfully added {len(words)} verbs to the '{group_name}' group.")
+  def import_words(self, cursor, group_name, path, batch_size=5000):
+    # Stream the file and bulk insert it in one transaction (see lib/importer.py)
+    return importer.import_words(cursor, importer.read_words(path), group_name, batch_size=batch_size)
 
   # Initialize the database with sample data
   def init(self, app):
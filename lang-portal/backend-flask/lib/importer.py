@@ -0,0 +1,172 @@
+import csv
+import json
+import os
+import re
+import time
+from itertools import islice
+
+# Whitespace between values of a JSON array
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# One encoder for all rows, compact and keeping kana/kanji readable
+PARTS_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+def iter_json_array(file, chunk_size=1 << 16):
+  # Yield the values of a top level JSON array while reading the file in
+  # chunks, so a large vocabulary file is never loaded as a whole
+  decoder = json.JSONDecoder()
+  buffer = ''
+  pos = 0
+  started = False
+  eof = False
+  while True:
+    pos = WHITESPACE.match(buffer, pos).end()
+    if pos < len(buffer):
+      char = buffer[pos]
+      if not started:
+        if char != '[':
+          raise ValueError('Expected a JSON array of words')
+        started = True
+        pos += 1
+        continue
+      if char == ']':
+        return
+      if char == ',':
+        pos += 1
+        continue
+      try:
+        value, pos = decoder.raw_decode(buffer, pos)
+        yield value
+        continue
+      except json.JSONDecodeError:
+        # Most likely the value continues in the next chunk
+        if eof:
+          raise
+    elif eof:
+      raise ValueError('Unexpected end of JSON array')
+
+    chunk = file.read(chunk_size)
+    buffer = buffer[pos:] + chunk
+    pos = 0
+    if not chunk:
+      eof = True
+
+def iter_jsonl(file):
+  for line in file:
+    if line.strip():
+      yield json.loads(line)
+
+def iter_csv(file):
+  # Columns: kanji, romaji, english and optionally parts as a JSON string
+  for row in csv.DictReader(file):
+    yield row
+
+def read_words(path):
+  # Pick the reader from the file extension
+  extension = os.path.splitext(path)[1].lower()
+  readers = {'.json': iter_json_array, '.jsonl': iter_jsonl, '.ndjson': iter_jsonl, '.csv': iter_csv}
+  if extension not in readers:
+    raise ValueError(f'Unsupported vocabulary file type: {extension}')
+
+  with open(path, 'r', encoding='utf-8', newline='') as file:
+    yield from readers[extension](file)
+
+def word_rows(words):
+  for word in words:
+    parts = word.get('parts')
+    if parts is None or parts == '':
+      parts = '[]'
+    else:
+      # Stored compact on one line, GET /groups/<id>/words/raw streams it
+      # into NDJSON as is. Malformed JSON fails the import.
+      if isinstance(parts, str):
+        try:
+          parts = json.loads(parts)
+        except json.JSONDecodeError as e:
+          raise ValueError(f"Invalid parts JSON for {word['kanji']}: {e}") from None
+      parts = PARTS_ENCODER.encode(parts)
+    yield (word['kanji'], word['romaji'], word['english'], parts)
+
+def import_words(cursor, words, group_name, batch_size=5000):
+  # Import words (an iterable of dicts, see read_words) into a group in one
+  # transaction. Rows are staged in a temp table in batches, then inserted
+  # with set based statements that skip words already stored with the same
+  # kanji, romaji and english, and link every word to the group once.
+  started = time.perf_counter()
+  connection = cursor.connection
+
+  cursor.execute('DROP TABLE IF EXISTS temp.import_words')
+  cursor.execute('''
+    CREATE TEMP TABLE import_words (
+      kanji TEXT NOT NULL,
+      romaji TEXT NOT NULL,
+      english TEXT NOT NULL,
+      parts TEXT NOT NULL
+    )
+  ''')
+
+  try:
+    # Reuse the group if it exists, so importing the same file twice is a no-op
+    cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
+    group = cursor.fetchone()
+    if group:
+      group_id = group[0]
+    else:
+      cursor.execute('INSERT INTO groups (name) VALUES (?)', (group_name,))
+      group_id = cursor.lastrowid
+
+    rows = word_rows(words)
+    rows_read = 0
+    while True:
+      batch = list(islice(rows, batch_size))
+      if not batch:
+        break
+      cursor.executemany('''
+        INSERT INTO import_words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)
+      ''', batch)
+      rows_read += len(batch)
+
+    # First occurrence of every word in the file that is not stored yet
+    cursor.execute('''
+      INSERT INTO words (kanji, romaji, english, parts)
+      SELECT kanji, romaji, english, parts
+      FROM import_words t
+      WHERE t.rowid IN (SELECT MIN(rowid) FROM import_words GROUP BY kanji, romaji, english)
+        AND NOT EXISTS (
+          SELECT 1 FROM words w
+          WHERE w.kanji = t.kanji AND w.romaji = t.romaji AND w.english = t.english
+        )
+      ORDER BY t.rowid
+    ''')
+    words_inserted = cursor.rowcount
+
+    # Link every imported word to the group, the trigger keeps words_count current
+    cursor.execute('''
+      INSERT INTO word_groups (word_id, group_id)
+      SELECT word_id, ? FROM (
+        SELECT MIN(w.id) AS word_id
+        FROM import_words t
+        JOIN words w ON w.kanji = t.kanji AND w.romaji = t.romaji AND w.english = t.english
+        GROUP BY t.kanji, t.romaji, t.english
+      )
+      WHERE word_id NOT IN (SELECT word_id FROM word_groups WHERE group_id = ?)
+    ''', (group_id, group_id))
+    words_linked = cursor.rowcount
+
+    connection.commit()
+  except Exception:
+    connection.rollback()
+    raise
+  finally:
+    cursor.execute('DROP TABLE IF EXISTS temp.import_words')
+
+  seconds = time.perf_counter() - started
+  return {
+    'group_id': group_id,
+    'rows_read': rows_read,
+    'words_inserted': words_inserted,
+    'duplicates_skipped': rows_read - words_inserted,
+    'words_linked': words_linked,
+    'seconds': seconds,
+    'rows_per_second': rows_read / seconds if seconds > 0 else 0.0
+  }
@@ -0,0 +1,122 @@
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from flask import has_app_context
+
+logger = logging.getLogger(__name__)
+
+def job_context(app):
+  # The app context one step of a job runs in. Background jobs get a fresh one
+  # per step, so the connection is handed back in between. Inline jobs reuse
+  # the request's, which already holds the only connection of an in-memory
+  # database.
+  return nullcontext() if has_app_context() else app.app_context()
+
+class Job:
+  """A unit of background work and its progress, as reported by GET /api/jobs/<id>."""
+
+  def __init__(self, job_id, name, tenant=None):
+    self.id = job_id
+    self.name = name
+    self.tenant = tenant  # Learner whose database the job works on, in tenant mode
+    self.state = 'pending'  # pending, running, done or failed
+    self.progress = {}  # Updated by the job as it goes
+    self.result = None
+    self.error = None
+    self.created_at = time.time()
+    self.started_at = None
+    self.finished_at = None
+
+  @property
+  def finished(self):
+    return self.state in ('done', 'failed')
+
+  def to_dict(self):
+    return {
+      'id': self.id,
+      'name': self.name,
+      'state': self.state,
+      'progress': dict(self.progress),
+      'result': self.result,
+      'error': self.error,
+      'created_at': self.created_at,
+      'started_at': self.started_at,
+      'finished_at': self.finished_at
+    }
+
+class JobRunner:
+  """Runs jobs one at a time on a background thread and remembers recent ones.
+
+  A job is a function taking the app and its Job, returning its result. It
+  runs each transaction in job_context(app), so the writer connection goes
+  back to the pool between steps and requests can write in between. With
+  background off (an in-memory database has a single connection, held by
+  the request) jobs run inline in submit().
+  """
+
+  def __init__(self, app, background=True, max_jobs=50):
+    self.app = app
+    self.background = background
+    self.max_jobs = max_jobs
+    self._jobs = OrderedDict()  # id -> Job, oldest first
+    self._ids = itertools.count(1)
+    self._executor = None
+    self._lock = threading.Lock()
+
+  def submit(self, name, function, exclusive=True):
+    # An exclusive job is not started twice, while one of the same name is
+    # pending or running for the same learner that one is returned instead
+    tenant = self.app.db.tenant
+    with self._lock:
+      if exclusive:
+        for job in self._jobs.values():
+          if job.name == name and job.tenant == tenant and not job.finished:
+            return job
+
+      job = Job(next(self._ids), name, tenant)
+      self._jobs[job.id] = job
+      while len(self._jobs) > self.max_jobs:
+        oldest = next(iter(self._jobs.values()))
+        if not oldest.finished:
+          break
+        del self._jobs[oldest.id]
+
+      if self.background and self._executor is None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='jobs')
+
+    if self.background:
+      self._executor.submit(self._run, job, function)
+    else:
+      self._run(job, function)
+    return job
+
+  def _run(self, job, function):
+    # In tenant mode the job thread is bound to the learner that submitted it
+    bind = getattr(self.app.db, 'bind', None)
+    if bind is not None:
+      bind(job.tenant)
+    job.state = 'running'
+    job.started_at = time.time()
+    try:
+      job.result = function(self.app, job)
+      job.state = 'done'
+    except Exception as e:
+      logger.exception('Job %s (%s) failed', job.id, job.name)
+      job.error = str(e)
+      job.state = 'failed'
+    finally:
+      if bind is not None:
+        bind(None)
+    job.finished_at = time.time()
+
+  def get(self, job_id):
+    with self._lock:
+      return self._jobs.get(job_id)
+
+  def shutdown(self, wait=True):
+    if self._executor is not None:
+      self._executor.shutdown(wait=wait)
@@ -0,0 +1,51 @@
+from flask.json.provider import DefaultJSONProvider
+
+# orjson is optional, without it responses go through the stdlib encoder
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+  """JSON provider serializing responses with orjson when it is installed.
+
+  orjson writes UTF-8 bytes in one pass in C, so responses skip the str
+  round trip of the stdlib encoder. Output stays compatible with the
+  default provider: keys are sorted when sort_keys is set, dates go
+  through the same default() hook, and debug mode indents. Non-ASCII text
+  is written as UTF-8 instead of \\u escapes. Calls with stdlib only
+  arguments (cls, custom separators, ...) fall back to json.dumps, and so
+  does anything orjson refuses to encode, like integers beyond 64 bits.
+
+  One difference remains: orjson writes NaN and infinities as null where
+  the stdlib writes NaN and Infinity, which are not JSON. SQLite stores
+  NaN as NULL, so only computed values can hit this.
+  """
+
+  def _options(self, indent=False):
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if self.sort_keys:
+      options |= orjson.OPT_SORT_KEYS
+    if indent:
+      options |= orjson.OPT_INDENT_2
+    return options
+
+  def dumps(self, obj, **kwargs):
+    if orjson is None or kwargs:
+      return super().dumps(obj, **kwargs)
+    try:
+      return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+    except orjson.JSONEncodeError:
+      return super().dumps(obj)
+
+  def response(self, *args, **kwargs):
+    if orjson is None:
+      return super().response(*args, **kwargs)
+
+    obj = self._prepare_response_obj(args, kwargs)
+    indent = (self.compact is None and self._app.debug) or self.compact is False
+    try:
+      body = orjson.dumps(obj, default=self.default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+    except orjson.JSONEncodeError:
+      return super().response(*args, **kwargs)
+    return self._app.response_class(body, mimetype=self.mimetype)
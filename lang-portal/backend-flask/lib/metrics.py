@@ -0,0 +1,303 @@
+import bisect
+import functools
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets, in seconds
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Upper bounds of the statements per request buckets
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 25, 50, 100)
+
+# Distinct statements tracked, further ones are folded into one entry
+MAX_STATEMENTS = 500
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql):
+  # One label per statement shape: literals become ?, lists of placeholders
+  # collapse to (...) and whitespace to single spaces
+  sql = STRING_LITERAL.sub('?', sql)
+  sql = NUMBER_LITERAL.sub('?', sql)
+  sql = PLACEHOLDER_LIST.sub('(...)', sql)
+  return WHITESPACE.sub(' ', sql).strip()
+
+class Histogram:
+  """Cumulative Prometheus style histogram with fixed buckets."""
+
+  def __init__(self, buckets):
+    self.buckets = buckets
+    self.counts = [0] * (len(buckets) + 1)  # The last one is +Inf
+    self.sum = 0.0
+    self.count = 0
+
+  def observe(self, value):
+    self.counts[bisect.bisect_left(self.buckets, value)] += 1
+    self.sum += value
+    self.count += 1
+
+  def samples(self):
+    # (le, cumulative count) pairs
+    total = 0
+    for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+      total += count
+      yield ('+Inf' if bound == float('inf') else repr(bound)), total
+
+class StatementRecord:
+  __slots__ = ('connection', 'sql', 'params', 'seconds', 'rows', 'plan')
+
+  def __init__(self, connection, sql, params):
+    self.connection = connection  # None once handed back, see Metrics.release
+    self.sql = sql
+    self.params = params  # None for executemany and scripts
+    self.seconds = 0.0
+    self.rows = 0
+    self.plan = None
+
+class InstrumentedCursor:
+  """A sqlite3.Cursor that times every statement of the current request.
+
+  SQLite runs a query step by step as rows are fetched, so the time spent
+  in fetchone/fetchall and iterating is added to the statement that
+  produced the rows.
+  """
+
+  def __init__(self, cursor, records):
+    self._cursor = cursor
+    self._records = records
+    self._record = None
+
+  def _run(self, method, sql, *args, params=None):
+    self._record = record = StatementRecord(self._cursor.connection, sql, params)
+    self._records.append(record)
+    started = time.perf_counter()
+    try:
+      method(sql, *args)
+    finally:
+      record.seconds += time.perf_counter() - started
+    if self._cursor.description is None and self._cursor.rowcount > 0:
+      record.rows = self._cursor.rowcount  # Rows changed by INSERT, UPDATE or DELETE
+    return self
+
+  def execute(self, sql, params=()):
+    return self._run(self._cursor.execute, sql, params, params=params)
+
+  def executemany(self, sql, seq_of_params):
+    return self._run(self._cursor.executemany, sql, seq_of_params)
+
+  def executescript(self, script):
+    return self._run(self._cursor.executescript, script)
+
+  def _fetch(self, method, *args):
+    started = time.perf_counter()
+    result = method(*args)
+    if self._record is not None:
+      self._record.seconds += time.perf_counter() - started
+    return result
+
+  def fetchone(self):
+    row = self._fetch(self._cursor.fetchone)
+    if row is not None and self._record is not None:
+      self._record.rows += 1
+    return row
+
+  def fetchmany(self, size=None):
+    rows = self._fetch(self._cursor.fetchmany, size or self._cursor.arraysize)
+    if self._record is not None:
+      self._record.rows += len(rows)
+    return rows
+
+  def fetchall(self):
+    rows = self._fetch(self._cursor.fetchall)
+    if self._record is not None:
+      self._record.rows += len(rows)
+    return rows
+
+  def __iter__(self):
+    while True:
+      row = self.fetchone()
+      if row is None:
+        return
+      yield row
+
+  def __getattr__(self, name):
+    # lastrowid, rowcount, description, connection, close, ...
+    return getattr(self._cursor, name)
+
+class Metrics:
+  """Per route request and SQL statistics, rendered in Prometheus text format.
+
+  Cursors handed out by Db.cursor() during a request record every
+  statement. When the request is torn down its statements are folded into
+  per route histograms and per statement totals, and statements slower
+  than slow_query_ms are logged together with their EXPLAIN QUERY PLAN.
+  """
+
+  def __init__(self, slow_query_ms=100, slow_log_size=100, enabled=True):
+    self.enabled = enabled
+    self.slow_query_seconds = slow_query_ms / 1000.0
+    self.slow_queries = deque(maxlen=slow_log_size)
+    self._requests = {}  # (method, route, status) -> count
+    self._durations = {}  # route -> Histogram of request seconds
+    self._sql_durations = {}  # route -> Histogram of SQL seconds per request
+    self._query_counts = {}  # route -> Histogram of statements per request
+    self._statements = {}  # normalized sql -> [calls, seconds, rows]
+    self._collectors = []
+    self._lock = threading.Lock()
+
+  def init_app(self, app):
+    app.before_request(self.start_request)
+    app.after_request(self.record_status)
+    app.teardown_request(self.finish_request)
+
+  def add_collector(self, collector):
+    # collector() returns extra lines of exposition text, e.g. pool stats
+    self._collectors.append(collector)
+
+  def statement_records(self):
+    # Statements of the current request, None when not measuring
+    return g.get('sql_statements')
+
+  def start_request(self):
+    if not self.enabled:
+      return
+    g.sql_statements = []
+    g.request_started = time.perf_counter()
+
+  def finish_request(self, exception=None):
+    records = g.pop('sql_statements', None)
+    started = g.pop('request_started', None)
+    if records is None or started is None:
+      return
+    seconds = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    status = 500 if exception is not None else g.pop('response_status', 200)
+
+    slow = [record for record in records if record.seconds >= self.slow_query_seconds]
+    for record in slow:
+      self._log_slow_query(route, record)
+
+    with self._lock:
+      key = (request.method, route, status)
+      self._requests[key] = self._requests.get(key, 0) + 1
+      self._histogram(self._durations, route, DURATION_BUCKETS).observe(seconds)
+      self._histogram(self._sql_durations, route, DURATION_BUCKETS).observe(sum(record.seconds for record in records))
+      self._histogram(self._query_counts, route, QUERY_COUNT_BUCKETS).observe(len(records))
+      for record in records:
+        sql = normalize_sql(record.sql)
+        if sql not in self._statements and len(self._statements) >= MAX_STATEMENTS:
+          sql = 'other'
+        totals = self._statements.setdefault(sql, [0, 0.0, 0])
+        totals[0] += 1
+        totals[1] += record.seconds
+        totals[2] += record.rows
+
+  def record_status(self, response):
+    # after_request hook, the status is not known at teardown otherwise
+    g.response_status = response.status_code
+    return response
+
+  def slow_query_log(self):
+    # Most recent first
+    with self._lock:
+      return list(reversed(self.slow_queries))
+
+  def _histogram(self, histograms, route, buckets):
+    histogram = histograms.get(route)
+    if histogram is None:
+      histogram = histograms[route] = Histogram(buckets)
+    return histogram
+
+  def release(self, records):
+    # Called before the connection that ran records goes back to its pool
+    # ahead of the end of the request, e.g. by a parallel read. Plans of
+    # slow statements are taken now, at teardown the connection may be in
+    # use by another thread.
+    for record in records:
+      if record.seconds >= self.slow_query_seconds:
+        record.plan = self._explain(record)
+      record.connection = None
+
+  def _explain(self, record):
+    # The plan is taken on the connection that ran the statement, with the
+    # same values. Batches and scripts have no plan.
+    if record.params is None or record.connection is None:
+      return None
+    try:
+      rows = record.connection.execute('EXPLAIN QUERY PLAN ' + record.sql, record.params).fetchall()
+      return [row[-1] for row in rows]
+    except sqlite3.Error as e:
+      return [f'unavailable: {e}']
+
+  def _log_slow_query(self, route, record):
+    plan = record.plan if record.connection is None else self._explain(record)
+
+    entry = {
+      'route': route,
+      'sql': normalize_sql(record.sql),
+      'milliseconds': round(record.seconds * 1000, 3),
+      'rows': record.rows,
+      'plan': plan,
+      'at': time.time()
+    }
+    with self._lock:
+      self.slow_queries.append(entry)
+    logger.warning('Slow query on %s (%.1fms, %d rows): %s plan=%s',
+                   route, entry['milliseconds'], record.rows, entry['sql'], plan)
+
+  def render(self):
+    # Prometheus text exposition format
+    lines = []
+    with self._lock:
+      lines.append('# HELP lang_portal_requests_total Requests handled, by route and status.')
+      lines.append('# TYPE lang_portal_requests_total counter')
+      for (method, route, status), count in sorted(self._requests.items()):
+        lines.append(f'lang_portal_requests_total{{method="{method}",route="{escape(route)}",status="{status}"}} {count}')
+
+      for name, help_text, histograms in (
+        ('lang_portal_request_duration_seconds', 'Time spent handling requests.', self._durations),
+        ('lang_portal_request_sql_seconds', 'Time spent in SQL statements per request.', self._sql_durations),
+        ('lang_portal_request_queries', 'SQL statements run per request.', self._query_counts)
+      ):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for route, histogram in sorted(histograms.items()):
+          label = f'route="{escape(route)}"'
+          for bound, count in histogram.samples():
+            lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+          lines.append(f'{name}_sum{{{label}}} {histogram.sum!r}')
+          lines.append(f'{name}_count{{{label}}} {histogram.count}')
+
+      statements = sorted(self._statements.items())
+      for index, (name, help_text) in enumerate((
+        ('lang_portal_sql_statements_total', 'Executions of each normalized SQL statement.'),
+        ('lang_portal_sql_statement_seconds_total', 'Time spent in each normalized SQL statement.'),
+        ('lang_portal_sql_statement_rows_total', 'Rows returned or changed by each normalized SQL statement.')
+      )):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for sql, totals in statements:
+          lines.append(f'{name}{{statement="{escape(sql)}"}} {totals[index]!r}')
+
+      lines.append('# HELP lang_portal_slow_queries Slow queries in the slow query log.')
+      lines.append('# TYPE lang_portal_slow_queries gauge')
+      lines.append(f'lang_portal_slow_queries {len(self.slow_queries)}')
+
+    for collector in self._collectors:
+      lines.extend(collector())
+    return '\n'.join(lines) + '\n'
+
+def escape(value):
+  # Label values escape backslashes, quotes and newlines
+  return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
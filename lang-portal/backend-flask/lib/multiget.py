@@ -0,0 +1,40 @@
+import json
+
+# Ids a single ?ids= request may ask for
+MAX_IDS = 500
+
+class InvalidIds(ValueError):
+  """Raised when an ids= list is malformed or asks for too many ids."""
+  pass
+
+def parse_ids(value, limit=MAX_IDS):
+  # "3,1,2" -> [3, 1, 2], in request order without duplicates
+  ids = []
+  seen = set()
+  for part in value.split(','):
+    part = part.strip()
+    if not part:
+      continue
+    try:
+      item = int(part)
+    except ValueError:
+      raise InvalidIds(f'Invalid id: {part}')
+    if item not in seen:
+      seen.add(item)
+      ids.append(item)
+
+  if not ids:
+    raise InvalidIds('ids must list at least one id')
+  if len(ids) > limit:
+    raise InvalidIds(f'At most {limit} ids can be requested at once')
+  return ids
+
+def ids_param(ids):
+  # The ids are bound as one JSON array and unpacked with json_each(), so the
+  # statement is the same for any number of ids and ordering by the array
+  # index returns the rows in request order
+  return json.dumps(ids)
+
+def missing_ids(ids, rows):
+  found = {row['id'] for row in rows}
+  return [item for item in ids if item not in found]
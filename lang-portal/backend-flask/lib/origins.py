@@ -0,0 +1,79 @@
+import threading
+from urllib.parse import urlparse
+
+from flask import request
+from flask_cors.core import ACL_ORIGIN, get_cors_options, set_cors_headers
+
+# Extra origins allowed in debug mode, for the frontend dev server
+DEBUG_ORIGINS = ('http://localhost:8080', 'http://127.0.0.1:8080')
+
+def origin_of(url):
+  # https://example.com/app -> https://example.com
+  parsed = urlparse(url)
+  if not parsed.scheme or not parsed.netloc:
+    return None
+  return f'{parsed.scheme}://{parsed.netloc}'
+
+class AllowedOrigins:
+  """CORS for responses no route decorated, allowing the study activity origins.
+
+  The origins come from the study_activities table. They are read on the
+  first cross-origin request instead of when the app is created, so
+  creating the app and importing app.py never touch the database. The CORS
+  options built from them are kept until the study_activities version
+  (migration 012) changes. That version is only looked up when the
+  database write generation changed, so requests after no write run no
+  query, and writes to other tables don't read the origins again.
+  """
+
+  def __init__(self, db, **options):
+    self.db = db
+    self.options = options  # flask-cors options besides origins
+    self.generation = None
+    self.version = None  # study_activities version the options were built from
+    self._cors_options = None
+    self._lock = threading.Lock()
+
+  def init_app(self, app):
+    self.app = app
+    app.after_request(self.add_headers)
+
+  def origins(self):
+    try:
+      cursor = self.db.cursor()
+      cursor.execute('SELECT url FROM study_activities')
+      origins = {origin_of(row['url']) for row in cursor.fetchall()}
+    except Exception:
+      return ['*']  # Allow all origins if the table can't be read
+    origins.discard(None)
+    if not origins:
+      return ['*']
+    if self.app.debug:
+      origins.update(DEBUG_ORIGINS)
+    return sorted(origins)
+
+  def table_version(self):
+    try:
+      return self.db.table_version('study_activities')
+    except Exception:
+      return None  # Read the origins again, they fall back to all as well
+
+  def cors_options(self):
+    generation = self.db.generation()
+    with self._lock:
+      if self._cors_options is not None and generation == self.generation:
+        return self._cors_options
+      version = self.table_version()
+      if self._cors_options is None or version is None or version != self.version:
+        self._cors_options = get_cors_options(self.app, {**self.options, 'origins': self.origins()})
+        self.version = version
+      self.generation = generation
+      return self._cors_options
+
+  def add_headers(self, response):
+    # Routes with @cross_origin() already set their headers, and requests
+    # without an Origin header need none
+    if response.headers.get(ACL_ORIGIN) or 'Origin' not in request.headers:
+      return response
+    set_cors_headers(response, self.cors_options())
+    return response
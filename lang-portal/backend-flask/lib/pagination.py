@@ -0,0 +1,43 @@
+import base64
+import binascii
+import json
+
+class InvalidCursor(ValueError):
+  """Raised when a pagination cursor cannot be decoded or does not match the sort."""
+  pass
+
+def encode_cursor(sort_by, order, value, row_id):
+  # The cursor remembers the sort it was issued for, so it can't be replayed
+  # against a different ordering
+  payload = json.dumps([sort_by, order, value, row_id], separators=(',', ':'))
+  return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, sort_by, order):
+  # Returns the (sort value, id) of the last row of the previous page
+  try:
+    padded = cursor + '=' * (-len(cursor) % 4)
+    cursor_sort_by, cursor_order, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+  except (ValueError, TypeError, binascii.Error):
+    raise InvalidCursor('Invalid cursor')
+
+  if cursor_sort_by != sort_by or cursor_order != order or not isinstance(row_id, int):
+    raise InvalidCursor('Cursor does not match the requested sort order')
+  # Sort values are column values, anything else is a hand-made cursor that
+  # SQLite can't bind
+  if value is not None and not isinstance(value, (str, int, float)):
+    raise InvalidCursor('Invalid cursor')
+  return value, row_id
+
+def keyset_condition(sort_column, id_column, order):
+  # Rows strictly after the cursor in (sort key, id) order. The row value
+  # comparison lets SQLite seek straight to the cursor instead of skipping rows
+  operator = '>' if order == 'asc' else '<'
+  return f'({sort_column}, {id_column}) {operator} (?, ?)'
+
+def next_page(rows, limit, sort_by, order, sort_key=None, id_key='id'):
+  # Queries fetch limit + 1 rows, the extra row only tells whether there is a next page
+  if len(rows) <= limit:
+    return rows, None
+  rows = rows[:limit]
+  last = rows[-1]
+  return rows, encode_cursor(sort_by, order, last[sort_key or sort_by], last[id_key])
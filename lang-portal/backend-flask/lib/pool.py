@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+import time
+
+class PoolTimeout(Exception):
+  """Raised when no connection could be checked out before the timeout."""
+  pass
+
+class ConnectionPool:
+  """A bounded pool of long-lived SQLite connections.
+
+  Connections are created lazily up to max_size and handed back to the
+  pool when a request is done with them, so the schema and page cache
+  stay warm between requests. A thread gets back the connection it used
+  last whenever it is still idle.
+  """
+
+  def __init__(self, database, max_size=5, pragmas=None, timeout=30.0, uri=False):
+    self.database = database
+    self.max_size = max_size
+    self.pragmas = dict(pragmas or {})
+    self.timeout = timeout
+    self.uri = uri
+    self._idle = []  # list of (connection, thread id of its last user)
+    self._size = 0  # connections currently open, idle or checked out
+    self._lock = threading.Condition()
+    self.stats = {'created': 0, 'reused': 0, 'discarded': 0, 'waits': 0}
+
+  def _connect(self):
+    # Connections move between worker threads, so the same-thread check is off
+    connection = sqlite3.connect(self.database, uri=self.uri, check_same_thread=False)
+    connection.row_factory = sqlite3.Row  # Return rows as dictionaries
+
+    # PRAGMAs are applied once, when the connection is first checked out
+    for name, value in self.pragmas.items():
+      connection.execute(f'PRAGMA {name} = {value}')
+    return connection
+
+  def _is_healthy(self, connection):
+    try:
+      connection.execute('SELECT 1').fetchone()
+      return True
+    except sqlite3.Error:
+      return False
+
+  def _take_idle(self):
+    # Prefer the connection this thread used last, otherwise the warmest one
+    thread_id = threading.get_ident()
+    for index in range(len(self._idle) - 1, -1, -1):
+      if self._idle[index][1] == thread_id:
+        return self._idle.pop(index)[0]
+    return self._idle.pop()[0]
+
+  def _discard(self, connection):
+    try:
+      connection.close()
+    except sqlite3.Error:
+      pass
+    with self._lock:
+      self._size -= 1
+      self.stats['discarded'] += 1
+      self._lock.notify()
+
+  def acquire(self):
+    deadline = time.monotonic() + self.timeout
+    while True:
+      with self._lock:
+        connection = None
+        while connection is None:
+          if self._idle:
+            connection = self._take_idle()
+          elif self._size < self.max_size:
+            # Reserve a slot, the connection is opened outside the lock
+            self._size += 1
+            break
+          else:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+              raise PoolTimeout(f'No connection available for {self.database} after {self.timeout}s')
+            self.stats['waits'] += 1
+            self._lock.wait(remaining)
+
+      if connection is None:
+        try:
+          connection = self._connect()
+        except Exception:
+          with self._lock:
+            self._size -= 1
+            self._lock.notify()
+          raise
+        with self._lock:
+          self.stats['created'] += 1
+        return connection
+
+      # Make sure an idle connection still works before handing it out
+      if self._is_healthy(connection):
+        with self._lock:
+          self.stats['reused'] += 1
+        return connection
+      self._discard(connection)
+
+  def release(self, connection):
+    # Never hand a connection with an open transaction to the next request
+    try:
+      if connection.in_transaction:
+        connection.rollback()
+    except sqlite3.Error:
+      self._discard(connection)
+      return
+
+    with self._lock:
+      self._idle.append((connection, threading.get_ident()))
+      self._lock.notify()
+
+  def close_all(self):
+    with self._lock:
+      idle, self._idle = self._idle, []
+      self._size -= len(idle)
+    for connection, _ in idle:
+      connection.close()
+
+  def status(self):
+    with self._lock:
+      return {
+        'size': self._size,
+        'idle': len(self._idle),
+        'in_use': self._size - len(self._idle),
+        'max_size': self.max_size,
+        **self.stats
+      }
@@ -0,0 +1,121 @@
+from lib.jobs import job_context
+from lib.stats import rebuild_rollups, reset_rollups
+
+# Rows deleted per transaction
+DEFAULT_BATCH_SIZE = 5000
+
+# Free pages returned to the file system per incremental vacuum step
+VACUUM_PAGES = 1000
+
+def purge_study_history(app, job, batch_size=DEFAULT_BATCH_SIZE, vacuum=False):
+  # Delete all study sessions and review items that exist when the job
+  # starts, in short transactions over id ranges, so requests keep writing
+  # in between. Sessions and reviews recorded while it runs are kept.
+  db = app.db
+  with job_context(app):
+    cursor = db.cursor()
+    cursor.execute('SELECT MIN(id), MAX(id) FROM word_review_items')
+    items = tuple(cursor.fetchone())
+    cursor.execute('SELECT MIN(id), MAX(id) FROM study_sessions')
+    sessions = tuple(cursor.fetchone())
+
+    # The dashboard shows the cleared history right away, the rollups are
+    # rebuilt from what is left at the end
+    reset_rollups(cursor)
+    db.commit()
+
+  job.progress.update({
+    'phase': 'review_items',
+    'review_items_total': span(items),
+    'review_items_deleted': 0,
+    'session_reviews_deleted': 0,
+    'sessions_total': span(sessions),
+    'sessions_deleted': 0
+  })
+
+  delete_range(app, job, 'word_review_items', items, batch_size, 'review_items_deleted')
+
+  if sessions[0] is not None:
+    # Review items recorded meanwhile for sessions about to be deleted
+    with job_context(app):
+      cursor = db.cursor()
+      cursor.execute('''
+        DELETE FROM word_review_items
+        WHERE study_session_id BETWEEN ? AND ? AND id > ?
+      ''', (sessions[0], sessions[1], items[1] or 0))
+      job.progress['review_items_deleted'] += max(cursor.rowcount, 0)
+      db.commit()
+
+  archive = getattr(app, 'archive', None)
+  if archive is not None and archive.exists() and sessions[0] is not None:
+    # Archived review items of the deleted sessions go too
+    job.progress['phase'] = 'archive'
+    job.progress['archived_review_items_deleted'] = 0
+    delete_range(app, job, 'archive.word_review_items', sessions, batch_size, 'archived_review_items_deleted',
+                 column='study_session_id', before=lambda cursor: archive.attach(cursor, create=True))
+
+  job.progress['phase'] = 'sessions'
+  delete_range(app, job, 'study_session_reviews', sessions, batch_size, 'session_reviews_deleted', column='session_id')
+  delete_range(app, job, 'study_sessions', sessions, batch_size, 'sessions_deleted')
+
+  # Nothing archived is left for the remaining sessions, they are newer than
+  # anything archived, so the main tables hold the whole history again
+  job.progress['phase'] = 'rollups'
+  with job_context(app):
+    rebuild_rollups(db.cursor())
+    db.commit()
+
+  vacuumed_pages = None
+  if vacuum:
+    job.progress['phase'] = 'vacuum'
+    vacuumed_pages = incremental_vacuum(app)
+
+  job.progress['phase'] = 'done'
+  return {
+    'review_items_deleted': job.progress['review_items_deleted'],
+    'session_reviews_deleted': job.progress['session_reviews_deleted'],
+    'sessions_deleted': job.progress['sessions_deleted'],
+    'vacuumed_pages': vacuumed_pages
+  }
+
+def span(id_range):
+  # Upper bound of the rows in an id range, exact unless ids have gaps
+  first, last = id_range
+  return 0 if first is None else last - first + 1
+
+def delete_range(app, job, table, id_range, batch_size, counter, column='id', before=None):
+  # before(cursor) runs ahead of every batch, e.g. to attach a database
+  first, last = id_range
+  if first is None:
+    return
+  start = first
+  while start <= last:
+    end = min(start + batch_size - 1, last)
+    with job_context(app):
+      cursor = app.db.cursor()
+      if before is not None:
+        before(cursor)
+      cursor.execute(f'DELETE FROM {table} WHERE {column} BETWEEN ? AND ?', (start, end))
+      job.progress[counter] += max(cursor.rowcount, 0)
+      app.db.commit()
+    start = end + 1
+
+def incremental_vacuum(app):
+  # Hand the pages freed by the purge back to the file system, a few at a
+  # time. Only possible when the database was created with
+  # auto_vacuum = INCREMENTAL, otherwise returns None.
+  freed = 0
+  while True:
+    with job_context(app):
+      cursor = app.db.cursor()
+      cursor.execute('PRAGMA auto_vacuum')
+      if cursor.fetchone()[0] != 2:
+        return None
+      cursor.execute('PRAGMA freelist_count')
+      free_pages = cursor.fetchone()[0]
+      if free_pages == 0:
+        return freed
+      cursor.execute(f'PRAGMA incremental_vacuum({VACUUM_PAGES})')
+      cursor.fetchall()
+      app.db.commit()
+      freed += min(free_pages, VACUUM_PAGES)
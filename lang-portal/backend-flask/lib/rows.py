@@ -0,0 +1,18 @@
+# Result rows are turned into response dicts with one key list per statement,
+# instead of copying every field by name for every row
+
+def columns(cursor, rename=None):
+  # Response keys of the last statement's columns, optionally renamed
+  rename = rename or {}
+  return tuple(rename.get(column[0], column[0]) for column in cursor.description)
+
+def project(cursor, rows, rename=None):
+  # sqlite3.Row iterates over its values in column order, zipped with the
+  # keys looked up once for the statement
+  keys = columns(cursor, rename)
+  return [dict(zip(keys, row)) for row in rows]
+
+def project_one(cursor, row, rename=None):
+  if row is None:
+    return None
+  return dict(zip(columns(cursor, rename), row))
@@ -0,0 +1,83 @@
+import re
+
+from lib.rows import project
+
+# Searches over the FTS5 tables of sql/migrations/007_add_words_search.sql
+# and 008_add_words_search_kanji.sql
+
+# The trigram index only answers queries of at least three characters
+TRIGRAM_LENGTH = 3
+
+# Kana, CJK ideographs and full width forms are searched in the kanji column
+JAPANESE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]')
+TERM = re.compile(r'\w+')
+
+WORD_COLUMNS = '''
+  w.id, w.kanji, w.romaji, w.english,
+  COALESCE(r.correct_count, 0) AS correct_count,
+  COALESCE(r.wrong_count, 0) AS wrong_count
+'''
+
+def prefix_query(text):
+  # FTS5 query matching words starting with every term, e.g. "tabe"* "eat"*.
+  # Terms are quoted so user input can't use the FTS5 query syntax.
+  terms = TERM.findall(text)
+  return ' '.join(f'"{term}"*' for term in terms) or None
+
+def phrase_query(text):
+  return '"' + text.replace('"', '""') + '"'
+
+def escape_like(text):
+  return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def search_words(cursor, text, limit, offset=0):
+  # Returns (rows, total matches), best matches first
+  text = text.strip()
+  if JAPANESE.search(text):
+    if len(text) >= TRIGRAM_LENGTH and has_kanji_index(cursor):
+      return _match(cursor, 'words_search_kanji', phrase_query(text), limit, offset)
+    return _kanji_like(cursor, text, limit, offset)
+
+  query = prefix_query(text)
+  if query is None:
+    return [], 0
+  return _match(cursor, 'words_search', query, limit, offset)
+
+def has_kanji_index(cursor):
+  # The trigram index is missing when SQLite is older than 3.34
+  cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'words_search_kanji'")
+  return cursor.fetchone() is not None
+
+def _match(cursor, table, query, limit, offset):
+  # rank is bm25, ties keep the vocabulary order
+  cursor.execute(f'''
+    SELECT {WORD_COLUMNS}
+    FROM {table} s
+    JOIN words w ON w.id = s.rowid
+    LEFT JOIN word_reviews r ON r.word_id = w.id
+    WHERE {table} MATCH ?
+    ORDER BY s.rank, w.id
+    LIMIT ? OFFSET ?
+  ''', (query, limit, offset))
+  rows = project(cursor, cursor.fetchall())
+
+  cursor.execute(f'SELECT COUNT(*) FROM {table} WHERE {table} MATCH ?', (query,))
+  return rows, cursor.fetchone()[0]
+
+def _kanji_like(cursor, text, limit, offset):
+  # One or two characters are below the trigram size and need a scan, as
+  # does any query without the trigram index. Shorter words are the closer
+  # matches.
+  pattern = '%' + escape_like(text) + '%'
+  cursor.execute(f'''
+    SELECT {WORD_COLUMNS}
+    FROM words w
+    LEFT JOIN word_reviews r ON r.word_id = w.id
+    WHERE w.kanji LIKE ? ESCAPE '\\'
+    ORDER BY length(w.kanji), w.id
+    LIMIT ? OFFSET ?
+  ''', (pattern, limit, offset))
+  rows = project(cursor, cursor.fetchall())
+
+  cursor.execute("SELECT COUNT(*) FROM words WHERE kanji LIKE ? ESCAPE '\\'", (pattern,))
+  return rows, cursor.fetchone()[0]
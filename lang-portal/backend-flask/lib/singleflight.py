@@ -0,0 +1,97 @@
+import functools
+import threading
+from flask import Response, current_app, request
+
+class Call:
+  """One in-flight execution of a view that identical requests wait on."""
+
+  def __init__(self):
+    self.done = threading.Event()
+    self.waiters = 0
+    self.response = None  # (body, status, headers) when it can be shared
+
+class SingleFlight:
+  """Coalesces concurrent identical GET requests into a single execution.
+
+  A request to a coalesced view with the same path, query arguments and
+  Accept header as one already running, against the same database write
+  generation, waits for that one to finish and is answered with a copy of
+  its response instead of running the queries again. Only complete 200
+  responses are shared; after an error, a streamed response or a wait
+  longer than timeout the waiting requests run the view themselves.
+
+  Unlike ResponseCache nothing is kept once the running request finishes,
+  so this also fits views whose responses are too large or too varied to
+  cache.
+  """
+
+  def __init__(self, db, timeout=30.0, enabled=True):
+    self.db = db
+    self.timeout = timeout
+    self.enabled = enabled
+    self._calls = {}  # key -> Call
+    self._stats = {}  # route -> {'executed': n, 'coalesced': n, 'fallbacks': n}
+    self._lock = threading.Lock()
+
+  def _count(self, route, name):
+    with self._lock:
+      stats = self._stats.setdefault(route, {'executed': 0, 'coalesced': 0, 'fallbacks': 0})
+      stats[name] += 1
+
+  def status(self):
+    with self._lock:
+      return {
+        'in_flight': len(self._calls),
+        'waiting': sum(call.waiters for call in self._calls.values()),
+        'routes': {route: dict(stats) for route, stats in self._stats.items()}
+      }
+
+  def coalesced(self, view):
+    # Decorator for GET views whose response only depends on the request and
+    # the database
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+      if not self.enabled:
+        return view(*args, **kwargs)
+
+      route = request.url_rule.rule
+      key = (
+        self.db.tenant,
+        request.path,
+        tuple(sorted(request.args.items(multi=True))),
+        request.headers.get('Accept'),
+        self.db.generation()
+      )
+
+      with self._lock:
+        call = self._calls.get(key)
+        leader = call is None
+        if leader:
+          call = self._calls[key] = Call()
+        else:
+          call.waiters += 1
+
+      if leader:
+        return self._lead(route, key, call, view, args, kwargs)
+
+      if call.done.wait(self.timeout) and call.response is not None:
+        self._count(route, 'coalesced')
+        body, status, headers = call.response
+        return Response(body, status=status, headers=headers)
+
+      self._count(route, 'fallbacks')
+      return view(*args, **kwargs)
+    return wrapper
+
+  def _lead(self, route, key, call, view, args, kwargs):
+    self._count(route, 'executed')
+    try:
+      response = current_app.make_response(view(*args, **kwargs))
+      if response.status_code == 200 and not response.is_streamed:
+        call.response = (response.get_data(), response.status_code, list(response.headers))
+      return response
+    finally:
+      # Requests arriving from now on start a new execution
+      with self._lock:
+        del self._calls[key]
+      call.done.set()
@@ -0,0 +1,199 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Columns /words can be sorted by
+SORT_COLUMNS = ('kanji', 'romaji', 'english', 'correct_count', 'wrong_count')
+TEXT_COLUMNS = ('kanji', 'romaji', 'english')
+COUNT_COLUMNS = ('correct_count', 'wrong_count')
+
+class TextColumn:
+  """Strings packed into one buffer, value i is buffer[offsets[i]:offsets[i + 1]]."""
+
+  def __init__(self, values):
+    self.buffer = ''.join(values)
+    self.offsets = array('I', [0])
+    end = 0
+    for value in values:
+      end += len(value)
+      self.offsets.append(end)
+
+  def __getitem__(self, index):
+    return self.buffer[self.offsets[index]:self.offsets[index + 1]]
+
+class VocabularySnapshot:
+  """In-process copy of words and their review counters for GET /words.
+
+  Words are stored column by column in compact arrays, in id order. For
+  each sort column a permutation array holds the word positions sorted by
+  (value, id), so a page in either direction is a slice and a keyset
+  cursor a binary search, instead of a sort over the whole table.
+
+  The snapshot is checked against Db.generation() on use. When the
+  database changed, the trigger-kept versions of words and word_reviews
+  (migration 011) tell whether the words or only their counters changed,
+  and only what changed is reloaded. Reviews recorded through the batch
+  endpoint are applied in place with apply_reviews(), which moves the
+  reviewed words within the two counter permutations.
+  """
+
+  def __init__(self, db):
+    self.db = db
+    self.loaded = False
+    self.generation = None
+    self.token = None  # (words version, word_reviews version)
+    self.stats = {'builds': 0, 'counter_reloads': 0, 'incremental_updates': 0}
+    self._lock = threading.Lock()
+
+  def _token(self, cursor):
+    cursor.execute('''
+      SELECT
+        (SELECT version FROM table_versions WHERE table_name = 'words') AS words_version,
+        (SELECT version FROM table_versions WHERE table_name = 'word_reviews') AS reviews_version
+    ''')
+    row = cursor.fetchone()
+    return (row['words_version'] or 0, row['reviews_version'] or 0)
+
+  def _build(self, cursor):
+    cursor.execute('''
+      SELECT w.id, w.kanji, w.romaji, w.english,
+             COALESCE(r.correct_count, 0) AS correct_count,
+             COALESCE(r.wrong_count, 0) AS wrong_count
+      FROM words w
+      LEFT JOIN word_reviews r ON w.id = r.word_id
+      ORDER BY w.id
+    ''')
+    rows = cursor.fetchall()
+
+    self.ids = array('q', (row['id'] for row in rows))
+    self.counts = {name: array('q', (row[name] for row in rows)) for name in COUNT_COLUMNS}
+    texts = {name: [row[name] for row in rows] for name in TEXT_COLUMNS}
+    self.texts = {name: TextColumn(values) for name, values in texts.items()}
+
+    # Python compares strings by code point, the same order as SQLite's
+    # BINARY collation over UTF-8
+    positions = range(len(rows))
+    ids = self.ids
+    self.orders = {}
+    for name, values in texts.items():
+      self.orders[name] = array('I', sorted(positions, key=lambda i: (values[i], ids[i])))
+    for name in COUNT_COLUMNS:
+      self._sort_counts(name)
+    self.stats['builds'] += 1
+
+  def _sort_counts(self, name):
+    counts, ids = self.counts[name], self.ids
+    self.orders[name] = array('I', sorted(range(len(ids)), key=lambda i: (counts[i], ids[i])))
+
+  def _reload_counts(self, cursor):
+    # Only the review counters changed, the words and text orders still hold
+    for name in COUNT_COLUMNS:
+      self.counts[name] = array('q', bytes(8 * len(self.ids)))
+    cursor.execute('SELECT word_id, correct_count, wrong_count FROM word_reviews')
+    for row in cursor:
+      position = self._position(row['word_id'])
+      if position is not None:
+        self.counts['correct_count'][position] = row['correct_count']
+        self.counts['wrong_count'][position] = row['wrong_count']
+    for name in COUNT_COLUMNS:
+      self._sort_counts(name)
+    self.stats['counter_reloads'] += 1
+
+  def _position(self, word_id):
+    position = bisect_left(self.ids, word_id)
+    if position < len(self.ids) and self.ids[position] == word_id:
+      return position
+    return None
+
+  def _key(self, name):
+    values = self.texts[name] if name in TEXT_COLUMNS else self.counts[name]
+    ids = self.ids
+    return lambda i: (values[i], ids[i])
+
+  def refresh(self, cursor):
+    # Make the snapshot current, called with the lock held
+    generation = self.db.generation()
+    if self.loaded and generation == self.generation:
+      return
+
+    token = self._token(cursor)
+    if not self.loaded or token[0] != self.token[0]:
+      self._build(cursor)
+    elif token[1] != self.token[1]:
+      self._reload_counts(cursor)
+    self.loaded = True
+    self.token = token
+    self.generation = generation
+
+  def apply_reviews(self, cursor, reviews):
+    # reviews: (word_id, correct) pairs just committed. The counters are
+    # updated in place and each reviewed word moves to its new place in the
+    # counter orders, instead of reloading and sorting everything. Only done
+    # when the snapshot was current right before these reviews, otherwise
+    # the next page reloads the counters. Each review item writes its
+    # word_reviews row once, so the batch moved that version by its size.
+    with self._lock:
+      if not self.loaded:
+        return False
+      token = self._token(cursor)
+      if token != (self.token[0], self.token[1] + len(reviews)):
+        return False
+
+      deltas = {}
+      for word_id, correct in reviews:
+        delta = deltas.setdefault(word_id, [0, 0])
+        delta[0 if correct else 1] += 1
+
+      for word_id, (correct, wrong) in deltas.items():
+        position = self._position(word_id)
+        if position is None:
+          continue
+        for name, delta in (('correct_count', correct), ('wrong_count', wrong)):
+          if delta:
+            self._move(name, position, self.counts[name][position] + delta)
+
+      self.token = token
+      self.stats['incremental_updates'] += 1
+      return True
+
+  def _move(self, name, position, value):
+    order, key = self.orders[name], self._key(name)
+    del order[bisect_left(order, key(position), key=key)]
+    self.counts[name][position] = value
+    order.insert(bisect_left(order, key(position), key=key), position)
+
+  def page(self, cursor, sort_by, order, limit, offset=0, after=None):
+    # Rows of one page in (sort_by, id) order, after is the (value, id) of
+    # the last row of the previous page for keyset paging
+    with self._lock:
+      self.refresh(cursor)
+      positions = self.orders[sort_by]
+      size = len(positions)
+
+      if after is not None:
+        key = self._key(sort_by)
+        if order == 'asc':
+          offset = bisect_right(positions, tuple(after), key=key)
+        else:
+          offset = size - bisect_left(positions, tuple(after), key=key)
+
+      if order == 'asc':
+        selected = positions[offset:offset + limit]
+      else:
+        end = max(size - offset, 0)
+        selected = positions[max(end - limit, 0):end][::-1]
+      return [self._row(position) for position in selected], size
+
+  def _row(self, position):
+    return {
+      'id': self.ids[position],
+      'kanji': self.texts['kanji'][position],
+      'romaji': self.texts['romaji'][position],
+      'english': self.texts['english'][position],
+      'correct_count': self.counts['correct_count'][position],
+      'wrong_count': self.counts['wrong_count'][position]
+    }
+
+  def status(self):
+    with self._lock:
+      return {'loaded': self.loaded, 'words': len(self.ids) if self.loaded else 0, **self.stats}
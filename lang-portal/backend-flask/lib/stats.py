@@ -0,0 +1,101 @@
+from datetime import date, datetime, timedelta, timezone
+
+# Reads, resets and rebuilds the study rollups maintained by the triggers in
+# sql/migrations/003_add_study_stats_rollups.sql
+
+def study_totals(cursor):
+  cursor.execute('''
+    SELECT reviews_count, correct_count, words_studied, mastered_words
+    FROM study_totals
+    WHERE id = 1
+  ''')
+  return cursor.fetchone()
+
+def success_rate(totals):
+  # Share of all review items answered correctly
+  if not totals or not totals['reviews_count']:
+    return 0
+  return totals['correct_count'] * 1.0 / totals['reviews_count']
+
+def active_groups(cursor, days=30):
+  # Groups with at least one study session in the last days
+  cursor.execute('''
+    SELECT COUNT(DISTINCT group_id) as active_groups
+    FROM study_sessions
+    WHERE created_at >= date('now', ?)
+  ''', (f'-{days} days',))
+  return cursor.fetchone()['active_groups']
+
+def current_streak(cursor, today=None):
+  # Consecutive days with at least one study session, ending today. A streak
+  # whose last session was yesterday still counts until today is over. Days
+  # are read newest first and the walk stops at the first gap, so the work is
+  # bounded by the streak length rather than the whole history.
+  if today is None:
+    today = datetime.now(timezone.utc).date()  # created_at is stored in UTC
+
+  cursor.execute('''
+    SELECT day
+    FROM daily_activity
+    WHERE day <= ? AND sessions_count > 0
+    ORDER BY day DESC
+  ''', (today.isoformat(),))
+
+  streak = 0
+  expected_day = today
+  for row in cursor:
+    day = date.fromisoformat(row['day'])
+    if streak == 0 and day == today - timedelta(days=1):
+      expected_day = day
+    if day != expected_day:
+      break
+    streak += 1
+    expected_day -= timedelta(days=1)
+  return streak
+
+def reset_rollups(cursor):
+  # Rollups only ever grow from inserts, so anything deleting review history
+  # in bulk has to reset them as well
+  cursor.execute('DELETE FROM word_reviews')
+  cursor.execute('DELETE FROM daily_activity')
+  cursor.execute('''
+    UPDATE study_totals
+    SET reviews_count = 0, correct_count = 0, words_studied = 0, mastered_words = 0
+    WHERE id = 1
+  ''')
+
+def rebuild_rollups(cursor):
+  # Recompute every rollup from the review items and sessions that are left,
+  # like migration 003 did, after history was deleted in several transactions
+  reset_rollups(cursor)
+  cursor.execute('''
+    INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+    SELECT word_id, SUM(correct != 0), SUM(correct = 0), MAX(created_at)
+    FROM word_review_items
+    GROUP BY word_id
+  ''')
+  cursor.execute('''
+    UPDATE study_totals SET
+      reviews_count = (SELECT COUNT(*) FROM word_review_items),
+      correct_count = (SELECT COUNT(*) FROM word_review_items WHERE correct != 0),
+      words_studied = (SELECT COUNT(*) FROM word_reviews WHERE correct_count + wrong_count > 0),
+      mastered_words = (SELECT COUNT(*) FROM word_reviews
+                        WHERE correct_count + wrong_count >= 5
+                          AND correct_count * 5 >= (correct_count + wrong_count) * 4)
+    WHERE id = 1
+  ''')
+  cursor.execute('''
+    INSERT INTO daily_activity (day, sessions_count, reviews_count, correct_count)
+    SELECT day, SUM(sessions_count), SUM(reviews_count), SUM(correct_count)
+    FROM (
+      SELECT date(created_at) AS day, COUNT(*) AS sessions_count, 0 AS reviews_count, 0 AS correct_count
+      FROM study_sessions
+      GROUP BY date(created_at)
+      UNION ALL
+      SELECT date(created_at), 0, COUNT(*), SUM(correct != 0)
+      FROM word_review_items
+      GROUP BY date(created_at)
+    )
+    WHERE day IS NOT NULL
+    GROUP BY day
+  ''')
@@ -0,0 +1,216 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.request import pathname2url
+
+from flask import g, has_app_context, has_request_context, jsonify, request
+
+from lib.stats import rebuild_rollups
+
+# Learner ids double as file names
+TENANT_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Study history of the template that a new learner does not inherit, in
+# delete order
+HISTORY_TABLES = ('word_review_items', 'study_session_reviews', 'study_sessions')
+
+class UnknownTenant(LookupError):
+  """Raised when the database is used without a learner to route to."""
+  pass
+
+def clone_template(template, database):
+  # Copy the template with the backup API, page by page from a read-only
+  # connection, then clear the template's study history from the copy. The
+  # copy is made under a temporary name, so a learner never sees half a file.
+  partial = database + '.partial'
+  source = sqlite3.connect('file:' + pathname2url(os.path.abspath(template)) + '?mode=ro', uri=True)
+  target = sqlite3.connect(partial)
+  try:
+    source.backup(target)
+    cursor = target.cursor()
+    for table in HISTORY_TABLES:
+      cursor.execute(f'DELETE FROM {table}')
+    rebuild_rollups(cursor)
+    target.commit()
+  finally:
+    target.close()
+    source.close()
+  os.replace(partial, database)
+
+class TenantDb:
+  """A Db per learner, each in a file of its own, used in place of app.db.
+
+  Requests name their learner in a header. The learner's Db, with its own
+  pools and write lock, is opened on first use; a new learner's file is
+  cloned from the shared vocabulary template first. At most max_open
+  learner databases stay open: the least recently used one, and any idle
+  for longer than idle_seconds, have their connections closed, unless a
+  request is still using them. A request pins its learner's Db from the
+  first lookup until teardown.
+
+  Everything else is forwarded to the current learner's Db, so routes keep
+  calling app.db.cursor() and friends. Outside a request the learner is
+  whatever bind() set on this thread, which is how jobs started by a
+  request keep working on that learner's database.
+  """
+
+  def __init__(self, factory, directory, template, header='X-Learner-Id', max_open=32, idle_seconds=300):
+    self.factory = factory  # database path -> Db
+    self.directory = directory
+    self.template = template
+    self.header = header
+    self.max_open = max_open
+    self.idle_seconds = idle_seconds
+    self._open = OrderedDict()  # tenant -> [Db, last used, pins], least recently used first
+    self._cloning = {}  # tenant -> lock held while its file is cloned
+    self._local = threading.local()
+    self._lock = threading.Lock()
+    self.stats = {'opened': 0, 'evicted': 0, 'cloned': 0}
+
+  def init_app(self, app, exempt=()):
+    # Requests must name a valid learner, except for the exempt endpoints
+    @app.before_request
+    def require_tenant():
+      if request.method == 'OPTIONS' or request.endpoint in exempt:
+        return None
+      tenant = request.headers.get(self.header)
+      if tenant is None:
+        return jsonify({"error": f"{self.header} header is required"}), 400
+      if not TENANT_ID.match(tenant):
+        return jsonify({"error": f"Invalid {self.header}"}), 400
+      return None
+
+  def path(self, tenant):
+    return os.path.join(self.directory, f'{tenant}.db')
+
+  def bind(self, tenant):
+    # Route this thread's database calls outside requests to tenant
+    self._local.tenant = tenant
+
+  @property
+  def tenant(self):
+    if has_request_context():
+      tenant = request.headers.get(self.header)
+      return tenant if tenant is not None and TENANT_ID.match(tenant) else None
+    return getattr(self._local, 'tenant', None)
+
+  def current(self):
+    # The current learner's Db, kept in g for the rest of the request
+    tenant = self.tenant
+    if not has_app_context():
+      # Outside any context, e.g. a job between its steps, nothing is held
+      if tenant is None:
+        raise UnknownTenant('No learner bound to this thread')
+      return self.open(tenant)
+    db = g.get('tenant_db')
+    if db is not None and db.tenant == tenant:
+      return db
+    if tenant is None:
+      raise UnknownTenant(f'No learner given, send the {self.header} header')
+    if db is not None:
+      # One app context used for several learners, e.g. requests made from
+      # within a test's app context: connections held in g go back to the
+      # previous learner's pools first
+      self.close()
+    g.tenant_db = db = self.open(tenant, pin=True)
+    return db
+
+  def open(self, tenant, pin=False):
+    # A pinned Db is not evicted until unpin() is called for it
+    now = time.monotonic()
+    with self._lock:
+      entry = self._open.get(tenant)
+      if entry is None:
+        clone_lock = self._cloning.setdefault(tenant, threading.Lock())
+      else:
+        entry[2] += pin
+        evicted = self._touch(tenant, entry, now)
+
+    if entry is None:
+      # New learners are cloned outside the registry lock, so other learners
+      # are served meanwhile
+      path = self.path(tenant)
+      with clone_lock:
+        if not os.path.exists(path):
+          os.makedirs(self.directory, exist_ok=True)
+          clone_template(self.template, path)
+          with self._lock:
+            self.stats['cloned'] += 1
+
+      with self._lock:
+        self._cloning.pop(tenant, None)
+        entry = self._open.get(tenant)
+        if entry is None:
+          db = self.factory(path)
+          db.tenant = tenant
+          entry = self._open[tenant] = [db, now, 0]
+          self.stats['opened'] += 1
+        entry[2] += pin
+        evicted = self._touch(tenant, entry, now)
+
+    for db in evicted:
+      db.close_all()
+    return entry[0]
+
+  def _touch(self, tenant, entry, now):
+    # Mark tenant as just used, and pick what to evict when there are too
+    # many open or the least recently used one has been idle too long.
+    # Called with the lock held.
+    entry[1] = now
+    self._open.move_to_end(tenant)
+    oldest = next(iter(self._open.values()))
+    if len(self._open) <= self.max_open and now - oldest[1] < self.idle_seconds:
+      return []
+    return self._select_evictions(now, keep=tenant)
+
+  def _select_evictions(self, now, keep):
+    # Pinned databases and those with connections checked out are skipped,
+    # they are retried on a later open
+    evicted = []
+    for tenant, (db, last_used, pins) in list(self._open.items()):
+      over_limit = len(self._open) > self.max_open
+      idle = now - last_used >= self.idle_seconds
+      if tenant == keep or not (over_limit or idle):
+        continue
+      if pins or db.in_use():
+        continue
+      del self._open[tenant]
+      evicted.append(db)
+      self.stats['evicted'] += 1
+    return evicted
+
+  def unpin(self, db):
+    with self._lock:
+      entry = self._open.get(db.tenant)
+      if entry is not None and entry[0] is db and entry[2] > 0:
+        entry[2] -= 1
+
+  def close(self):
+    # Teardown of the app context, only the Db this request used
+    db = g.pop('tenant_db', None)
+    if db is not None:
+      db.close()
+      self.unpin(db)
+
+  def databases(self):
+    # The learner databases open right now
+    with self._lock:
+      return [entry[0] for entry in self._open.values()]
+
+  def close_all(self):
+    with self._lock:
+      databases = [entry[0] for entry in self._open.values()]
+      self._open.clear()
+    for db in databases:
+      db.close_all()
+
+  def status(self):
+    with self._lock:
+      return {'open': len(self._open), 'max_open': self.max_open, **self.stats}
+
+  def __getattr__(self, name):
+    # cursor, commit, generation, row_count, setup_tables, pool, ...
+    return getattr(self.current(), name)
@@ -0,0 +1,104 @@
+from flask import jsonify, request
+from flask_cors import cross_origin
+import functools
+import math
+
+from lib.archive import archive_review_items
+
+def load(app):
+    # Move review items older than older_than_days (ARCHIVE_AFTER_DAYS by
+    # default) into the archive, as a background job
+    @app.route('/api/archive', methods=['POST'])
+    @cross_origin()
+    def start_archive():
+        try:
+            options = request.get_json(silent=True) or {}
+            days = options.get('older_than_days', app.config['ARCHIVE_AFTER_DAYS'])
+            if not isinstance(days, int) or isinstance(days, bool) or days < 0:
+                return jsonify({"error": "older_than_days must be a non-negative integer"}), 400
+
+            job = app.jobs.submit('archive_review_items', functools.partial(
+                archive_review_items,
+                days=days,
+                batch_size=app.config['ARCHIVE_BATCH_SIZE']
+            ))
+            if job.state == 'failed':
+                return jsonify({"error": job.error, "job": job.to_dict()}), 500
+
+            response = jsonify({"job": job.to_dict()})
+            response.status_code = 202
+            response.headers['Location'] = f'/api/jobs/{job.id}'
+            return response
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    # What the archive holds
+    @app.route('/api/archive', methods=['GET'])
+    @cross_origin()
+    def get_archive():
+        try:
+            cursor = app.db.cursor()
+            if not app.archive.attach(cursor):
+                return jsonify({"review_items": 0, "oldest": None, "newest": None})
+
+            cursor.execute('''
+                SELECT COUNT(*) AS review_items, MIN(created_at) AS oldest, MAX(created_at) AS newest
+                FROM archive.word_review_items
+            ''')
+            return jsonify(dict(cursor.fetchone()))
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    # Archived review items, of one session or one word, oldest first
+    @app.route('/api/archive/review-items', methods=['GET'])
+    @cross_origin()
+    def get_archived_review_items():
+        try:
+            filters = []
+            params = []
+            for column, argument in (('study_session_id', 'session_id'), ('word_id', 'word_id')):
+                value = request.args.get(argument, type=int)
+                if value is not None:
+                    filters.append(f'wri.{column} = ?')
+                    params.append(value)
+            if not filters:
+                return jsonify({"error": "session_id or word_id is required"}), 400
+
+            page = max(1, request.args.get('page', 1, type=int))
+            per_page = 100
+
+            cursor = app.db.cursor()
+            if not app.archive.attach(cursor):
+                return jsonify({"items": [], "total_pages": 0, "current_page": page, "total_items": 0})
+
+            where = ' AND '.join(filters)
+            cursor.execute(f'SELECT COUNT(*) FROM archive.word_review_items wri WHERE {where}', params)
+            total_items = cursor.fetchone()[0]
+
+            cursor.execute(f'''
+                SELECT wri.id, wri.word_id, w.kanji, w.romaji, w.english,
+                       wri.study_session_id, wri.correct, wri.created_at
+                FROM archive.word_review_items wri
+                LEFT JOIN words w ON w.id = wri.word_id
+                WHERE {where}
+                ORDER BY wri.id
+                LIMIT ? OFFSET ?
+            ''', (*params, per_page, (page - 1) * per_page))
+
+            return jsonify({
+                "items": [{
+                    "id": row['id'],
+                    "word_id": row['word_id'],
+                    "kanji": row['kanji'],
+                    "romaji": row['romaji'],
+                    "english": row['english'],
+                    "session_id": row['study_session_id'],
+                    "correct": bool(row['correct']),
+                    "created_at": row['created_at']
+                } for row in cursor.fetchall()],
+                "total_pages": math.ceil(total_items / per_page),
+                "current_page": page,
+                "total_items": total_items
+            })
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
@@ -1,14 +1,60 @@
-from flask import request, jsonify, g
+from flask import request, jsonify, g, Response, stream_with_context
 from flask_cors import cross_origin
 import json
 
+from lib.multiget import InvalidIds, ids_param, missing_ids, parse_ids
+from lib.pagination import InvalidCursor, decode_cursor, keyset_condition, next_page
+from lib.rows import project, project_one
+
+# Rows fetched per round when streaming a group's words as NDJSON
+STREAM_CHUNK_SIZE = 500
+
+# Encodes the text columns of streamed words, parts is passed through as stored
+STREAM_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+def wants_ndjson():
+  # Streaming is opted into with ?stream=1 or by preferring NDJSON over JSON
+  if request.args.get('stream') == '1':
+    return True
+  best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+  return best == 'application/x-ndjson'
+
+# Response keys of the groups columns
+GROUP_KEYS = {'name': 'group_name', 'words_count': 'word_count'}
+
+# SQL expressions behind the sortable word columns, used for keyset conditions
+WORD_SORT_EXPRESSIONS = {
+  'kanji': 'w.kanji',
+  'romaji': 'w.romaji',
+  'english': 'w.english',
+  'correct_count': 'COALESCE(wr.correct_count, 0)',
+  'wrong_count': 'COALESCE(wr.wrong_count, 0)'
+}
+
 def load(app):
   @app.route('/groups', methods=['GET'])
   @cross_origin()
+  @app.response_cache.cached
   def get_groups():
     try:
       cursor = app.db.cursor()
 
+      # ids=1,2,3 returns those groups in request order instead of a page
+      ids = request.args.get('ids')
+      if ids is not None:
+        ids = parse_ids(ids)
+        cursor.execute('''
+          SELECT g.id, g.name, g.words_count
+          FROM json_each(?) ids
+          JOIN groups g ON g.id = ids.value
+          ORDER BY ids.key
+        ''', (ids_param(ids),))
+        groups_data = project(cursor, cursor.fetchall(), GROUP_KEYS)
+        return jsonify({
+          'groups': groups_data,
+          'missing': missing_ids(ids, groups_data)
+        })
+
       # Get the current page number from query parameters (default is 1)
       page = int(request.args.get('page', 1))
       groups_per_page = 10
@@ -33,28 +79,20 @@ def load(app):
         LIMIT ? OFFSET ?
       ''', (groups_per_page, offset))
 
-      groups = cursor.fetchall()
+      groups_data = project(cursor, cursor.fetchall(), GROUP_KEYS)
 
-      # Query the total number of groups
-      cursor.execute('SELECT COUNT(*) FROM groups')
-      total_groups = cursor.fetchone()[0]
+      # Total number of groups from the maintained counter
+      total_groups = app.db.row_count('groups')
       total_pages = (total_groups + groups_per_page - 1) // groups_per_page
 
-      # Format the response
-      groups_data = []
-      for group in groups:
-        groups_data.append({
-          "id": group["id"],
-          "group_name": group["name"],
-          "word_count": group["words_count"]
-        })
-
       # Return groups and pagination metadata
       return jsonify({
         'groups': groups_data,
         'total_pages': total_pages,
         'current_page': page
       })
+    except InvalidIds as e:
+      return jsonify({"error": str(e)}), 400
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
@@ -71,15 +109,11 @@ def load(app):
         WHERE id = ?
       ''', (id,))
       
-      group = cursor.fetchone()
+      group = project_one(cursor, cursor.fetchone(), GROUP_KEYS)
       if not group:
         return jsonify({"error": "Group not found"}), 404
 
-      return jsonify({
-        "id": group["id"],
-        "group_name": group["name"],
-        "word_count": group["words_count"]
-      })
+      return jsonify(group)
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
@@ -105,58 +139,58 @@ def load(app):
       if order not in ['asc', 'desc']:
         order = 'asc'
 
-      # First, check if the group exists
-      cursor.execute('SELECT name FROM groups WHERE id = ?', (id,))
+      # Keyset mode (cursor=, empty for the first page) continues after the previous page
+      page_cursor = request.args.get('cursor')
+      keyset = ''
+      keyset_params = []
+      if page_cursor is not None:
+        if page_cursor:
+          value, last_id = decode_cursor(page_cursor, sort_by, order)
+          keyset = 'AND ' + keyset_condition(WORD_SORT_EXPRESSIONS[sort_by], 'w.id', order)
+          keyset_params = [value, last_id]
+        offset = 0
+
+      # First, check if the group exists, its words_count is the pagination total
+      cursor.execute('SELECT name, words_count FROM groups WHERE id = ?', (id,))
       group = cursor.fetchone()
       if not group:
         return jsonify({"error": "Group not found"}), 404
 
-      # Query to fetch words with pagination and sorting
+      # Query to fetch words with pagination and sorting, id breaks ties
       cursor.execute(f'''
-        SELECT w.*, 
+        SELECT w.id, w.kanji, w.romaji, w.english,
                COALESCE(wr.correct_count, 0) as correct_count,
                COALESCE(wr.wrong_count, 0) as wrong_count
         FROM words w
         JOIN word_groups wg ON w.id = wg.word_id
         LEFT JOIN word_reviews wr ON w.id = wr.word_id
-        WHERE wg.group_id = ?
-        ORDER BY {sort_by} {order}
+        WHERE wg.group_id = ? {keyset}
+        ORDER BY {sort_by} {order}, w.id {order}
         LIMIT ? OFFSET ?
-      ''', (id, words_per_page, offset))
+      ''', (id, *keyset_params, words_per_page + 1, offset))
       
-      words = cursor.fetchall()
+      words_data, next_cursor = next_page(project(cursor, cursor.fetchall()), words_per_page, sort_by, order)
 
-      # Get total words count for pagination
-      cursor.execute('''
-        SELECT COUNT(*) 
-        FROM word_groups 
-        WHERE group_id = ?
-      ''', (id,))
-      total_words = cursor.fetchone()[0]
+      # Get total words count for pagination from the counter cache
+      total_words = group['words_count']
       total_pages = (total_words + words_per_page - 1) // words_per_page
 
-      # Format the response
-      words_data = []
-      for word in words:
-        words_data.append({
-          "id": word["id"],
-          "kanji": word["kanji"],
-          "romaji": word["romaji"],
-          "english": word["english"],
-          "correct_count": word["correct_count"],
-          "wrong_count": word["wrong_count"]
-        })
-
-      return jsonify({
+      response = {
         'words': words_data,
         'total_pages': total_pages,
-        'current_page': page
-      })
+        'next_cursor': next_cursor
+      }
+      if page_cursor is None:
+        response['current_page'] = page
+      return jsonify(response)
+    except InvalidCursor as e:
+      return jsonify({"error": str(e)}), 400
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
   @app.route('/groups/<int:id>/words/raw', methods=['GET'])
   @cross_origin()
+  @app.single_flight.coalesced
   def get_group_words_raw(id):
     try:
       cursor = app.db.cursor()
@@ -168,6 +202,9 @@ def load(app):
       if not group:
         return jsonify({'error': f'Group with id {id} not found'}), 404
 
+      if wants_ndjson():
+        return Response(stream_with_context(stream_group_words_raw(id)), mimetype='application/x-ndjson')
+
       # Fetch all words for the group
       cursor.execute('''
         SELECT 
@@ -203,6 +240,36 @@ def load(app):
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
+  def stream_group_words_raw(id):
+    # One JSON object per line, read from the cursor in chunks so memory stays
+    # flat and the first words go out before the last ones are read. The stored
+    # parts JSON, compact on one line since the importer normalizes it, is
+    # written as is instead of being decoded and encoded again.
+    cursor = app.db.cursor()
+    cursor.execute('''
+      SELECT 
+        w.id,
+        w.kanji,
+        w.romaji,
+        w.english,
+        w.parts
+      FROM word_groups wg
+      JOIN words w ON wg.word_id = w.id
+      WHERE wg.group_id = ?
+      ORDER BY w.kanji ASC
+    ''', (id,))
+
+    encode = STREAM_ENCODER.encode
+    while True:
+      words = cursor.fetchmany(STREAM_CHUNK_SIZE)
+      if not words:
+        break
+      yield ''.join(
+        f'{{"id":{word[0]},"kanji":{encode(word[1])},"romaji":{encode(word[2])},'
+        f'"english":{encode(word[3])},"parts":{word[4]}}}\n'
+        for word in words
+      )
+
   @app.route('/groups/<int:id>/study_sessions', methods=['GET'])
   @cross_origin()
   def get_group_study_sessions(id):
@@ -220,71 +287,62 @@ def load(app):
 
       # Map frontend sort keys to database columns
       sort_mapping = {
-        'startTime': 'created_at',
-        'endTime': 'last_activity_time',
+        'startTime': 's.created_at',
+        'endTime': 'end_time',
         'activityName': 'a.name',
         'groupName': 'g.name',
-        'reviewItemsCount': 'review_count'
+        'reviewItemsCount': 's.review_items_count'
       }
 
       # Use mapped sort column or default to created_at
-      sort_column = sort_mapping.get(sort_by, 'created_at')
-
-      # Get total count for pagination
-      cursor.execute('''
-        SELECT COUNT(*)
-        FROM study_sessions
-        WHERE group_id = ?
-      ''', (id,))
-      total_sessions = cursor.fetchone()[0]
-      total_pages = (total_sessions + sessions_per_page - 1) // sessions_per_page
+      sort_column = sort_mapping.get(sort_by, 's.created_at')
+      if order not in ['asc', 'desc']:
+        order = 'desc'
 
-      # Get study sessions for this group with dynamic calculations
+      # One statement per page: review counts and the time of the last review
+      # are maintained on the session row, a session without reviews ends
+      # 30 minutes after it started, and the group row carries the total
       cursor.execute(f'''
         SELECT 
           s.id,
           s.group_id,
           s.study_activity_id,
           s.created_at as start_time,
-          (
-            SELECT MAX(created_at)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as last_activity_time,
+          COALESCE(s.last_activity_at, datetime(s.created_at, '+30 minutes')) as end_time,
           a.name as activity_name,
           g.name as group_name,
-          (
-            SELECT COUNT(*)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as review_count
+          s.review_items_count,
+          g.study_sessions_count
         FROM study_sessions s
         JOIN study_activities a ON s.study_activity_id = a.id
         JOIN groups g ON s.group_id = g.id
         WHERE s.group_id = ?
-        ORDER BY {sort_column} {order}
+        ORDER BY {sort_column} {order}, s.id {order}
         LIMIT ? OFFSET ?
       ''', (id, sessions_per_page, offset))
       
       sessions = cursor.fetchall()
-      sessions_data = []
-      
-      for session in sessions:
-        # If there's no last_activity_time, use start_time + 30 minutes
-        end_time = session["last_activity_time"]
-        if not end_time:
-            end_time = cursor.execute('SELECT datetime(?, "+30 minutes")', (session["start_time"],)).fetchone()[0]
-        
-        sessions_data.append({
-          "id": session["id"],
-          "group_id": session["group_id"],
-          "group_name": session["group_name"],
-          "study_activity_id": session["study_activity_id"],
-          "activity_name": session["activity_name"],
-          "start_time": session["start_time"],
-          "end_time": end_time,
-          "review_items_count": session["review_count"]
-        })
+
+      # Get total count for pagination from the group's counter cache, only
+      # needs its own lookup when the page is past the last session
+      if sessions:
+        total_sessions = sessions[0]['study_sessions_count']
+      else:
+        cursor.execute('SELECT study_sessions_count FROM groups WHERE id = ?', (id,))
+        group = cursor.fetchone()
+        total_sessions = group['study_sessions_count'] if group else 0
+      total_pages = (total_sessions + sessions_per_page - 1) // sessions_per_page
+
+      sessions_data = [{
+        "id": session["id"],
+        "group_id": session["group_id"],
+        "group_name": session["group_name"],
+        "study_activity_id": session["study_activity_id"],
+        "activity_name": session["activity_name"],
+        "start_time": session["start_time"],
+        "end_time": session["end_time"],
+        "review_items_count": session["review_items_count"]
+      } for session in sessions]
 
       return jsonify({
         'study_sessions': sessions_data,
@@ -0,0 +1,13 @@
+from flask import jsonify
+from flask_cors import cross_origin
+
+def load(app):
+    # Progress of a background job, e.g. a study history reset
+    @app.route('/api/jobs/<int:job_id>', methods=['GET'])
+    @cross_origin()
+    def get_job(job_id):
+        job = app.jobs.get(job_id)
+        # Learners only see their own jobs
+        if job is None or job.tenant != app.db.tenant:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job.to_dict())
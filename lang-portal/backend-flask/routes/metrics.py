@@ -0,0 +1,99 @@
+from flask import Response, jsonify
+
+from lib.metrics import escape
+from lib.tenants import TenantDb
+
+def pool_metrics(app):
+    # Connection pool gauges and counters, one series per pool. In tenant mode
+    # the pools of all open learner databases are added up
+    databases = app.db.databases() if isinstance(app.db, TenantDb) else [app.db]
+    statuses = {}
+    for db in databases:
+        for name, pool in db.pools():
+            if name == 'parallel':
+                continue
+            status = pool.status()
+            if name in statuses:
+                status = {key: statuses[name][key] + value for key, value in status.items()}
+            statuses[name] = status
+    statuses = list(statuses.items())
+
+    lines = [
+        '# HELP lang_portal_db_pool_connections Open pooled connections by state.',
+        '# TYPE lang_portal_db_pool_connections gauge'
+    ]
+    for name, status in statuses:
+        lines.append(f'lang_portal_db_pool_connections{{pool="{name}",state="idle"}} {status["idle"]}')
+        lines.append(f'lang_portal_db_pool_connections{{pool="{name}",state="in_use"}} {status["in_use"]}')
+    lines.append('# HELP lang_portal_db_pool_max_size Maximum number of connections of the pool.')
+    lines.append('# TYPE lang_portal_db_pool_max_size gauge')
+    for name, status in statuses:
+        lines.append(f'lang_portal_db_pool_max_size{{pool="{name}"}} {status["max_size"]}')
+    lines.append('# HELP lang_portal_db_pool_events_total Connections created, reused and discarded and checkouts that waited.')
+    lines.append('# TYPE lang_portal_db_pool_events_total counter')
+    for name, status in statuses:
+        for event in ('created', 'reused', 'discarded', 'waits'):
+            lines.append(f'lang_portal_db_pool_events_total{{pool="{name}",event="{event}"}} {status[event]}')
+    return lines
+
+def tenant_metrics(app):
+    status = app.db.status()
+    lines = [
+        '# HELP lang_portal_tenant_databases_open Learner databases with connections open.',
+        '# TYPE lang_portal_tenant_databases_open gauge',
+        f'lang_portal_tenant_databases_open {status["open"]}',
+        '# HELP lang_portal_tenant_databases_total Learner databases opened, evicted and cloned from the template.',
+        '# TYPE lang_portal_tenant_databases_total counter'
+    ]
+    for event in ('opened', 'evicted', 'cloned'):
+        lines.append(f'lang_portal_tenant_databases_total{{event="{event}"}} {status[event]}')
+    return lines
+
+def cache_metrics(app):
+    status = app.response_cache.status()
+    lines = [
+        '# HELP lang_portal_response_cache_entries Responses currently cached.',
+        '# TYPE lang_portal_response_cache_entries gauge',
+        f'lang_portal_response_cache_entries {status["entries"]}',
+        '# HELP lang_portal_response_cache_lookups_total Cache lookups by result.',
+        '# TYPE lang_portal_response_cache_lookups_total counter'
+    ]
+    for result in ('hits', 'misses', 'not_modified'):
+        lines.append(f'lang_portal_response_cache_lookups_total{{result="{result}"}} {status[result]}')
+    return lines
+
+def single_flight_metrics(app):
+    status = app.single_flight.status()
+    lines = [
+        '# HELP lang_portal_single_flight_requests_total Requests to coalesced views, by route and outcome.',
+        '# TYPE lang_portal_single_flight_requests_total counter'
+    ]
+    for route, stats in sorted(status['routes'].items()):
+        for outcome in ('executed', 'coalesced', 'fallbacks'):
+            lines.append(f'lang_portal_single_flight_requests_total{{route="{escape(route)}",outcome="{outcome}"}} {stats[outcome]}')
+    lines.append('# HELP lang_portal_single_flight_in_flight Coalesced views currently running.')
+    lines.append('# TYPE lang_portal_single_flight_in_flight gauge')
+    lines.append(f'lang_portal_single_flight_in_flight {status["in_flight"]}')
+    return lines
+
+def load(app):
+    app.metrics.add_collector(lambda: pool_metrics(app))
+    app.metrics.add_collector(lambda: cache_metrics(app))
+    app.metrics.add_collector(lambda: single_flight_metrics(app))
+    if isinstance(app.db, TenantDb):
+        app.metrics.add_collector(lambda: tenant_metrics(app))
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        # Prometheus text exposition format
+        return Response(app.metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/metrics/slow-queries', methods=['GET'])
+    def get_slow_queries():
+        try:
+            return jsonify({
+                'threshold_ms': app.metrics.slow_query_seconds * 1000,
+                'queries': app.metrics.slow_query_log()
+            })
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
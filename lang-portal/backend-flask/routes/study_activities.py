@@ -2,9 +2,12 @@ from flask import jsonify, request
 from flask_cors import cross_origin
 import math
 
+from lib.pagination import InvalidCursor, decode_cursor, keyset_condition, next_page
+
 def load(app):
     @app.route('/api/study-activities', methods=['GET'])
     @cross_origin()
+    @app.response_cache.cached
     def get_study_activities():
         cursor = app.db.cursor()
         cursor.execute('SELECT id, name, url, preview_url FROM study_activities')
@@ -39,9 +42,10 @@ def load(app):
     def get_study_activity_sessions(id):
         cursor = app.db.cursor()
         
-        # Verify activity exists
-        cursor.execute('SELECT id FROM study_activities WHERE id = ?', (id,))
-        if not cursor.fetchone():
+        # Verify activity exists, its counter cache is the pagination total
+        cursor.execute('SELECT id, study_sessions_count FROM study_activities WHERE id = ?', (id,))
+        activity = cursor.fetchone()
+        if not activity:
             return jsonify({'error': 'Activity not found'}), 404
 
         # Get pagination parameters
@@ -49,17 +53,25 @@ def load(app):
         per_page = request.args.get('per_page', 10, type=int)
         offset = (page - 1) * per_page
 
+        # Keyset mode (cursor=, empty for the first page) continues after the previous page
+        page_cursor = request.args.get('cursor')
+        keyset = ''
+        keyset_params = []
+        if page_cursor is not None:
+            if page_cursor:
+                try:
+                    created_at, last_id = decode_cursor(page_cursor, 'created_at', 'desc')
+                except InvalidCursor as e:
+                    return jsonify({'error': str(e)}), 400
+                keyset = 'AND ' + keyset_condition('ss.created_at', 'ss.id', 'desc')
+                keyset_params = [created_at, last_id]
+            offset = 0
+
         # Get total count
-        cursor.execute('''
-            SELECT COUNT(*) as count 
-            FROM study_sessions ss
-            JOIN groups g ON g.id = ss.group_id
-            WHERE ss.study_activity_id = ?
-        ''', (id,))
-        total_count = cursor.fetchone()['count']
+        total_count = activity['study_sessions_count']
 
-        # Get paginated sessions
-        cursor.execute('''
+        # Get paginated sessions, newest first with id breaking ties
+        cursor.execute(f'''
             SELECT 
                 ss.id,
                 ss.group_id,
@@ -67,19 +79,17 @@ def load(app):
                 sa.name as activity_name,
                 ss.created_at,
                 ss.study_activity_id as activity_id,
-                COUNT(wri.id) as review_items_count
+                ss.review_items_count
             FROM study_sessions ss
             JOIN groups g ON g.id = ss.group_id
             JOIN study_activities sa ON sa.id = ss.study_activity_id
-            LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-            WHERE ss.study_activity_id = ?
-            GROUP BY ss.id, ss.group_id, g.name, sa.name, ss.created_at, ss.study_activity_id
-            ORDER BY ss.created_at DESC
+            WHERE ss.study_activity_id = ? {keyset}
+            ORDER BY ss.created_at DESC, ss.id DESC
             LIMIT ? OFFSET ?
-        ''', (id, per_page, offset))
-        sessions = cursor.fetchall()
+        ''', (id, *keyset_params, per_page + 1, offset))
+        sessions, next_cursor = next_page(cursor.fetchall(), per_page, 'created_at', 'desc')
 
-        return jsonify({
+        response = {
             'items': [{
                 'id': session['id'],
                 'group_id': session['group_id'],
@@ -91,10 +101,14 @@ def load(app):
                 'review_items_count': session['review_items_count']
             } for session in sessions],
             'total': total_count,
-            'page': page,
             'per_page': per_page,
-            'total_pages': math.ceil(total_count / per_page)
-        })
+            'total_pages': math.ceil(total_count / per_page),
+            'next_cursor': next_cursor
+        }
+        # Pages have no number in keyset mode
+        if page_cursor is None:
+            response['page'] = page
+        return jsonify(response)
 
     @app.route('/api/study-activities/<int:id>/launch', methods=['GET'])
     @cross_origin()
@@ -1,9 +1,17 @@
 from flask import request, jsonify, g
 from flask_cors import cross_origin
 from datetime import datetime
+import functools
+import json
 import math
 import sqlite3
 
+from lib.pagination import InvalidCursor, decode_cursor, keyset_condition, next_page
+from lib.purge import purge_study_history
+
+# Upper bound on the review items accepted by one batch request
+MAX_BATCH_REVIEW_ITEMS = 500
+
 def load(app):
   @app.route('/api/study-sessions', methods=['POST'])
   @cross_origin()
@@ -71,13 +79,11 @@ def load(app):
               sa.id as activity_id,
               sa.name as activity_name,
               ss.created_at,
-              COUNT(wri.id) as review_items_count
+              ss.review_items_count
             FROM study_sessions ss
             JOIN groups g ON g.id = ss.group_id
             JOIN study_activities sa ON sa.id = ss.study_activity_id
-            LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
             WHERE ss.id = ?
-            GROUP BY ss.id
           ''', (new_session_id,))
           
           session = cursor.fetchone()
@@ -121,17 +127,22 @@ def load(app):
       per_page = request.args.get('per_page', 10, type=int)
       offset = (page - 1) * per_page
 
-      # Get total count
-      cursor.execute('''
-        SELECT COUNT(*) as count 
-        FROM study_sessions ss
-        JOIN groups g ON g.id = ss.group_id
-        JOIN study_activities sa ON sa.id = ss.study_activity_id
-      ''')
-      total_count = cursor.fetchone()['count']
+      # Keyset mode (cursor=, empty for the first page) continues after the previous page
+      page_cursor = request.args.get('cursor')
+      keyset = ''
+      keyset_params = []
+      if page_cursor is not None:
+        if page_cursor:
+          created_at, last_id = decode_cursor(page_cursor, 'created_at', 'desc')
+          keyset = 'WHERE ' + keyset_condition('ss.created_at', 'ss.id', 'desc')
+          keyset_params = [created_at, last_id]
+        offset = 0
 
-      # Get paginated sessions
-      cursor.execute('''
+      # Get total count from the maintained counter
+      total_count = app.db.row_count('study_sessions')
+
+      # Get paginated sessions, newest first with id breaking ties
+      cursor.execute(f'''
         SELECT 
           ss.id,
           ss.group_id,
@@ -139,18 +150,17 @@ def load(app):
           sa.id as activity_id,
           sa.name as activity_name,
           ss.created_at,
-          COUNT(wri.id) as review_items_count
+          ss.review_items_count
         FROM study_sessions ss
         JOIN groups g ON g.id = ss.group_id
         JOIN study_activities sa ON sa.id = ss.study_activity_id
-        LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-        GROUP BY ss.id
-        ORDER BY ss.created_at DESC
+        {keyset}
+        ORDER BY ss.created_at DESC, ss.id DESC
         LIMIT ? OFFSET ?
-      ''', (per_page, offset))
-      sessions = cursor.fetchall()
+      ''', (*keyset_params, per_page + 1, offset))
+      sessions, next_cursor = next_page(cursor.fetchall(), per_page, 'created_at', 'desc')
 
-      return jsonify({
+      response = {
         'items': [{
           'id': session['id'],
           'group_id': session['group_id'],
@@ -162,10 +172,16 @@ def load(app):
           'review_items_count': session['review_items_count']
         } for session in sessions],
         'total': total_count,
-        'page': page,
         'per_page': per_page,
-        'total_pages': math.ceil(total_count / per_page)
-      })
+        'total_pages': math.ceil(total_count / per_page),
+        'next_cursor': next_cursor
+      }
+      # Pages have no number in keyset mode
+      if page_cursor is None:
+        response['page'] = page
+      return jsonify(response)
+    except InvalidCursor as e:
+      return jsonify({"error": str(e)}), 400
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
@@ -184,13 +200,11 @@ def load(app):
           sa.id as activity_id,
           sa.name as activity_name,
           ss.created_at,
-          COUNT(wri.id) as review_items_count
+          ss.review_items_count
         FROM study_sessions ss
         JOIN groups g ON g.id = ss.group_id
         JOIN study_activities sa ON sa.id = ss.study_activity_id
-        LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
         WHERE ss.id = ?
-        GROUP BY ss.id
       ''', (id,))
       
       session = cursor.fetchone()
@@ -202,29 +216,34 @@ def load(app):
       per_page = request.args.get('per_page', 10, type=int)
       offset = (page - 1) * per_page
 
+      # The session's review items, including those moved to the archive
+      items = 'SELECT word_id, correct FROM word_review_items WHERE study_session_id = ?'
+      items_params = [id]
+      if app.archive.attach(cursor):
+        items += ' UNION ALL SELECT word_id, correct FROM archive.word_review_items WHERE study_session_id = ?'
+        items_params.append(id)
+
       # Get the words reviewed in this session with their review status
-      cursor.execute('''
+      cursor.execute(f'''
         SELECT 
           w.*,
-          COALESCE(SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END), 0) as session_correct_count,
-          COALESCE(SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END), 0) as session_wrong_count
+          COALESCE(SUM(CASE WHEN items.correct = 1 THEN 1 ELSE 0 END), 0) as session_correct_count,
+          COALESCE(SUM(CASE WHEN items.correct = 0 THEN 1 ELSE 0 END), 0) as session_wrong_count
         FROM words w
-        JOIN word_review_items wri ON wri.word_id = w.id
-        WHERE wri.study_session_id = ?
+        JOIN ({items}) items ON items.word_id = w.id
         GROUP BY w.id
         ORDER BY w.kanji
         LIMIT ? OFFSET ?
-      ''', (id, per_page, offset))
+      ''', (*items_params, per_page, offset))
       
       words = cursor.fetchall()
 
       # Get total count of words
-      cursor.execute('''
+      cursor.execute(f'''
         SELECT COUNT(DISTINCT w.id) as count
         FROM words w
-        JOIN word_review_items wri ON wri.word_id = w.id
-        WHERE wri.study_session_id = ?
-      ''', (id,))
+        JOIN ({items}) items ON items.word_id = w.id
+      ''', items_params)
       
       total_count = cursor.fetchone()['count']
 
@@ -370,20 +389,103 @@ def load(app):
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
+  @app.route('/api/study-sessions/<int:session_id>/reviews:batch', methods=['POST'])
+  @cross_origin()
+  def create_study_session_reviews_batch(session_id):
+    try:
+      # Validate request format
+      if not request.is_json:
+        return jsonify({'error': 'Content-Type must be application/json'}), 400
+      
+      try:
+        data = request.get_json()
+      except:
+        return jsonify({'error': 'Invalid JSON data'}), 400
+        
+      if data is None:
+        return jsonify({'error': 'No data provided'}), 400
+
+      items = data.get('items') if isinstance(data, dict) else None
+      if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Missing required field: items'}), 400
+      if len(items) > MAX_BATCH_REVIEW_ITEMS:
+        return jsonify({'error': f'At most {MAX_BATCH_REVIEW_ITEMS} items can be recorded at once'}), 400
+
+      # Validate every item before writing anything
+      rows = []
+      for index, item in enumerate(items):
+        if not isinstance(item, dict):
+          return jsonify({'error': f'Item {index} must be an object'}), 400
+        if not isinstance(item.get('word_id'), int) or isinstance(item.get('word_id'), bool):
+          return jsonify({'error': f'Invalid type for field word_id in item {index}. Expected int'}), 400
+        if not isinstance(item.get('correct'), bool):
+          return jsonify({'error': f'Invalid type for field correct in item {index}. Expected bool'}), 400
+        rows.append((item['word_id'], session_id, item['correct']))
+
+      cursor = app.db.cursor()
+
+      # Check if session exists
+      cursor.execute('SELECT id FROM study_sessions WHERE id = ?', (session_id,))
+      if not cursor.fetchone():
+        return jsonify({'error': f'Study session with id {session_id} not found'}), 404
+
+      # Check all words exist with a single query
+      word_ids = sorted({row[0] for row in rows})
+      cursor.execute('''
+        SELECT id FROM words WHERE id IN (SELECT value FROM json_each(?))
+      ''', (json.dumps(word_ids),))
+      missing_ids = set(word_ids) - {row['id'] for row in cursor.fetchall()}
+      if missing_ids:
+        return jsonify({'error': f'Words with ids {sorted(missing_ids)} do not exist'}), 404
+
+      try:
+        # One transaction for the whole batch, so it costs a single commit. The
+        # word_reviews counters and dashboard rollups are updated by the insert
+        # trigger within the same transaction.
+        cursor.executemany('''
+          INSERT INTO word_review_items (word_id, study_session_id, correct)
+          VALUES (?, ?, ?)
+        ''', rows)
+        app.db.commit()
+      except sqlite3.Error as e:
+        app.db.rollback()
+        return jsonify({'error': f'Database error: {str(e)}'}), 500
+
+      # Move the reviewed words within the snapshot behind GET /words
+      if app.snapshot is not None:
+        app.snapshot.apply_reviews(cursor, [(row[0], row[2]) for row in rows])
+
+      correct_count = sum(1 for row in rows if row[2])
+      return jsonify({
+        'session_id': session_id,
+        'items_count': len(rows),
+        'correct_count': correct_count,
+        'wrong_count': len(rows) - correct_count
+      }), 201
+
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Clearing a long history takes a while, so it runs as a background job
+  # deleting in batches. Poll the job at the Location returned.
   @app.route('/api/study-sessions/reset', methods=['POST'])
   @cross_origin()
   def reset_study_sessions():
     try:
-      cursor = app.db.cursor()
-      
-      # First delete all word review items since they have foreign key constraints
-      cursor.execute('DELETE FROM word_review_items')
-      
-      # Then delete all study sessions
-      cursor.execute('DELETE FROM study_sessions')
-      
-      app.db.commit()
-      
-      return jsonify({"message": "Study history cleared successfully"}), 200
+      options = request.get_json(silent=True) or {}
+      job = app.jobs.submit('reset_study_history', functools.partial(
+        purge_study_history,
+        batch_size=app.config['RESET_BATCH_SIZE'],
+        vacuum=bool(options.get('vacuum', False))
+      ))
+
+      if job.state == 'failed':
+        return jsonify({"error": job.error, "job": job.to_dict()}), 500
+
+      message = "Study history cleared successfully" if job.state == 'done' else "Clearing study history"
+      response = jsonify({"message": message, "job": job.to_dict()})
+      response.status_code = 202
+      response.headers['Location'] = f'/api/jobs/{job.id}'
+      return response
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
\ No newline at end of file
+      return jsonify({"error": str(e)}), 500
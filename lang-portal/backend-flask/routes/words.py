@@ -2,14 +2,74 @@ from flask import request, jsonify, g
 from flask_cors import cross_origin
 import json
 
+from lib.multiget import InvalidIds, ids_param, missing_ids, parse_ids
+from lib.pagination import InvalidCursor, decode_cursor, keyset_condition, next_page
+from lib.rows import project
+from lib.search import search_words
+from lib.snapshot import COUNT_COLUMNS
+
+# Columns behind the sortable fields, each with a (column, id) index
+# (migration 010) that serves keyset pages in order
+SORT_EXPRESSIONS = {
+  'kanji': 'w.kanji',
+  'romaji': 'w.romaji',
+  'english': 'w.english',
+  'correct_count': 'w.correct_count',
+  'wrong_count': 'w.wrong_count'
+}
+
+# Words with their counters and groups, for the ids bound as a JSON array.
+# Groups come back as a JSON array built in SQL, walking the word's
+# memberships in the (word_id, group_id) index order.
+WORD_DETAILS_SQL = '''
+  SELECT w.id, w.kanji, w.romaji, w.english,
+         COALESCE(r.correct_count, 0) AS correct_count,
+         COALESCE(r.wrong_count, 0) AS wrong_count,
+         (SELECT json_group_array(json_object('id', m.id, 'name', m.name))
+          FROM (SELECT g.id, g.name
+                FROM word_groups wg
+                JOIN groups g ON g.id = wg.group_id
+                WHERE wg.word_id = w.id
+                ORDER BY wg.group_id) m) AS groups
+  FROM json_each(?) ids
+  JOIN words w ON w.id = ids.value
+  LEFT JOIN word_reviews r ON w.id = r.word_id
+  ORDER BY ids.key
+'''
+
+def word_details(cursor, ids):
+  # Word dicts in the order of ids, unknown ids are left out
+  cursor.execute(WORD_DETAILS_SQL, (ids_param(ids),))
+  words = project(cursor, cursor.fetchall())
+  for word in words:
+    word['groups'] = json.loads(word['groups'])
+  return words
+
+def snapshot_value_matches(sort_by, value):
+  # The snapshot compares cursor values with its own, so their types must match
+  if sort_by in COUNT_COLUMNS:
+    return isinstance(value, int) and not isinstance(value, bool)
+  return isinstance(value, str)
+
 def load(app):
   # Endpoint: GET /words with pagination (50 words per page)
+  # Pass cursor= (empty for the first page) to page by keyset using next_cursor
+  # Pass ids=1,2,3 to get the details of those words in one request instead
   @app.route('/words', methods=['GET'])
   @cross_origin()
   def get_words():
     try:
       cursor = app.db.cursor()
 
+      ids = request.args.get('ids')
+      if ids is not None:
+        ids = parse_ids(ids)
+        words = word_details(cursor, ids)
+        return jsonify({
+          "words": words,
+          "missing": missing_ids(ids, words)
+        })
+
       # Get the current page number from query parameters (default is 1)
       page = int(request.args.get('page', 1))
       # Ensure page number is positive
@@ -28,47 +88,84 @@ def load(app):
       if order not in ['asc', 'desc']:
         order = 'asc'
 
-      # Query to fetch words with sorting
-      cursor.execute(f'''
-        SELECT w.id, w.kanji, w.romaji, w.english, 
-            COALESCE(r.correct_count, 0) AS correct_count,
-            COALESCE(r.wrong_count, 0) AS wrong_count
-        FROM words w
-        LEFT JOIN word_reviews r ON w.id = r.word_id
-        ORDER BY {sort_by} {order}
-        LIMIT ? OFFSET ?
-      ''', (words_per_page, offset))
-
-      words = cursor.fetchall()
-
-      # Query the total number of words
-      cursor.execute('SELECT COUNT(*) FROM words')
-      total_words = cursor.fetchone()[0]
-      total_pages = (total_words + words_per_page - 1) // words_per_page
+      # Keyset mode continues after the last row of the previous page instead of skipping rows
+      page_cursor = request.args.get('cursor')
+      after = None
+      if page_cursor is not None:
+        if page_cursor:
+          after = decode_cursor(page_cursor, sort_by, order)
+        offset = 0
 
-      # Format the response
-      words_data = []
-      for word in words:
-        words_data.append({
-          "id": word["id"],
-          "kanji": word["kanji"],
-          "romaji": word["romaji"],
-          "english": word["english"],
-          "correct_count": word["correct_count"],
-          "wrong_count": word["wrong_count"]
-        })
+      if app.snapshot is not None:
+        # Pages of the in-memory snapshot are slices of pre-sorted orders
+        if after is not None and not snapshot_value_matches(sort_by, after[0]):
+          raise InvalidCursor('Invalid cursor')
+        rows, total_words = app.snapshot.page(cursor, sort_by, order, words_per_page + 1, offset, after)
+      else:
+        where = ''
+        params = []
+        if after is not None:
+          where = 'WHERE ' + keyset_condition(SORT_EXPRESSIONS[sort_by], 'w.id', order)
+          params = list(after)
 
-      return jsonify({
+        # Query to fetch words with sorting, id breaks ties so pages never overlap
+        # Counters are the copies kept on words
+        cursor.execute(f'''
+          SELECT w.id, w.kanji, w.romaji, w.english, w.correct_count, w.wrong_count
+          FROM words w
+          {where}
+          ORDER BY {SORT_EXPRESSIONS[sort_by]} {order}, w.id {order}
+          LIMIT ? OFFSET ?
+        ''', (*params, words_per_page + 1, offset))
+        rows = project(cursor, cursor.fetchall())
+
+        # Total number of words from the maintained counter
+        total_words = app.db.row_count('words')
+
+      words_data, next_cursor = next_page(rows, words_per_page, sort_by, order)
+      total_pages = (total_words + words_per_page - 1) // words_per_page
+
+      response = {
         "words": words_data,
         "total_pages": total_pages,
-        "current_page": page,
-        "total_words": total_words
+        "total_words": total_words,
+        "next_cursor": next_cursor
+      }
+      if page_cursor is None:
+        response["current_page"] = page
+      return jsonify(response)
+
+    except (InvalidCursor, InvalidIds) as e:
+      return jsonify({"error": str(e)}), 400
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Endpoint: GET /words/search?q= with ranked, paginated results (50 words per page)
+  # Japanese text matches kanji/kana substrings, latin text romaji and English prefixes
+  @app.route('/words/search', methods=['GET'])
+  @cross_origin()
+  def search_vocabulary():
+    try:
+      query = request.args.get('q', '').strip()
+      if not query:
+        return jsonify({"error": "Search query q is required"}), 400
+
+      page = max(1, int(request.args.get('page', 1)))
+      words_per_page = 50
+
+      cursor = app.db.cursor()
+      words, total_words = search_words(cursor, query, words_per_page, (page - 1) * words_per_page)
+
+      return jsonify({
+        "query": query,
+        "words": words,
+        "total_pages": (total_words + words_per_page - 1) // words_per_page,
+        "total_words": total_words,
+        "current_page": page
       })
 
     except Exception as e:
       return jsonify({"error": str(e)}), 500
-    finally:
-      app.db.close()
 
   # Endpoint: GET /words/:id to get a single word with its details
   @app.route('/words/<int:word_id>', methods=['GET'])
@@ -77,46 +174,13 @@ def load(app):
     try:
       cursor = app.db.cursor()
       
-      # Query to fetch the word and its details
-      cursor.execute('''
-        SELECT w.id, w.kanji, w.romaji, w.english,
-               COALESCE(r.correct_count, 0) AS correct_count,
-               COALESCE(r.wrong_count, 0) AS wrong_count,
-               GROUP_CONCAT(DISTINCT g.id || '::' || g.name) as groups
-        FROM words w
-        LEFT JOIN word_reviews r ON w.id = r.word_id
-        LEFT JOIN word_groups wg ON w.id = wg.word_id
-        LEFT JOIN groups g ON wg.group_id = g.id
-        WHERE w.id = ?
-        GROUP BY w.id
-      ''', (word_id,))
-      
-      word = cursor.fetchone()
-      
-      if not word:
+      # Same query as the ?ids= multi-get, for a single id
+      words = word_details(cursor, [word_id])
+
+      if not words:
         return jsonify({"error": "Word not found"}), 404
-      
-      # Parse the groups string into a list of group objects
-      groups = []
-      if word["groups"]:
-        for group_str in word["groups"].split(','):
-          group_id, group_name = group_str.split('::')
-          groups.append({
-            "id": int(group_id),
-            "name": group_name
-          })
-      
-      return jsonify({
-        "word": {
-          "id": word["id"],
-          "kanji": word["kanji"],
-          "romaji": word["romaji"],
-          "english": word["english"],
-          "correct_count": word["correct_count"],
-          "wrong_count": word["wrong_count"],
-          "groups": groups
-        }
-      })
-      
+
+      return jsonify({"word": words[0]})
+
     except Exception as e:
       return jsonify({"error": str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,30 @@
+-- Indexes for the join-heavy study session and review queries
+
+-- Review items of a session, covering the correct/wrong aggregates
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session_word
+  ON word_review_items (study_session_id, word_id, correct);
+
+-- Words of a group, and groups of a word
+CREATE INDEX IF NOT EXISTS idx_word_groups_group_word
+  ON word_groups (group_id, word_id);
+CREATE INDEX IF NOT EXISTS idx_word_groups_word_group
+  ON word_groups (word_id, group_id);
+
+-- Sessions of a group or an activity, newest first
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_created
+  ON study_sessions (group_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_activity_created
+  ON study_sessions (study_activity_id, created_at);
+
+-- Fold duplicate word_reviews rows into one before enforcing one row per word
+UPDATE word_reviews
+SET correct_count = (SELECT SUM(r.correct_count) FROM word_reviews r WHERE r.word_id = word_reviews.word_id),
+    wrong_count = (SELECT SUM(r.wrong_count) FROM word_reviews r WHERE r.word_id = word_reviews.word_id),
+    last_reviewed = (SELECT MAX(r.last_reviewed) FROM word_reviews r WHERE r.word_id = word_reviews.word_id)
+WHERE word_id IN (SELECT word_id FROM word_reviews GROUP BY word_id HAVING COUNT(*) > 1);
+
+DELETE FROM word_reviews
+WHERE id NOT IN (SELECT MIN(id) FROM word_reviews GROUP BY word_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_reviews_word
+  ON word_reviews (word_id);
@@ -0,0 +1,72 @@
+-- Counters kept current by triggers so pagination totals are a single row lookup
+
+-- Total rows per table
+CREATE TABLE IF NOT EXISTS row_counts (
+  table_name TEXT PRIMARY KEY,
+  row_count INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR REPLACE INTO row_counts (table_name, row_count) VALUES
+  ('words', (SELECT COUNT(*) FROM words)),
+  ('groups', (SELECT COUNT(*) FROM groups)),
+  ('study_sessions', (SELECT COUNT(*) FROM study_sessions));
+
+CREATE TRIGGER IF NOT EXISTS words_count_insert AFTER INSERT ON words
+BEGIN
+  UPDATE row_counts SET row_count = row_count + 1 WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_count_delete AFTER DELETE ON words
+BEGIN
+  UPDATE row_counts SET row_count = row_count - 1 WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_count_insert AFTER INSERT ON groups
+BEGIN
+  UPDATE row_counts SET row_count = row_count + 1 WHERE table_name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_count_delete AFTER DELETE ON groups
+BEGIN
+  UPDATE row_counts SET row_count = row_count - 1 WHERE table_name = 'groups';
+END;
+
+-- groups.words_count counter cache, previously only refreshed by the importer
+UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id);
+
+CREATE TRIGGER IF NOT EXISTS word_groups_count_insert AFTER INSERT ON word_groups
+BEGIN
+  UPDATE groups SET words_count = words_count + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_count_delete AFTER DELETE ON word_groups
+BEGIN
+  UPDATE groups SET words_count = words_count - 1 WHERE id = OLD.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_count_update AFTER UPDATE OF group_id ON word_groups
+BEGIN
+  UPDATE groups SET words_count = words_count - 1 WHERE id = OLD.group_id;
+  UPDATE groups SET words_count = words_count + 1 WHERE id = NEW.group_id;
+END;
+
+-- Study sessions per group and per activity
+ALTER TABLE groups ADD COLUMN study_sessions_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE study_activities ADD COLUMN study_sessions_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE groups SET study_sessions_count = (SELECT COUNT(*) FROM study_sessions WHERE group_id = groups.id);
+UPDATE study_activities SET study_sessions_count = (SELECT COUNT(*) FROM study_sessions WHERE study_activity_id = study_activities.id);
+
+CREATE TRIGGER IF NOT EXISTS study_sessions_count_insert AFTER INSERT ON study_sessions
+BEGIN
+  UPDATE row_counts SET row_count = row_count + 1 WHERE table_name = 'study_sessions';
+  UPDATE groups SET study_sessions_count = study_sessions_count + 1 WHERE id = NEW.group_id;
+  UPDATE study_activities SET study_sessions_count = study_sessions_count + 1 WHERE id = NEW.study_activity_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_sessions_count_delete AFTER DELETE ON study_sessions
+BEGIN
+  UPDATE row_counts SET row_count = row_count - 1 WHERE table_name = 'study_sessions';
+  UPDATE groups SET study_sessions_count = study_sessions_count - 1 WHERE id = OLD.group_id;
+  UPDATE study_activities SET study_sessions_count = study_sessions_count - 1 WHERE id = OLD.study_activity_id;
+END;
@@ -0,0 +1,98 @@
+-- Rollups behind /dashboard/stats, updated as review items and sessions are written
+
+-- Global totals, a single row
+CREATE TABLE IF NOT EXISTS study_totals (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  reviews_count INTEGER NOT NULL DEFAULT 0,  -- All review items
+  correct_count INTEGER NOT NULL DEFAULT 0,  -- Review items answered correctly
+  words_studied INTEGER NOT NULL DEFAULT 0,  -- Words with at least one review item
+  mastered_words INTEGER NOT NULL DEFAULT 0  -- Words with 5+ attempts and a success rate of 80% or more
+);
+
+-- Activity per day (UTC, like created_at)
+CREATE TABLE IF NOT EXISTS daily_activity (
+  day TEXT PRIMARY KEY,  -- YYYY-MM-DD
+  sessions_count INTEGER NOT NULL DEFAULT 0,
+  reviews_count INTEGER NOT NULL DEFAULT 0,
+  correct_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Per word attempts live in word_reviews, rebuilt here from the review items
+INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+SELECT word_id, SUM(correct != 0), SUM(correct = 0), MAX(created_at)
+FROM word_review_items
+WHERE true
+GROUP BY word_id
+ON CONFLICT (word_id) DO UPDATE SET
+  correct_count = excluded.correct_count,
+  wrong_count = excluded.wrong_count,
+  last_reviewed = excluded.last_reviewed;
+
+INSERT OR REPLACE INTO study_totals (id, reviews_count, correct_count, words_studied, mastered_words)
+VALUES (
+  1,
+  (SELECT COUNT(*) FROM word_review_items),
+  (SELECT COUNT(*) FROM word_review_items WHERE correct != 0),
+  (SELECT COUNT(*) FROM word_reviews WHERE correct_count + wrong_count > 0),
+  (SELECT COUNT(*) FROM word_reviews
+   WHERE correct_count + wrong_count >= 5 AND correct_count * 5 >= (correct_count + wrong_count) * 4)
+);
+
+INSERT OR REPLACE INTO daily_activity (day, sessions_count, reviews_count, correct_count)
+SELECT day, SUM(sessions_count), SUM(reviews_count), SUM(correct_count)
+FROM (
+  SELECT date(created_at) AS day, COUNT(*) AS sessions_count, 0 AS reviews_count, 0 AS correct_count
+  FROM study_sessions
+  GROUP BY date(created_at)
+  UNION ALL
+  SELECT date(created_at), 0, COUNT(*), SUM(correct != 0)
+  FROM word_review_items
+  GROUP BY date(created_at)
+)
+WHERE day IS NOT NULL
+GROUP BY day;
+
+-- One trigger keeps the per word, per day and global rollups in step. The
+-- mastered_words delta compares the word's state after this review with the
+-- state before it.
+CREATE TRIGGER IF NOT EXISTS word_review_items_rollup_insert AFTER INSERT ON word_review_items
+BEGIN
+  INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+  VALUES (NEW.word_id, NEW.correct != 0, NEW.correct = 0, COALESCE(NEW.created_at, CURRENT_TIMESTAMP))
+  ON CONFLICT (word_id) DO UPDATE SET
+    correct_count = correct_count + excluded.correct_count,
+    wrong_count = wrong_count + excluded.wrong_count,
+    last_reviewed = MAX(last_reviewed, excluded.last_reviewed);
+
+  UPDATE study_totals SET
+    reviews_count = reviews_count + 1,
+    correct_count = correct_count + (NEW.correct != 0),
+    words_studied = words_studied + (
+      SELECT correct_count + wrong_count = 1 FROM word_reviews WHERE word_id = NEW.word_id
+    ),
+    mastered_words = mastered_words + (
+      SELECT (correct_count + wrong_count >= 5
+              AND correct_count * 5 >= (correct_count + wrong_count) * 4)
+           - (correct_count + wrong_count - 1 >= 5
+              AND (correct_count - (NEW.correct != 0)) * 5 >= (correct_count + wrong_count - 1) * 4)
+      FROM word_reviews WHERE word_id = NEW.word_id
+    )
+  WHERE id = 1;
+
+  INSERT INTO daily_activity (day, reviews_count, correct_count)
+  VALUES (date(COALESCE(NEW.created_at, CURRENT_TIMESTAMP)), 1, NEW.correct != 0)
+  ON CONFLICT (day) DO UPDATE SET
+    reviews_count = reviews_count + 1,
+    correct_count = correct_count + excluded.correct_count;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_sessions_rollup_insert AFTER INSERT ON study_sessions
+BEGIN
+  INSERT INTO daily_activity (day, sessions_count)
+  VALUES (date(COALESCE(NEW.created_at, CURRENT_TIMESTAMP)), 1)
+  ON CONFLICT (day) DO UPDATE SET sessions_count = sessions_count + 1;
+END;
+
+-- Groups studied recently, read as a range over the newest sessions only
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created_group
+  ON study_sessions (created_at, group_id);
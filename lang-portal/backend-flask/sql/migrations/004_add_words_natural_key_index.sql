@@ -0,0 +1,4 @@
+-- Words are deduplicated on (kanji, romaji, english) when importing vocabulary.
+-- Not UNIQUE, existing databases may already hold duplicates.
+CREATE INDEX IF NOT EXISTS idx_words_natural_key
+  ON words (kanji, romaji, english);
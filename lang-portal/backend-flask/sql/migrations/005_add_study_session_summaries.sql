@@ -0,0 +1,16 @@
+-- Per session summary of its review items, so session listings don't need
+-- correlated subqueries or a GROUP BY over word_review_items
+ALTER TABLE study_sessions ADD COLUMN review_items_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE study_sessions ADD COLUMN last_activity_at DATETIME;  -- Time of the latest review item
+
+UPDATE study_sessions
+SET review_items_count = (SELECT COUNT(*) FROM word_review_items WHERE study_session_id = study_sessions.id),
+    last_activity_at = (SELECT MAX(created_at) FROM word_review_items WHERE study_session_id = study_sessions.id);
+
+CREATE TRIGGER IF NOT EXISTS word_review_items_session_summary_insert AFTER INSERT ON word_review_items
+BEGIN
+  UPDATE study_sessions
+  SET review_items_count = review_items_count + 1,
+      last_activity_at = MAX(COALESCE(last_activity_at, NEW.created_at), NEW.created_at)
+  WHERE id = NEW.study_session_id;
+END;
@@ -0,0 +1,4 @@
+-- The newest session is looked up on (created_at, id). The rowid is the last
+-- column of every index, so this index serves that order directly.
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created
+  ON study_sessions (created_at);
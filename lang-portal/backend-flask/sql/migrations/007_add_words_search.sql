@@ -0,0 +1,31 @@
+-- Full text search over the vocabulary. The table indexes the words table
+-- itself (external content), so the text is not stored twice. Substrings of
+-- kanji and kana are indexed by 008, where SQLite supports it.
+
+-- Word prefixes of romaji and English, e.g. "tabe" finds taberu
+CREATE VIRTUAL TABLE IF NOT EXISTS words_search USING fts5(
+  romaji,
+  english,
+  content='words',
+  content_rowid='id',
+  tokenize='unicode61 remove_diacritics 2',
+  prefix='2 3'
+);
+
+INSERT INTO words_search (words_search) VALUES ('rebuild');
+
+CREATE TRIGGER IF NOT EXISTS words_search_insert AFTER INSERT ON words
+BEGIN
+  INSERT INTO words_search (rowid, romaji, english) VALUES (NEW.id, NEW.romaji, NEW.english);
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_search_delete AFTER DELETE ON words
+BEGIN
+  INSERT INTO words_search (words_search, rowid, romaji, english) VALUES ('delete', OLD.id, OLD.romaji, OLD.english);
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_search_update AFTER UPDATE OF romaji, english ON words
+BEGIN
+  INSERT INTO words_search (words_search, rowid, romaji, english) VALUES ('delete', OLD.id, OLD.romaji, OLD.english);
+  INSERT INTO words_search (rowid, romaji, english) VALUES (NEW.id, NEW.romaji, NEW.english);
+END;
@@ -0,0 +1,29 @@
+-- requires: trigram
+-- Substrings of kanji and kana, e.g. 日本 finds 日本語 and 今日本当に. The
+-- trigram tokenizer needs SQLite 3.34; with an older SQLite this migration
+-- is skipped, and applied once SQLite is upgraded. Until then kanji are
+-- searched with LIKE (see lib/search.py).
+CREATE VIRTUAL TABLE IF NOT EXISTS words_search_kanji USING fts5(
+  kanji,
+  content='words',
+  content_rowid='id',
+  tokenize='trigram'
+);
+
+INSERT INTO words_search_kanji (words_search_kanji) VALUES ('rebuild');
+
+CREATE TRIGGER IF NOT EXISTS words_search_kanji_insert AFTER INSERT ON words
+BEGIN
+  INSERT INTO words_search_kanji (rowid, kanji) VALUES (NEW.id, NEW.kanji);
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_search_kanji_delete AFTER DELETE ON words
+BEGIN
+  INSERT INTO words_search_kanji (words_search_kanji, rowid, kanji) VALUES ('delete', OLD.id, OLD.kanji);
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_search_kanji_update AFTER UPDATE OF kanji ON words
+BEGIN
+  INSERT INTO words_search_kanji (words_search_kanji, rowid, kanji) VALUES ('delete', OLD.id, OLD.kanji);
+  INSERT INTO words_search_kanji (rowid, kanji) VALUES (NEW.id, NEW.kanji);
+END;
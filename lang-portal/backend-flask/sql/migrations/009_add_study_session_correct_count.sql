@@ -0,0 +1,20 @@
+-- Correct review items per session next to review_items_count, kept by the
+-- same trigger, so session results don't count word_review_items, which
+-- loses its old rows to the archive (lib/archive.py). Wrong answers are the
+-- difference of the two.
+ALTER TABLE study_sessions ADD COLUMN correct_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE study_sessions
+SET correct_count = (SELECT COUNT(*) FROM word_review_items
+                     WHERE study_session_id = study_sessions.id AND correct != 0);
+
+DROP TRIGGER IF EXISTS word_review_items_session_summary_insert;
+
+CREATE TRIGGER word_review_items_session_summary_insert AFTER INSERT ON word_review_items
+BEGIN
+  UPDATE study_sessions
+  SET review_items_count = review_items_count + 1,
+      correct_count = correct_count + (NEW.correct != 0),
+      last_activity_at = MAX(COALESCE(last_activity_at, NEW.created_at), NEW.created_at)
+  WHERE id = NEW.study_session_id;
+END;
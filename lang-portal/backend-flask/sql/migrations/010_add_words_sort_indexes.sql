@@ -0,0 +1,40 @@
+-- GET /words pages by keyset on (sort column, id). An index on exactly those
+-- columns serves every page as a range search in index order, in both
+-- directions, without sorting the table.
+CREATE INDEX IF NOT EXISTS idx_words_kanji_id ON words (kanji, id);
+CREATE INDEX IF NOT EXISTS idx_words_romaji_id ON words (romaji, id);
+CREATE INDEX IF NOT EXISTS idx_words_english_id ON words (english, id);
+
+-- The counters live in word_reviews, which has no row for words never
+-- reviewed, so they can't be indexed next to the word id. Words keep a copy,
+-- zero until the first review, kept by triggers on word_reviews so every
+-- writer (the review item rollup, resets and rebuilds in lib/stats.py)
+-- updates it.
+ALTER TABLE words ADD COLUMN correct_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE words ADD COLUMN wrong_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE words
+SET correct_count = COALESCE((SELECT correct_count FROM word_reviews WHERE word_id = words.id), 0),
+    wrong_count = COALESCE((SELECT wrong_count FROM word_reviews WHERE word_id = words.id), 0);
+
+CREATE INDEX IF NOT EXISTS idx_words_correct_count_id ON words (correct_count, id);
+CREATE INDEX IF NOT EXISTS idx_words_wrong_count_id ON words (wrong_count, id);
+
+CREATE TRIGGER IF NOT EXISTS word_reviews_words_insert AFTER INSERT ON word_reviews
+BEGIN
+  UPDATE words
+  SET correct_count = COALESCE(NEW.correct_count, 0), wrong_count = COALESCE(NEW.wrong_count, 0)
+  WHERE id = NEW.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_reviews_words_update AFTER UPDATE OF correct_count, wrong_count ON word_reviews
+BEGIN
+  UPDATE words
+  SET correct_count = COALESCE(NEW.correct_count, 0), wrong_count = COALESCE(NEW.wrong_count, 0)
+  WHERE id = NEW.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_reviews_words_delete AFTER DELETE ON word_reviews
+BEGIN
+  UPDATE words SET correct_count = 0, wrong_count = 0 WHERE id = OLD.word_id;
+END;
@@ -0,0 +1,42 @@
+-- Versions bumped by triggers on every change to a table's rows, so in-process
+-- copies (lib/snapshot.py) can tell which table changed since they were
+-- loaded. Unlike row counts they never repeat: a reset followed by as many
+-- new reviews, or an edited word, still moves the version on.
+CREATE TABLE IF NOT EXISTS table_versions (
+  table_name TEXT PRIMARY KEY,
+  version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO table_versions (table_name) VALUES ('words'), ('word_reviews');
+
+-- Only the text columns, the counters copied onto words by migration 010
+-- change with word_reviews
+CREATE TRIGGER IF NOT EXISTS words_version_insert AFTER INSERT ON words
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_version_update AFTER UPDATE OF id, kanji, romaji, english ON words
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_version_delete AFTER DELETE ON words
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_reviews_version_insert AFTER INSERT ON word_reviews
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_reviews_version_update AFTER UPDATE ON word_reviews
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_reviews_version_delete AFTER DELETE ON word_reviews
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_reviews';
+END;
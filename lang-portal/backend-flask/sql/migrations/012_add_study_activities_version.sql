@@ -0,0 +1,18 @@
+-- The CORS origins (lib/origins.py) are built from study_activities and are
+-- only read again when this version moved, not on every write to the database
+INSERT OR IGNORE INTO table_versions (table_name) VALUES ('study_activities');
+
+CREATE TRIGGER IF NOT EXISTS study_activities_version_insert AFTER INSERT ON study_activities
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_activities_version_update AFTER UPDATE ON study_activities
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_activities_version_delete AFTER DELETE ON study_activities
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_activities';
+END;
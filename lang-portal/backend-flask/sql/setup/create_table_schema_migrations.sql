@@ -0,0 +1,5 @@
+CREATE TABLE IF NOT EXISTS schema_migrations (
+  version TEXT PRIMARY KEY,  -- Numeric prefix of the migration file (e.g. "001")
+  name TEXT NOT NULL,  -- File name of the migration
+  applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
\ No newline at end of file
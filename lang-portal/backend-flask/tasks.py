@@ -6,4 +6,43 @@ def init_db(c):
   from flask import Flask
   app = Flask(__name__)
   db.init(app)
-  print("Database initialized successfully.")
\ No newline at end of file
+  print("Database initialized successfully.")
+
+@task
+def import_words(c, path, group, batch_size=5000):
+  from flask import Flask
+  app = Flask(__name__)
+  with app.app_context():
+    result = db.import_words(db.cursor(), group, path, batch_size=int(batch_size))
+  print(
+    f"Imported {result['rows_read']} rows into '{group}' in {result['seconds']:.2f}s "
+    f"({result['rows_per_second']:,.0f} rows/sec): {result['words_inserted']} new words, "
+    f"{result['duplicates_skipped']} duplicates skipped, {result['words_linked']} linked to the group."
+  )
+
+@task
+def migrate(c):
+  from migrate import run_migrations
+  run_migrations()
+
+@task
+def benchmark(c, scale='small', requests=50, baseline=None, save_baseline=None):
+  from benchmarks.run import main
+  argv = ['--scale', scale, '--requests', str(requests)]
+  if baseline:
+    argv += ['--baseline', baseline]
+  if save_baseline:
+    argv += ['--save-baseline', save_baseline]
+  if main(argv):
+    raise SystemExit(1)
+
+@task
+def archive(c, days=365, batch_size=5000):
+  from flask import Flask
+  from lib.archive import Archive, archive_review_items
+  from lib.jobs import Job
+  app = Flask(__name__)
+  app.db = db
+  app.archive = Archive(db)
+  result = archive_review_items(app, Job(0, 'archive_review_items'), int(days), batch_size=int(batch_size))
+  print(f"Moved {result['review_items_moved']} review items older than {result['cutoff']} to {app.archive.path}.")
@@ -0,0 +1,127 @@
+import pytest
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+@pytest.fixture
+def app():
+    """Test app fixture with one study activity"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:'
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Flashcards', 'http://localhost:8081/flashcards'))
+    db.commit()
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def test_module_app_is_lazy(monkeypatch):
+    """Test that importing app.py builds no app until app.app is used"""
+    import app as module
+
+    monkeypatch.setattr(module, '_app', None)
+    assert 'app' not in vars(module)
+
+    application = module.app
+    assert module.app is application
+    assert application.config['DATABASE'] == 'words.db'
+
+    with pytest.raises(AttributeError):
+        module.missing
+
+def test_create_app_runs_no_queries(monkeypatch):
+    """Test that creating the app opens no database connection"""
+    import sqlite3
+    from app import create_app
+
+    connections = []
+    original = sqlite3.connect
+    monkeypatch.setattr(sqlite3, 'connect', lambda *args, **kwargs: connections.append(args) or original(*args, **kwargs))
+
+    create_app({'TESTING': True, 'DATABASE': ':memory:'})
+    assert connections == []
+
+def test_cors_allows_study_activity_origins(client):
+    """Test that undecorated routes allow the origins of the study activities"""
+    response = client.get('/metrics', headers={'Origin': 'http://localhost:8081'})
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://localhost:8081'
+
+    response = client.get('/metrics', headers={'Origin': 'http://evil.example'})
+    assert 'Access-Control-Allow-Origin' not in response.headers
+
+    # No Origin, no CORS headers and no lookup
+    assert 'Access-Control-Allow-Origin' not in client.get('/metrics').headers
+
+def test_cors_origins_follow_study_activities(app, client):
+    """Test that a new study activity is allowed once it is committed"""
+    headers = {'Origin': 'http://localhost:8090'}
+    assert 'Access-Control-Allow-Origin' not in client.get('/metrics', headers=headers).headers
+
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Quiz', 'http://localhost:8090/quiz'))
+    app.db.commit()
+
+    response = client.get('/metrics', headers=headers)
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://localhost:8090'
+
+def test_cors_origins_are_kept_across_other_writes(app, client, monkeypatch):
+    """Test that writes to other tables don't read the study activities again"""
+    headers = {'Origin': 'http://localhost:8081'}
+    client.get('/metrics', headers=headers)
+
+    reads = []
+    origins = app.allowed_origins.origins
+    monkeypatch.setattr(app.allowed_origins, 'origins', lambda: reads.append(1) or origins())
+
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    app.db.commit()
+    response = client.get('/metrics', headers=headers)
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://localhost:8081'
+    assert reads == []
+
+    cursor.execute('UPDATE study_activities SET url = ? WHERE id = 1', ('http://localhost:8082/flashcards',))
+    app.db.commit()
+    assert 'Access-Control-Allow-Origin' not in client.get('/metrics', headers=headers).headers
+    assert reads == [1]
+
+def test_cors_allows_all_without_study_activities(app, client):
+    """Test that every origin is allowed while there are no study activities"""
+    cursor = app.db.cursor()
+    cursor.execute('DELETE FROM study_activities')
+    app.db.commit()
+
+    response = client.get('/metrics', headers={'Origin': 'http://anywhere.example'})
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://anywhere.example'
+
+def test_startup_benchmark():
+    """Test that the startup benchmark times every stage of a worker boot"""
+    from benchmarks.startup import STAGES, measure
+
+    results = measure(samples=1)
+    assert set(results) == {*STAGES, 'total'}
+    assert all(value > 0 for value in results.values())
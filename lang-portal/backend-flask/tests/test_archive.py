@@ -0,0 +1,177 @@
+import pytest
+import json
+import os
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.generate import generate
+from lib.archive import archive_path
+
+# Sessions spread over the last year, see benchmarks/generate.py
+SIZES = {'words': 60, 'groups': 3, 'sessions': 40, 'reviews': 900}
+
+@pytest.fixture
+def app(tmp_path):
+    """Test app fixture on a database file with a year of generated history"""
+    from app import create_app
+
+    app = create_app({'TESTING': True, 'DATABASE': str(tmp_path / 'test.db'), 'ARCHIVE_BATCH_SIZE': 50})
+    with app.app_context():
+        cursor = app.db.cursor()
+        app.db.setup_tables(cursor)
+        generate(cursor, 'tiny', **SIZES)
+
+    yield app
+
+    app.jobs.shutdown()
+    app.db.pool.close_all()
+    app.db.read_pool.close_all()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def wait_for(client, location, timeout=10):
+    """Poll a job until it finished"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = json.loads(client.get(location).data)
+        if job['state'] in ('done', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'Job did not finish: {job}')
+
+def count(app, table):
+    """Rows of a table, attaching the archive when it is asked for"""
+    with app.app_context():
+        cursor = app.db.cursor(readonly=False)
+        app.archive.attach(cursor, create=True)
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        return cursor.fetchone()[0]
+
+def archive(client, days):
+    """Archive review items older than days and wait for the job"""
+    response = client.post('/api/archive', json={'older_than_days': days})
+    assert response.status_code == 202
+    job = wait_for(client, response.headers['Location'])
+    assert job['state'] == 'done'
+    return job['result']
+
+def test_archive_path():
+    """Test that the archive lives next to the database"""
+    assert archive_path('data/words.db') == 'data/words.archive.db'
+    assert archive_path(':memory:') == ':memory:'
+
+def test_archive_moves_old_review_items(app, client):
+    """Test that old review items move to the archive file and newer ones stay"""
+    assert json.loads(client.get('/api/archive').data)['review_items'] == 0
+
+    result = archive(client, 180)
+    moved = result['review_items_moved']
+    assert 0 < moved < 900
+    assert os.path.exists(app.archive.path)
+
+    assert count(app, 'main.word_review_items') == 900 - moved
+    assert count(app, 'archive.word_review_items') == moved
+    with app.app_context():
+        cursor = app.db.cursor(readonly=False)
+        cursor.execute('SELECT COUNT(*) FROM word_review_items WHERE created_at < ?', (result['cutoff'],))
+        assert cursor.fetchone()[0] == 0
+
+    summary = json.loads(client.get('/api/archive').data)
+    assert summary['review_items'] == moved
+    assert summary['newest'] < result['cutoff']
+
+    # Running it again has nothing left to move
+    assert archive(client, 180)['review_items_moved'] == 0
+
+def test_archive_resumes_after_crash(app, client):
+    """Test that items copied by an interrupted run but not deleted are removed from the main table"""
+    with app.app_context():
+        cursor = app.db.cursor(readonly=False)
+        app.archive.attach(cursor, create=True)
+        # A crash between the copy and the delete of a batch
+        cursor.execute('''
+            INSERT INTO archive.word_review_items (id, word_id, study_session_id, correct, created_at)
+            SELECT id, word_id, study_session_id, correct, created_at
+            FROM main.word_review_items
+            ORDER BY created_at LIMIT 10
+        ''')
+        app.db.commit()
+
+    moved = archive(client, 180)['review_items_moved']
+    assert count(app, 'main.word_review_items') + count(app, 'archive.word_review_items') == 900
+    assert count(app, 'archive.word_review_items') == moved
+
+def test_archive_keeps_rollups(client):
+    """Test that the dashboard and session summaries and details still count archived items"""
+    urls = ['/dashboard/stats', '/dashboard/recent-session', '/api/study-sessions']
+    recent = json.loads(client.get('/dashboard/recent-session').data)
+    urls += [f"/api/study-sessions/{session_id}?per_page=100" for session_id in (1, recent['id'])]
+    before = {url: json.loads(client.get(url).data) for url in urls}
+    assert recent['correct_count'] > 0 and recent['wrong_count'] > 0
+    assert before[urls[-1]]['words']
+
+    # Everything moves to the archive
+    assert archive(client, 0)['review_items_moved'] == 900
+
+    assert {url: json.loads(client.get(url).data) for url in urls} == before
+
+def test_archived_review_items_api(app, client):
+    """Test that archived items of a session are listed by the archive API"""
+    archive(client, 0)
+
+    with app.app_context():
+        cursor = app.db.cursor(readonly=False)
+        cursor.execute('SELECT review_items_count FROM study_sessions WHERE id = 1')
+        expected = cursor.fetchone()[0]
+
+    response = client.get('/api/archive/review-items?session_id=1')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['total_items'] == expected
+    assert len(data['items']) == expected
+    assert {item['session_id'] for item in data['items']} == {1}
+    assert all(item['kanji'] for item in data['items'])
+
+    word_id = data['items'][0]['word_id']
+    data = json.loads(client.get(f'/api/archive/review-items?word_id={word_id}').data)
+    assert data['items'] and {item['word_id'] for item in data['items']} == {word_id}
+
+    assert client.get('/api/archive/review-items').status_code == 400
+
+def test_archive_invalid_days(client):
+    """Test that a negative or non-integer age is rejected"""
+    assert client.post('/api/archive', json={'older_than_days': -1}).status_code == 400
+    assert client.post('/api/archive', json={'older_than_days': 'old'}).status_code == 400
+
+def test_reset_clears_archive(app, client):
+    """Test that resetting the study history also deletes archived items"""
+    archive(client, 30)
+    assert count(app, 'archive.word_review_items') > 0
+
+    response = client.post('/api/study-sessions/reset')
+    job = wait_for(client, response.headers['Location'])
+    assert job['state'] == 'done'
+    assert count(app, 'archive.word_review_items') == 0
+    assert count(app, 'main.word_review_items') == 0
+
+def test_archive_in_memory():
+    """Test that an in-memory database archives inline into an in-memory archive"""
+    from app import create_app
+
+    app = create_app({'TESTING': True, 'DATABASE': ':memory:'})
+    with app.app_context():
+        cursor = app.db.cursor()
+        app.db.setup_tables(cursor)
+        generate(cursor, 'tiny', **SIZES)
+
+        response = app.test_client().post('/api/archive', json={'older_than_days': 0})
+        data = json.loads(response.data)
+        assert data['job']['state'] == 'done'
+        assert data['job']['result']['review_items_moved'] == 900
+        assert json.loads(app.test_client().get('/api/archive').data)['review_items'] == 900
@@ -0,0 +1,108 @@
+import pytest
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.generate import generate
+from benchmarks.run import ENDPOINTS, compare, run_benchmarks
+
+SIZES = {'words': 200, 'groups': 4, 'sessions': 30, 'reviews': 600}
+
+@pytest.fixture
+def app():
+    """Test app fixture with test database"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:'
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+def test_generate_is_deterministic(app):
+    """Test that the generator creates the requested rows and the same rows for the same seed"""
+    cursor = app.db.cursor()
+    generate(cursor, 'tiny', seed=7, **SIZES)
+
+    assert app.db.row_count('words') == 200
+    assert app.db.row_count('groups') == 4
+    assert app.db.row_count('study_sessions') == 30
+    cursor.execute('SELECT COUNT(*) FROM word_review_items')
+    assert cursor.fetchone()[0] == 600
+
+    # Review items only use words of their session's group
+    cursor.execute('''
+        SELECT COUNT(*) FROM word_review_items wri
+        JOIN study_sessions ss ON ss.id = wri.study_session_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM word_groups wg WHERE wg.word_id = wri.word_id AND wg.group_id = ss.group_id
+        )
+    ''')
+    assert cursor.fetchone()[0] == 0
+
+    cursor.execute('SELECT kanji, romaji FROM words ORDER BY id LIMIT 5')
+    first = [tuple(row) for row in cursor.fetchall()]
+    cursor.execute('SELECT correct FROM word_review_items ORDER BY id')
+    answers = [row[0] for row in cursor.fetchall()]
+
+    from app import create_app
+    other = create_app({'TESTING': True, 'DATABASE': ':memory:'})
+    with other.app_context():
+        other_cursor = other.db.cursor()
+        other.db.setup_tables(other_cursor)
+        generate(other_cursor, 'tiny', seed=7, **SIZES)
+        other_cursor.execute('SELECT kanji, romaji FROM words ORDER BY id LIMIT 5')
+        assert [tuple(row) for row in other_cursor.fetchall()] == first
+        other_cursor.execute('SELECT correct FROM word_review_items ORDER BY id')
+        assert [row[0] for row in other_cursor.fetchall()] == answers
+
+def test_committed_baseline_covers_every_endpoint():
+    """Test that the tiny baseline in benchmarks/ was recorded for every endpoint at the tiny scale"""
+    import json
+    from benchmarks.generate import SCALES
+
+    with open(os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'baseline-tiny.json')) as file:
+        baseline = json.load(file)
+    assert baseline['scale'] == 'tiny'
+    assert {size: baseline['sizes'][size] for size in SCALES['tiny']} == SCALES['tiny']
+    assert set(baseline['endpoints']) == set(ENDPOINTS)
+
+def test_run_benchmarks_reports_every_endpoint():
+    """Test that a small run measures every endpoint and flags regressions against a baseline"""
+    results = run_benchmarks('tiny', requests=3, warmup=1, counts=SIZES)
+
+    assert set(results['endpoints']) == set(ENDPOINTS)
+    for result in results['endpoints'].values():
+        assert 0 < result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+        assert result['queries_per_request'] >= 1
+
+    assert compare(results, results) == []
+
+    baseline = {'sizes': results['sizes'], 'endpoints': {
+        name: {**result, 'p95_ms': result['p95_ms'] / 10} for name, result in results['endpoints'].items()
+    }}
+    baseline['endpoints']['word']['queries_per_request'] = 0
+    regressions = compare(results, baseline)
+    assert len(regressions) == len(ENDPOINTS) + 1
+    assert any('word: ' in regression and 'queries' in regression for regression in regressions)
+
+    # Without a tolerance only queries per request are compared
+    assert compare(results, baseline, None) == [regression for regression in regressions if 'queries' in regression]
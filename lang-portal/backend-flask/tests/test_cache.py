@@ -0,0 +1,109 @@
+import pytest
+import json
+import os
+import sqlite3
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+@pytest.fixture
+def app():
+    """Test app fixture with test database"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:'
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    db.commit()
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def test_cached_response_and_etag(client, app):
+    """Test that repeated polls are served from the cache and revalidate with ETag"""
+    first = client.get('/groups')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+
+    second = client.get('/groups')
+    assert second.data == first.data
+    assert app.response_cache.status()['hits'] == 1
+
+    # A client that already has the response gets a 304 without a body
+    not_modified = client.get('/groups', headers={'If-None-Match': first.headers['ETag']})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+    # Query arguments are part of the key
+    client.get('/groups?sort_by=words_count')
+    assert app.response_cache.status()['misses'] == 2
+
+def test_cache_invalidated_by_writes(client, app):
+    """Test that a committed write makes cached responses stale"""
+    etag = client.get('/groups').headers['ETag']
+
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Another Group',))
+    app.db.commit()
+
+    response = client.get('/groups', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(json.loads(response.data)['groups']) == 2
+    assert response.headers['ETag'] != etag
+
+def test_errors_are_not_cached(client, app):
+    """Test that error responses are recomputed on every request"""
+    cursor = app.db.cursor()
+    cursor.execute('ALTER TABLE groups RENAME TO groups_old')
+    app.db.commit()
+    assert client.get('/groups').status_code == 500
+
+    cursor.execute('ALTER TABLE groups_old RENAME TO groups')
+    app.db.commit()
+    assert client.get('/groups').status_code == 200
+    assert app.response_cache.status()['entries'] == 1
+
+def test_cache_sees_writes_from_other_connections(tmp_path):
+    """Test that writes by another process invalidate the cache of a file database"""
+    from app import create_app
+
+    database = str(tmp_path / 'cache.db')
+    app = create_app({'TESTING': True, 'DATABASE': database})
+    with app.app_context():
+        app.db.setup_tables(app.db.cursor())
+    client = app.test_client()
+
+    assert json.loads(client.get('/api/study-activities').data) == []
+    assert json.loads(client.get('/api/study-activities').data) == []
+    assert app.response_cache.status()['hits'] == 1
+
+    # Simulate another worker process writing to the same file
+    connection = sqlite3.connect(database)
+    connection.execute("INSERT INTO study_activities (name, url) VALUES ('Typing Tutor', 'http://localhost:8080')")
+    connection.commit()
+    connection.close()
+
+    activities = json.loads(client.get('/api/study-activities').data)
+    assert [activity['title'] for activity in activities] == ['Typing Tutor']
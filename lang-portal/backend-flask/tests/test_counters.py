@@ -0,0 +1,102 @@
+import pytest
+import json
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+@pytest.fixture
+def app():
+    """Test app fixture with test database"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:'
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def assert_counters_match(cursor):
+    """Compare every maintained counter with a real COUNT(*)"""
+    for table in ('words', 'groups', 'study_sessions'):
+        cursor.execute('SELECT row_count FROM row_counts WHERE table_name = ?', (table,))
+        counter = cursor.fetchone()[0]
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        assert counter == cursor.fetchone()[0], table
+
+    cursor.execute('''
+        SELECT COUNT(*) FROM groups g
+        WHERE words_count != (SELECT COUNT(*) FROM word_groups WHERE group_id = g.id)
+           OR study_sessions_count != (SELECT COUNT(*) FROM study_sessions WHERE group_id = g.id)
+    ''')
+    assert cursor.fetchone()[0] == 0
+
+    cursor.execute('''
+        SELECT COUNT(*) FROM study_activities sa
+        WHERE study_sessions_count != (SELECT COUNT(*) FROM study_sessions WHERE study_activity_id = sa.id)
+    ''')
+    assert cursor.fetchone()[0] == 0
+
+def test_counters_follow_inserts_and_deletes(app):
+    """Test that the triggers keep every counter equal to the real row count"""
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Group A',))
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Group B',))
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Test Activity', 'http://example.com/test'))
+    for i in range(5):
+        cursor.execute('''
+            INSERT INTO words (kanji, romaji, english, parts)
+            VALUES (?, ?, ?, ?)
+        ''', (f'語{i}', f'go{i}', f'word {i}', '[]'))
+        cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', (cursor.lastrowid, 1 + i % 2))
+        cursor.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, 1)', (1 + i % 2,))
+    assert_counters_match(cursor)
+
+    cursor.execute('UPDATE word_groups SET group_id = 2 WHERE word_id = 1')
+    cursor.execute('DELETE FROM word_groups WHERE word_id = 2')
+    cursor.execute('DELETE FROM words WHERE id = 2')
+    cursor.execute('DELETE FROM study_sessions WHERE group_id = 1')
+    assert_counters_match(cursor)
+
+def test_paginated_totals_use_counters(client, app):
+    """Test that pagination totals reflect the maintained counters"""
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Test Activity', 'http://example.com/test'))
+    for i in range(12):
+        cursor.execute('''
+            INSERT INTO words (kanji, romaji, english, parts)
+            VALUES (?, ?, ?, ?)
+        ''', (f'語{i}', f'go{i}', f'word {i}', '[]'))
+        cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, 1)', (cursor.lastrowid,))
+        cursor.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)')
+    app.db.commit()
+
+    assert json.loads(client.get('/words').data)['total_words'] == 12
+    assert json.loads(client.get('/groups').data)['total_pages'] == 1
+    assert json.loads(client.get('/groups/1/words').data)['total_pages'] == 2
+    assert json.loads(client.get('/groups/1/study_sessions').data)['total_pages'] == 2
+    assert json.loads(client.get('/api/study-sessions').data)['total'] == 12
+    assert json.loads(client.get('/api/study-activities/1/sessions').data)['total'] == 12
@@ -0,0 +1,239 @@
+import pytest
+import json
+import os
+import random
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+@pytest.fixture
+def app():
+    """Test app fixture with test database"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:'
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def create_history(app, words=20, sessions=15, reviews=400):
+    """Create random sessions and review items for a group of words"""
+    rng = random.Random(42)
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Test Activity', 'http://example.com/test'))
+    for i in range(words):
+        cursor.execute('''
+            INSERT INTO words (kanji, romaji, english, parts)
+            VALUES (?, ?, ?, ?)
+        ''', (f'語{i}', f'go{i}', f'word {i}', '[]'))
+    for i in range(sessions):
+        cursor.execute('''
+            INSERT INTO study_sessions (group_id, study_activity_id, created_at)
+            VALUES (1, 1, datetime('now', ?))
+        ''', (f'-{i * 3} days',))
+    for i in range(reviews):
+        # Some words are answered correctly far more often, so some end up mastered
+        word_id = rng.randint(1, words)
+        correct = rng.random() < (0.95 if word_id % 3 == 0 else 0.5)
+        cursor.execute('''
+            INSERT INTO word_review_items (word_id, study_session_id, correct)
+            VALUES (?, ?, ?)
+        ''', (word_id, rng.randint(1, sessions), correct))
+    app.db.commit()
+
+def scanned_stats(cursor):
+    """The stats as computed by scanning the whole review history"""
+    cursor.execute('SELECT COUNT(DISTINCT word_id) FROM word_review_items')
+    total_words = cursor.fetchone()[0]
+    cursor.execute('''
+        SELECT COUNT(*) FROM (
+            SELECT word_id
+            FROM word_review_items
+            GROUP BY word_id
+            HAVING COUNT(*) >= 5 AND SUM(correct) * 1.0 / COUNT(*) >= 0.8
+        )
+    ''')
+    mastered_words = cursor.fetchone()[0]
+    cursor.execute('SELECT SUM(correct) * 1.0 / COUNT(*) FROM word_review_items')
+    success_rate = cursor.fetchone()[0] or 0
+    return total_words, mastered_words, success_rate
+
+def test_stats_match_full_scan(client, app):
+    """Test that the rollup based stats equal the stats computed from the raw history"""
+    create_history(app)
+    total_words, mastered_words, success_rate = scanned_stats(app.db.cursor())
+    assert mastered_words > 0
+
+    response = client.get('/dashboard/stats')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+
+    assert data['total_vocabulary'] == 20
+    assert data['total_sessions'] == 15
+    assert data['total_words_studied'] == total_words
+    assert data['mastered_words'] == mastered_words
+    assert data['success_rate'] == pytest.approx(success_rate)
+    assert data['active_groups'] == 1
+
+def test_word_reviews_follow_review_items(app):
+    """Test that per word correct and wrong counts are kept in word_reviews"""
+    create_history(app)
+    cursor = app.db.cursor()
+    cursor.execute('''
+        SELECT COUNT(*)
+        FROM word_reviews wr
+        WHERE correct_count != (SELECT COUNT(*) FROM word_review_items WHERE word_id = wr.word_id AND correct)
+           OR wrong_count != (SELECT COUNT(*) FROM word_review_items WHERE word_id = wr.word_id AND NOT correct)
+    ''')
+    assert cursor.fetchone()[0] == 0
+
+def test_stats_after_reset(client, app):
+    """Test that resetting the study history also resets the rollups"""
+    create_history(app)
+
+    response = client.post('/api/study-sessions/reset')
+    assert response.status_code == 202
+    # The in-memory test database runs the job inline
+    assert json.loads(response.data)['job']['state'] == 'done'
+
+    data = json.loads(client.get('/dashboard/stats').data)
+    assert data['total_words_studied'] == 0
+    assert data['mastered_words'] == 0
+    assert data['success_rate'] == 0
+    assert data['total_sessions'] == 0
+    assert data['current_streak'] == 0
+
+def add_session_days(app, days):
+    """Create one study session on each of the given dates"""
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Test Activity', 'http://example.com/test'))
+    for day in days:
+        cursor.execute('''
+            INSERT INTO study_sessions (group_id, study_activity_id, created_at)
+            VALUES (1, 1, ?)
+        ''', (f'{day} 12:00:00',))
+    app.db.commit()
+
+def test_current_streak_stops_at_first_gap(app):
+    """Test that only the days since the last break are counted"""
+    from datetime import date
+    from lib.stats import current_streak
+
+    # Two sessions on the 10th, a break on the 7th and a longer run before it
+    add_session_days(app, ['2025-03-01', '2025-03-02', '2025-03-03', '2025-03-04', '2025-03-05',
+                           '2025-03-06', '2025-03-08', '2025-03-09', '2025-03-10', '2025-03-10'])
+    cursor = app.db.cursor()
+
+    assert current_streak(cursor, today=date(2025, 3, 10)) == 3
+    # Not studied yet today, the streak up to yesterday is still current
+    assert current_streak(cursor, today=date(2025, 3, 11)) == 3
+    # Missed a whole day, the streak is over
+    assert current_streak(cursor, today=date(2025, 3, 12)) == 0
+    assert current_streak(cursor, today=date(2025, 3, 6)) == 6
+
+def test_current_streak_in_stats(client, app):
+    """Test that /dashboard/stats reports the streak ending today"""
+    cursor = app.db.cursor()
+    cursor.execute("SELECT date('now'), date('now', '-1 day'), date('now', '-3 days')")
+    add_session_days(app, list(cursor.fetchone()))
+
+    data = json.loads(client.get('/dashboard/stats').data)
+    assert data['current_streak'] == 2
+
+def test_recent_session(client, app):
+    """Test that the newest session and only its own review results are returned"""
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Test Activity', 'http://example.com/test'))
+    cursor.execute('INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)', ('今日', 'kyou', 'today', '[]'))
+    # Two sessions share the newest timestamp, the higher id wins
+    for created_at in ('2025-01-01 10:00:00', '2025-01-02 10:00:00', '2025-01-02 10:00:00'):
+        cursor.execute('''
+            INSERT INTO study_sessions (group_id, study_activity_id, created_at)
+            VALUES (1, 1, ?)
+        ''', (created_at,))
+    cursor.executemany('''
+        INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (1, ?, ?)
+    ''', [(1, 1), (1, 1), (2, 0), (3, 1), (3, 0), (3, 0)])
+    app.db.commit()
+
+    data = json.loads(client.get('/dashboard/recent-session').data)
+    assert data == {
+        'id': 3,
+        'group_id': 1,
+        'activity_name': 'Test Activity',
+        'created_at': '2025-01-02 10:00:00',
+        'correct_count': 1,
+        'wrong_count': 2
+    }
+
+def test_recent_session_empty(client, app):
+    """Test that no session returns null"""
+    response = client.get('/dashboard/recent-session')
+    assert response.status_code == 200
+    assert json.loads(response.data) is None
+
+def test_stats_parallel_reads(tmp_path):
+    """Test that stats read concurrently on a file database equal the serial ones"""
+    from app import create_app
+
+    results = []
+    for parallel_reads in (0, 4):
+        app = create_app({
+            'TESTING': True,
+            'DATABASE': str(tmp_path / f'parallel-{parallel_reads}.db'),
+            'DB_PARALLEL_READS': parallel_reads,
+            'RESPONSE_CACHE': False
+        })
+        with app.app_context():
+            app.db.setup_tables(app.db.cursor())
+            create_history(app)
+        assert (app.db.parallel_pool is not None) == (parallel_reads > 0)
+
+        client = app.test_client()
+        response = client.get('/dashboard/stats')
+        assert response.status_code == 200
+        results.append(json.loads(response.data))
+
+        # Statements run on the worker threads are recorded for the request
+        metrics = client.get('/metrics').get_data(as_text=True)
+        assert 'lang_portal_request_queries_bucket{route="/dashboard/stats",le="3"} 0' in metrics
+        assert 'lang_portal_request_queries_bucket{route="/dashboard/stats",le="5"} 1' in metrics
+        if parallel_reads:
+            assert app.db.parallel_pool.status()['created'] > 0
+            assert app.db.parallel_pool.status()['in_use'] == 0
+            # Plans of statements run on the workers were taken before the
+            # connections went back to the pool
+            app.metrics.slow_query_seconds = 0
+            client.get('/dashboard/stats')
+            queries = [query for query in app.metrics.slow_query_log() if query['route'] == '/dashboard/stats']
+            assert len(queries) >= 5
+            assert all(query['plan'] for query in queries)
+
+    assert results[0] == results[1]
+    assert results[0]['total_sessions'] == 15
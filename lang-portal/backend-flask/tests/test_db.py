@@ -0,0 +1,221 @@
+import pytest
+import os
+import sys
+import sqlite3
+import threading
+from lib.db import Db
+from lib.pool import ConnectionPool, PoolTimeout
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+@pytest.fixture
+def database(tmp_path):
+    """Path to a throwaway SQLite database file"""
+    return str(tmp_path / 'pool.db')
+
+def test_pool_reuses_connection(database):
+    """Test that a released connection is handed out again"""
+    pool = ConnectionPool(database, max_size=2)
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+
+    assert second is first
+    status = pool.status()
+    assert status['created'] == 1
+    assert status['reused'] == 1
+    assert status['in_use'] == 1
+
+def test_pool_prefers_connection_of_same_thread(database):
+    """Test that a thread gets back the connection it used last"""
+    pool = ConnectionPool(database, max_size=2)
+
+    main_connection = pool.acquire()
+    other = {}
+
+    def worker():
+        other['connection'] = pool.acquire()
+        pool.release(other['connection'])
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    pool.release(main_connection)
+
+    # The worker released last, but this thread should still get its own connection
+    assert pool.acquire() is main_connection
+
+def test_pool_is_bounded(database):
+    """Test that checkout times out once max_size connections are in use"""
+    pool = ConnectionPool(database, max_size=1, timeout=0.05)
+
+    connection = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    pool.release(connection)
+    assert pool.acquire() is connection
+
+def test_pool_replaces_broken_connection(database):
+    """Test that an idle connection failing the health check is replaced"""
+    pool = ConnectionPool(database, max_size=1)
+
+    connection = pool.acquire()
+    pool.release(connection)
+    connection.close()
+
+    replacement = pool.acquire()
+    assert replacement is not connection
+    assert replacement.execute('SELECT 1').fetchone()[0] == 1
+    assert pool.status()['discarded'] == 1
+
+def test_pool_applies_pragmas_once(database):
+    """Test that configured PRAGMAs are applied to new connections"""
+    pool = ConnectionPool(database, pragmas={'cache_size': -4000, 'temp_store': 'MEMORY'})
+
+    connection = pool.acquire()
+    assert connection.execute('PRAGMA cache_size').fetchone()[0] == -4000
+    assert connection.execute('PRAGMA temp_store').fetchone()[0] == 2
+
+def test_pool_rolls_back_on_release(database):
+    """Test that uncommitted work is not leaked to the next request"""
+    pool = ConnectionPool(database, max_size=1)
+
+    connection = pool.acquire()
+    connection.execute('CREATE TABLE items (id INTEGER PRIMARY KEY)')
+    connection.execute('INSERT INTO items (id) VALUES (1)')
+    pool.release(connection)
+
+    connection = pool.acquire()
+    assert connection.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+
+def test_app_returns_connection_to_pool(database):
+    """Test that requests reuse the pooled connection instead of reconnecting"""
+    from app import create_app
+
+    app = create_app({'TESTING': True, 'DATABASE': database})
+    with app.app_context():
+        app.db.setup_tables(app.db.cursor())
+    client = app.test_client()
+
+    for _ in range(3):
+        assert client.get('/words').status_code == 200
+
+    # GET requests are served from the read-only pool
+    status = app.db.read_pool.status()
+    assert status['created'] == 1
+    assert status['in_use'] == 0
+
+def test_wal_profile_pragmas(database):
+    """Test that the WAL storage profile is applied to pooled connections"""
+    from flask import Flask
+
+    db = Db(database=database, profile='wal')
+    with Flask(__name__).app_context():
+        connection = db.get()
+        assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert connection.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        assert connection.execute('PRAGMA temp_store').fetchone()[0] == 2  # MEMORY
+        assert connection.execute('PRAGMA cache_size').fetchone()[0] == -16000
+        db.close()
+
+def test_wal_profile_splits_reads_and_writes(database):
+    """Test that GET requests get a read-only connection and writes a single writer"""
+    from flask import Flask
+
+    app = Flask(__name__)
+    db = Db(database=database, profile='wal')
+    assert db.pool.max_size == 1
+
+    with app.app_context():
+        db.cursor().execute('CREATE TABLE items (id INTEGER PRIMARY KEY)')
+        db.commit()
+        db.close()
+
+    with app.test_request_context('/items', method='GET'):
+        reader = db.get()
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute('INSERT INTO items (id) VALUES (1)')
+        db.close()
+
+    with app.test_request_context('/items', method='POST'):
+        db.cursor().execute('INSERT INTO items (id) VALUES (1)')
+        db.commit()
+        db.close()
+
+def test_wal_readers_do_not_wait_for_writer(database):
+    """Test that a reader sees the last committed data while a write is in progress"""
+    from flask import Flask
+
+    app = Flask(__name__)
+    db = Db(database=database, profile='wal')
+
+    with app.app_context():
+        cursor = db.cursor()
+        cursor.execute('CREATE TABLE items (id INTEGER PRIMARY KEY)')
+        cursor.execute('INSERT INTO items (id) VALUES (1)')
+        db.commit()
+
+        # Keep a write transaction open on the writer connection
+        cursor.execute('INSERT INTO items (id) VALUES (2)')
+        assert db.get().in_transaction
+
+        with app.test_request_context('/items', method='GET'):
+            count = db.cursor().execute('SELECT COUNT(*) FROM items').fetchone()[0]
+            assert count == 1
+
+        db.rollback()
+        db.close()
+
+def test_migration_merges_duplicate_word_reviews(database):
+    """Test that the index migration folds duplicate word_reviews rows before adding the unique index"""
+    from flask import Flask
+
+    db = Db(database=database)
+    with Flask(__name__).app_context():
+        cursor = db.cursor()
+        # Schema as it was before any migrations
+        for table in ('words', 'word_reviews', 'word_review_items', 'groups', 'word_groups',
+                      'study_activities', 'study_sessions', 'study_session_reviews'):
+            cursor.execute(db.sql(f'setup/create_table_{table}.sql'))
+        cursor.execute('ALTER TABLE study_sessions ADD COLUMN status TEXT')
+        cursor.executemany('''
+            INSERT INTO word_reviews (word_id, correct_count, wrong_count) VALUES (?, ?, ?)
+        ''', [(1, 2, 1), (1, 3, 0), (2, 1, 1)])
+        db.commit()
+
+        assert db.migrate(cursor)[0] == '001_add_foreign_key_indexes.sql'
+
+        cursor.execute('SELECT word_id, correct_count, wrong_count FROM word_reviews ORDER BY word_id')
+        assert [tuple(row) for row in cursor.fetchall()] == [(1, 5, 1), (2, 1, 1)]
+        with pytest.raises(sqlite3.IntegrityError):
+            cursor.execute('INSERT INTO word_reviews (word_id) VALUES (1)')
+        db.close()
+
+def test_migration_is_recorded_with_parameters(database, tmp_path, monkeypatch):
+    """Test that a migration is recorded with its file name as given and a failing one leaves no trace"""
+    import lib.db
+    from flask import Flask
+
+    sql_dir = tmp_path / 'sql'
+    (sql_dir / 'setup').mkdir(parents=True)
+    (sql_dir / 'migrations').mkdir()
+    (sql_dir / 'setup' / 'create_table_schema_migrations.sql').write_text(
+        open(os.path.join(lib.db.SQL_DIR, 'setup', 'create_table_schema_migrations.sql')).read())
+    (sql_dir / 'migrations' / "001_it's_quoted.sql").write_text('CREATE TABLE first (x)')
+    (sql_dir / 'migrations' / '002_broken.sql').write_text('CREATE TABLE second (x); SELECT * FROM missing')
+    monkeypatch.setattr(lib.db, 'SQL_DIR', str(sql_dir))
+
+    db = Db(database=database)
+    with Flask(__name__).app_context():
+        cursor = db.cursor()
+        with pytest.raises(sqlite3.OperationalError):
+            db.migrate(cursor)
+
+        cursor.execute('SELECT version, name FROM schema_migrations')
+        assert [tuple(row) for row in cursor.fetchall()] == [('001', "001_it's_quoted.sql")]
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('first', 'second')")
+        assert [row[0] for row in cursor.fetchall()] == ['first']
+        db.close()
@@ -171,3 +171,81 @@ def test_get_group_words_raw_multiple_words(client, app):
     assert words[0]['kanji'] == 'あれ'  # Should come first alphabetically
     assert words[1]['kanji'] == 'いつ'
     assert words[2]['kanji'] == '食べる'
+
+def test_get_group_words_raw_ndjson_stream(client, app):
+    """Test streaming the words of a group as NDJSON"""
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    group_id = cursor.lastrowid
+
+    # More words than fit in one streamed chunk
+    for i in range(1200):
+        cursor.execute('''
+            INSERT INTO words (kanji, romaji, english, parts)
+            VALUES (?, ?, ?, ?)
+        ''', (f'語{i:04d}', f'go{i}', f'word "{i}"', '[{"kanji": "語", "romaji": ["go"]}]'))
+        cursor.execute('''
+            INSERT INTO word_groups (word_id, group_id)
+            VALUES (?, ?)
+        ''', (cursor.lastrowid, group_id))
+    app.db.commit()
+
+    for url, headers in (
+        (f'/groups/{group_id}/words/raw?stream=1', {}),
+        (f'/groups/{group_id}/words/raw', {'Accept': 'application/x-ndjson'})
+    ):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+
+        lines = response.get_data(as_text=True).splitlines()
+        response.close()
+        words = [json.loads(line) for line in lines]
+        assert len(words) == 1200
+        assert words[0] == {
+            'id': 1,
+            'kanji': '語0000',
+            'romaji': 'go0',
+            'english': 'word "0"',
+            'parts': [{'kanji': '語', 'romaji': ['go']}]
+        }
+        assert [word['kanji'] for word in words] == sorted(word['kanji'] for word in words)
+
+    # The regular JSON response is unchanged
+    response = client.get(f'/groups/{group_id}/words/raw', headers={'Accept': 'application/json'})
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.data)['total_words'] == 1200
+
+def test_get_group_words_raw_ndjson_nonexistent_group(client, app):
+    """Test that streaming a non-existent group still returns a 404"""
+    response = client.get('/groups/999/words/raw?stream=1')
+
+    assert response.status_code == 404
+    assert 'not found' in json.loads(response.data)['error'].lower()
+
+def test_get_group_study_sessions_summary(client, app):
+    """Test review counts and end times read from the maintained session summary"""
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Test Activity', 'http://example.com/test'))
+    cursor.execute('INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)', ('今日', 'kyou', 'today', '[]'))
+    cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (1, 1, '2025-01-01 10:00:00')")
+    cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (1, 1, '2025-01-02 10:00:00')")
+    cursor.executemany('''
+        INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (1, 2, ?, ?)
+    ''', [(1, '2025-01-02 10:05:00'), (0, '2025-01-02 10:12:00'), (1, '2025-01-02 10:08:00')])
+    app.db.commit()
+
+    response = client.get('/groups/1/study_sessions')
+    assert response.status_code == 200
+    sessions = json.loads(response.data)['study_sessions']
+
+    assert [session['id'] for session in sessions] == [2, 1]
+    assert sessions[0]['review_items_count'] == 3
+    assert sessions[0]['end_time'] == '2025-01-02 10:12:00'
+    # A session without reviews ends 30 minutes after it started
+    assert sessions[1]['review_items_count'] == 0
+    assert sessions[1]['end_time'] == '2025-01-01 10:30:00'
+
+    sessions = json.loads(client.get('/groups/1/study_sessions?sort_by=reviewItemsCount&order=asc').data)['study_sessions']
+    assert [session['id'] for session in sessions] == [1, 2]
@@ -0,0 +1,147 @@
+import pytest
+import io
+import json
+import os
+import sys
+from lib.importer import import_words, iter_json_array, read_words
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+@pytest.fixture
+def app():
+    """Test app fixture with test database"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:'
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+def make_words(count):
+    """Sample words with parts, like the seed data"""
+    return [{
+        'kanji': f'語{i}',
+        'romaji': f'go{i}',
+        'english': f'word {i}',
+        'parts': [{'kanji': '語', 'romaji': ['go']}]
+    } for i in range(count)]
+
+def test_iter_json_array_reads_in_chunks():
+    """Test that the streaming reader returns every value even with tiny chunks"""
+    words = make_words(50)
+    text = json.dumps(words, ensure_ascii=False, indent=2)
+
+    assert list(iter_json_array(io.StringIO(text), chunk_size=7)) == words
+    assert list(iter_json_array(io.StringIO('[]'))) == []
+
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"kanji": "語"}')))
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"kanji": "語"},')))
+
+def test_read_words_formats(tmp_path):
+    """Test that JSON, JSONL and CSV files yield the same words"""
+    words = make_words(3)
+
+    json_path = tmp_path / 'words.json'
+    json_path.write_text(json.dumps(words), encoding='utf-8')
+
+    jsonl_path = tmp_path / 'words.jsonl'
+    jsonl_path.write_text('\n'.join(json.dumps(word) for word in words) + '\n', encoding='utf-8')
+
+    csv_path = tmp_path / 'words.csv'
+    csv_path.write_text('kanji,romaji,english,parts\n' + ''.join(
+        f'{w["kanji"]},{w["romaji"]},{w["english"]},"{json.dumps(w["parts"]).replace(chr(34), chr(34) * 2)}"\n'
+        for w in words
+    ), encoding='utf-8')
+
+    assert list(read_words(str(json_path))) == words
+    assert list(read_words(str(jsonl_path))) == words
+    csv_words = list(read_words(str(csv_path)))
+    assert [json.loads(w['parts']) for w in csv_words] == [w['parts'] for w in words]
+
+    with pytest.raises(ValueError):
+        list(read_words(str(tmp_path / 'words.txt')))
+
+def test_import_words_dedupes_and_links(app):
+    """Test that duplicates are skipped and every word is linked to the group once"""
+    cursor = app.db.cursor()
+    words = make_words(20)
+
+    # The file repeats some of its own words
+    result = import_words(cursor, words + words[:5], 'Test Group', batch_size=7)
+    assert result['rows_read'] == 25
+    assert result['words_inserted'] == 20
+    assert result['duplicates_skipped'] == 5
+    assert result['words_linked'] == 20
+    assert result['rows_per_second'] > 0
+
+    # Importing again into the same group changes nothing
+    result = import_words(cursor, words, 'Test Group')
+    assert result['words_inserted'] == 0
+    assert result['words_linked'] == 0
+
+    # Known words are reused when imported into another group
+    result = import_words(cursor, words[:10] + make_words(25)[20:], 'Other Group')
+    assert result['words_inserted'] == 5
+    assert result['words_linked'] == 15
+
+    cursor.execute('SELECT name, words_count FROM groups ORDER BY id')
+    assert [tuple(row) for row in cursor.fetchall()] == [('Test Group', 20), ('Other Group', 15)]
+    cursor.execute('SELECT parts FROM words WHERE id = 1')
+    assert json.loads(cursor.fetchone()['parts']) == words[0]['parts']
+
+def test_import_words_rolls_back_on_error(app):
+    """Test that a bad row leaves the database untouched"""
+    cursor = app.db.cursor()
+    words = make_words(10) + [{'kanji': '語', 'romaji': 'go'}]
+
+    with pytest.raises(KeyError):
+        import_words(cursor, words, 'Test Group', batch_size=4)
+
+    cursor.execute('SELECT COUNT(*) FROM words')
+    assert cursor.fetchone()[0] == 0
+    cursor.execute('SELECT COUNT(*) FROM groups')
+    assert cursor.fetchone()[0] == 0
+
+def test_import_words_normalizes_parts(app):
+    """Test that parts given as JSON text are stored compact on one line"""
+    cursor = app.db.cursor()
+    words = [{'kanji': '語', 'romaji': 'go', 'english': 'language',
+              'parts': '[\n  {"kanji": "語",\n   "romaji": ["go"]}\n]'}]
+    import_words(cursor, words, 'Test Group')
+
+    cursor.execute('SELECT parts FROM words')
+    assert cursor.fetchone()['parts'] == '[{"kanji":"語","romaji":["go"]}]'
+
+    bad = [{'kanji': '本', 'romaji': 'hon', 'english': 'book', 'parts': '[{"kanji":'}]
+    with pytest.raises(ValueError):
+        import_words(cursor, bad, 'Test Group')
+
+def test_import_word_json_seed_file(app):
+    """Test that the seed files still import through Db.import_word_json"""
+    cursor = app.db.cursor()
+    app.db.import_word_json(cursor=cursor, group_name='Core Verbs', data_json_path='seed/data_verbs.json')
+
+    with open('seed/data_verbs.json') as file:
+        seed_words = json.load(file)
+    cursor.execute('SELECT words_count FROM groups WHERE name = ?', ('Core Verbs',))
+    assert cursor.fetchone()['words_count'] == len(seed_words)
@@ -0,0 +1,141 @@
+import pytest
+import json
+import os
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.generate import generate
+from lib.stats import rebuild_rollups
+
+SIZES = {'words': 60, 'groups': 3, 'sessions': 40, 'reviews': 900}
+
+def create_app_with_history(database, **config):
+    """An app on database filled with a small generated history"""
+    from app import create_app
+
+    app = create_app({'TESTING': True, 'DATABASE': database, 'RESET_BATCH_SIZE': 37, **config})
+    with app.app_context():
+        cursor = app.db.cursor()
+        app.db.setup_tables(cursor)
+        generate(cursor, 'tiny', **SIZES)
+    return app
+
+@pytest.fixture
+def app(tmp_path):
+    """Test app fixture on a database file, so jobs run in the background"""
+    app = create_app_with_history(str(tmp_path / 'test.db'))
+    yield app
+    app.jobs.shutdown()
+    app.db.pool.close_all()
+    app.db.read_pool.close_all()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def wait_for(client, location, timeout=10):
+    """Poll a job until it finished"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = json.loads(client.get(location).data)
+        if job['state'] in ('done', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'Job did not finish: {job}')
+
+def rollups(app):
+    """Every rollup row, for comparisons"""
+    with app.app_context():
+        cursor = app.db.cursor(readonly=False)
+        result = {}
+        for table, order in (('word_reviews', 'word_id'), ('daily_activity', 'day'), ('study_totals', 'id')):
+            cursor.execute(f'SELECT * FROM {table} ORDER BY {order}')
+            result[table] = [tuple(row)[1:4] if table == 'word_reviews' else tuple(row) for row in cursor.fetchall()]
+        # The copies of the counters kept on words for sorting
+        cursor.execute('SELECT id, correct_count, wrong_count FROM words WHERE correct_count + wrong_count > 0 ORDER BY id')
+        result['words'] = [tuple(row) for row in cursor.fetchall()]
+        return result
+
+def test_reset_runs_in_background(app, client):
+    """Test that reset answers 202 at once and the job deletes the history in batches"""
+    with app.app_context():
+        cursor = app.db.cursor(readonly=False)
+        cursor.execute('''
+            INSERT INTO study_session_reviews (session_id, rating, completion_status)
+            VALUES (3, 4, 'completed')
+        ''')
+        app.db.commit()
+
+    response = client.post('/api/study-sessions/reset')
+    assert response.status_code == 202
+    data = json.loads(response.data)
+    assert data['job']['name'] == 'reset_study_history'
+    assert response.headers['Location'] == f"/api/jobs/{data['job']['id']}"
+
+    job = wait_for(client, response.headers['Location'])
+    assert job['state'] == 'done'
+    assert job['result'] == {
+        'review_items_deleted': 900,
+        'session_reviews_deleted': 1,
+        'sessions_deleted': 40,
+        'vacuumed_pages': None
+    }
+    assert job['progress']['phase'] == 'done'
+
+    stats = json.loads(client.get('/dashboard/stats').data)
+    assert stats['total_sessions'] == 0
+    assert stats['total_words_studied'] == 0
+
+    with app.app_context():
+        cursor = app.db.cursor()
+        cursor.execute('SELECT COUNT(*) FROM word_review_items')
+        assert cursor.fetchone()[0] == 0
+        cursor.execute('SELECT COUNT(*) FROM word_reviews')
+        assert cursor.fetchone()[0] == 0
+        cursor.execute('SELECT SUM(correct_count + wrong_count) FROM words')
+        assert cursor.fetchone()[0] == 0
+        cursor.execute('SELECT SUM(study_sessions_count) FROM groups')
+        assert cursor.fetchone()[0] == 0
+
+def test_reset_is_not_started_twice(app, client):
+    """Test that a reset requested while one is running returns the running job"""
+    app.jobs.background = False  # Keep the first job pending
+    from lib.jobs import Job
+    pending = Job(99, 'reset_study_history')
+    app.jobs._jobs[pending.id] = pending
+
+    data = json.loads(client.post('/api/study-sessions/reset').data)
+    assert data['job']['id'] == 99
+    assert data['job']['state'] == 'pending'
+
+def test_unknown_job(client):
+    """Test that an unknown job id is a 404"""
+    assert client.get('/api/jobs/12345').status_code == 404
+
+def test_rebuild_rollups_matches_triggers(app):
+    """Test that rebuilding the rollups gives what the triggers maintained"""
+    before = rollups(app)
+    assert before['word_reviews']
+    assert before['words'] == before['word_reviews']
+    with app.app_context():
+        rebuild_rollups(app.db.cursor(readonly=False))
+        app.db.commit()
+    assert rollups(app) == before
+
+def test_reset_with_incremental_vacuum(tmp_path):
+    """Test that the reset can hand free pages back when auto_vacuum is incremental"""
+    app = create_app_with_history(str(tmp_path / 'vacuum.db'), DB_PRAGMAS={'auto_vacuum': 'INCREMENTAL'})
+    client = app.test_client()
+    try:
+        response = client.post('/api/study-sessions/reset', json={'vacuum': True})
+        job = wait_for(client, response.headers['Location'])
+        assert job['state'] == 'done'
+        assert job['result']['vacuumed_pages'] > 0
+    finally:
+        app.jobs.shutdown()
+        app.db.pool.close_all()
+        app.db.read_pool.close_all()
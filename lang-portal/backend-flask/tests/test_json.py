@@ -0,0 +1,114 @@
+import pytest
+from datetime import datetime
+import json
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lib import json_provider
+from lib.json_provider import FastJSONProvider
+from lib.rows import project, project_one
+
+@pytest.fixture
+def app():
+    """Test app fixture with a word and a group"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:'
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    cursor.execute('''
+        INSERT INTO words (kanji, romaji, english, parts)
+        VALUES (?, ?, ?, ?)
+    ''', ('今日', 'kyou', 'today', '{"type": "noun"}'))
+    cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (1, 1)')
+    db.commit()
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def test_fast_provider_is_installed(app):
+    """Test that the app serializes with the fast provider by default"""
+    assert isinstance(app.json, FastJSONProvider)
+
+def test_fast_provider_matches_stdlib(app):
+    """Test that responses decode to the same data as with the stdlib encoder"""
+    data = {'b': [1, 2.5, None, True], 'a': '今日', 'c': {'z': 1, 'y': 'x'}}
+    response = app.json.response(data)
+    body = response.get_data(as_text=True)
+
+    assert response.mimetype == 'application/json'
+    assert body.endswith('\n')
+    assert json.loads(body) == data
+    # Keys are sorted like the default provider does
+    assert body.index('"a"') < body.index('"b"') < body.index('"c"')
+
+def test_fast_provider_dates(app):
+    """Test that dates go through the same default hook as the stdlib provider"""
+    value = datetime(2025, 1, 1, 12, 30)
+    assert json.loads(app.json.dumps({'at': value})) == {'at': 'Wed, 01 Jan 2025 12:30:00 GMT'}
+
+def test_fast_provider_stdlib_fallback(app, monkeypatch):
+    """Test that the provider falls back to json.dumps without orjson or with stdlib arguments"""
+    assert app.json.dumps({'a': 1}, separators=(',', ':')) == '{"a":1}'
+
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    response = app.json.response({'b': 1, 'a': 2})
+    assert json.loads(response.get_data()) == {'a': 2, 'b': 1}
+
+def test_fast_provider_big_integers(app):
+    """Test that integers beyond 64 bits, which orjson refuses, are encoded like the stdlib does"""
+    data = {'big': 2 ** 70, 'small': -2 ** 64}
+    assert app.json.dumps(data) == json.dumps(data, sort_keys=True)
+    assert json.loads(app.json.response(data).get_data()) == data
+
+    # Values no encoder supports still fail
+    with pytest.raises(TypeError):
+        app.json.dumps({'value': object()})
+
+def test_fast_json_disabled():
+    """Test that FAST_JSON off keeps Flask's default provider"""
+    from app import create_app
+
+    app = create_app({'TESTING': True, 'DATABASE': ':memory:', 'FAST_JSON': False})
+    assert not isinstance(app.json, FastJSONProvider)
+
+def test_project_renames_columns(app):
+    """Test that rows are projected onto their column names with renames applied"""
+    cursor = app.db.cursor()
+    cursor.execute('SELECT id, name, words_count FROM groups')
+    rows = project(cursor, cursor.fetchall(), {'name': 'group_name'})
+    assert rows == [{'id': 1, 'group_name': 'Test Group', 'words_count': 1}]
+
+    cursor.execute('SELECT id FROM groups WHERE id = 2')
+    assert project_one(cursor, cursor.fetchone()) is None
+
+def test_group_response_keys(client):
+    """Test that the projected group responses keep their API field names"""
+    response = client.get('/groups/1')
+    assert response.status_code == 200
+    assert json.loads(response.data) == {'id': 1, 'group_name': 'Test Group', 'word_count': 1}
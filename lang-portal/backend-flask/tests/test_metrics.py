@@ -0,0 +1,99 @@
+import pytest
+import json
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lib.metrics import normalize_sql
+
+@pytest.fixture
+def app():
+    """Test app fixture with a few words, every statement counts as slow"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:',
+        'RESPONSE_CACHE': False,
+        'SLOW_QUERY_MS': 0
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+    for i in range(3):
+        cursor.execute('''
+            INSERT INTO words (kanji, romaji, english, parts)
+            VALUES (?, ?, ?, ?)
+        ''', (f'語{i}', f'go{i}', f'word {i}', '[]'))
+    db.commit()
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def test_normalize_sql():
+    """Test that literals and placeholder lists are folded into one statement shape"""
+    assert normalize_sql("SELECT *\n  FROM words WHERE id = 12 AND kanji = 'a''b'") == 'SELECT * FROM words WHERE id = ? AND kanji = ?'
+    assert normalize_sql('SELECT id FROM words WHERE id IN (?, ?,?)') == 'SELECT id FROM words WHERE id IN (...)'
+
+def test_metrics_endpoint(client, app):
+    """Test that requests and their statements show up in the Prometheus output"""
+    for _ in range(2):
+        assert client.get('/words').status_code == 200
+    assert client.get('/words/999').status_code == 404
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+
+    assert 'lang_portal_requests_total{method="GET",route="/words",status="200"} 2' in text
+    assert 'lang_portal_requests_total{method="GET",route="/words/<int:word_id>",status="404"} 1' in text
+    assert 'lang_portal_request_duration_seconds_count{route="/words"} 2' in text
+    assert 'lang_portal_request_queries_bucket{route="/words",le="+Inf"} 2' in text
+
+    # The word list statement returned three rows on each request
+    rows = [line for line in text.splitlines()
+            if line.startswith('lang_portal_sql_statement_rows_total') and 'FROM words w' in line]
+    assert rows and rows[0].endswith(' 6')
+
+    assert 'lang_portal_db_pool_connections{pool="writer",state="idle"}' in text
+    assert 'lang_portal_response_cache_lookups_total{result="hits"} 0' in text
+
+def test_slow_query_log_has_plans(client, app):
+    """Test that slow statements are logged with their query plan"""
+    assert client.get('/words/1').status_code == 200
+
+    data = json.loads(client.get('/metrics/slow-queries').data)
+    assert data['threshold_ms'] == 0
+    queries = [query for query in data['queries'] if query['route'] == '/words/<int:word_id>']
+    assert queries
+    assert all(query['plan'] for query in queries)
+    assert any('SEARCH w USING INTEGER PRIMARY KEY (rowid=?)' in query['plan'] for query in queries)
+
+def test_metrics_disabled(app):
+    """Test that cursors are not wrapped when metrics are off"""
+    import sqlite3
+    from app import create_app
+
+    app = create_app({'TESTING': True, 'DATABASE': ':memory:', 'METRICS': False})
+    with app.test_request_context('/words'):
+        app.metrics.start_request()
+        assert isinstance(app.db.cursor(), sqlite3.Cursor)
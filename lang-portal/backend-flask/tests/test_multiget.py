@@ -0,0 +1,124 @@
+import pytest
+import json
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lib.multiget import MAX_IDS, InvalidIds, parse_ids
+
+@pytest.fixture
+def app():
+    """Test app fixture with three words in two groups"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:'
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+
+    cursor.executemany('INSERT INTO groups (name) VALUES (?)', [('Basics',), ('Time',)])
+    cursor.executemany('''
+        INSERT INTO words (kanji, romaji, english, parts)
+        VALUES (?, ?, ?, ?)
+    ''', [
+        ('今日', 'kyou', 'today', '{}'),
+        ('明日', 'ashita', 'tomorrow', '{}'),
+        ('水', 'mizu', 'water', '{}')
+    ])
+    cursor.executemany('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', [(1, 2), (1, 1), (2, 2)])
+    cursor.execute('INSERT INTO word_reviews (word_id, correct_count, wrong_count) VALUES (1, 3, 1)')
+    db.commit()
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def test_parse_ids():
+    """Test that ids keep their request order and duplicates are dropped"""
+    assert parse_ids('3, 1,3,,2') == [3, 1, 2]
+
+    for value in ('', ',', 'a,1', '1.5'):
+        with pytest.raises(InvalidIds):
+            parse_ids(value)
+    with pytest.raises(InvalidIds):
+        parse_ids(','.join(str(i) for i in range(MAX_IDS + 1)))
+
+def test_get_words_by_ids(client):
+    """Test that GET /words?ids= returns the words in request order with structured groups"""
+    response = client.get('/words?ids=3,1,99,2')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+
+    assert [word['id'] for word in data['words']] == [3, 1, 2]
+    assert data['missing'] == [99]
+    assert data['words'][0]['groups'] == []
+    assert data['words'][1] == {
+        'id': 1,
+        'kanji': '今日',
+        'romaji': 'kyou',
+        'english': 'today',
+        'correct_count': 3,
+        'wrong_count': 1,
+        'groups': [{'id': 1, 'name': 'Basics'}, {'id': 2, 'name': 'Time'}]
+    }
+
+def test_get_words_by_ids_matches_single_word(client):
+    """Test that a word from the multi-get is the same as from GET /words/<id>"""
+    many = json.loads(client.get('/words?ids=1').data)
+    single = json.loads(client.get('/words/1').data)
+    assert many['words'] == [single['word']]
+
+def test_get_words_by_invalid_ids(client):
+    """Test that malformed or too long id lists are rejected"""
+    assert client.get('/words?ids=1,x').status_code == 400
+    too_many = ','.join(str(i) for i in range(1, MAX_IDS + 2))
+    response = client.get(f'/words?ids={too_many}')
+    assert response.status_code == 400
+    assert 'error' in json.loads(response.data)
+
+def test_get_groups_by_ids(client):
+    """Test that GET /groups?ids= returns the groups in request order with their word counts"""
+    response = client.get('/groups?ids=2,5,1')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+
+    assert data['groups'] == [
+        {'id': 2, 'group_name': 'Time', 'word_count': 2},
+        {'id': 1, 'group_name': 'Basics', 'word_count': 1}
+    ]
+    assert data['missing'] == [5]
+
+    assert client.get('/groups?ids=').status_code == 400
+
+def test_get_words_by_ids_is_one_statement(app, client):
+    """Test that any number of ids is resolved with a single statement"""
+    connection = app.db.get()
+    statements = []
+    connection.set_trace_callback(statements.append)
+    try:
+        response = client.get('/words?ids=1,2,3')
+    finally:
+        connection.set_trace_callback(None)
+
+    assert response.status_code == 200
+    assert len([statement for statement in statements if 'SELECT' in statement]) == 1
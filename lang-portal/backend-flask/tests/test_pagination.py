@@ -0,0 +1,142 @@
+import pytest
+import json
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+@pytest.fixture
+def app():
+    """Test app fixture with test database"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:'
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def create_words(app, count):
+    """Create a group with count words, several of them sharing the same kanji"""
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    group_id = cursor.lastrowid
+    for i in range(count):
+        cursor.execute('''
+            INSERT INTO words (kanji, romaji, english, parts)
+            VALUES (?, ?, ?, ?)
+        ''', (f'語{i % 7}', f'go{i}', f'word {i}', '[]'))
+        cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', (cursor.lastrowid, group_id))
+    app.db.commit()
+    return group_id
+
+def walk_cursor(client, url, key):
+    """Follow next_cursor from the first page to the last and collect the ids"""
+    ids = []
+    page_cursor = ''
+    while page_cursor is not None:
+        separator = '&' if '?' in url else '?'
+        response = client.get(f'{url}{separator}cursor={page_cursor}')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        ids.extend(item['id'] for item in data[key])
+        page_cursor = data['next_cursor']
+    return ids
+
+def walk_pages(client, url, key):
+    """Request every numbered page and collect the ids"""
+    ids = []
+    page = 1
+    while True:
+        separator = '&' if '?' in url else '?'
+        data = json.loads(client.get(f'{url}{separator}page={page}').data)
+        if not data[key]:
+            return ids
+        ids.extend(item['id'] for item in data[key])
+        page += 1
+
+def test_words_cursor_matches_page_numbers(client, app):
+    """Test that keyset paging over /words returns the same rows as page numbers"""
+    create_words(app, 120)
+
+    for query in ('sort_by=kanji&order=asc', 'sort_by=kanji&order=desc', 'sort_by=correct_count&order=desc'):
+        by_cursor = walk_cursor(client, f'/words?{query}', 'words')
+        assert by_cursor == walk_pages(client, f'/words?{query}', 'words')
+        assert len(set(by_cursor)) == 120
+
+def test_group_words_cursor_matches_page_numbers(client, app):
+    """Test that keyset paging over /groups/<id>/words returns every word once"""
+    group_id = create_words(app, 25)
+
+    by_cursor = walk_cursor(client, f'/groups/{group_id}/words?sort_by=kanji', 'words')
+    assert by_cursor == walk_pages(client, f'/groups/{group_id}/words?sort_by=kanji', 'words')
+    assert len(set(by_cursor)) == 25
+
+def test_study_sessions_cursor(client, app):
+    """Test keyset paging over /api/study-sessions and /api/study-activities/<id>/sessions"""
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Test Activity', 'http://example.com/test'))
+    # Several sessions share a timestamp, the id keeps their order stable
+    for i in range(23):
+        cursor.execute('''
+            INSERT INTO study_sessions (group_id, study_activity_id, created_at)
+            VALUES (1, 1, ?)
+        ''', (f'2025-01-{1 + i // 3:02d} 10:00:00',))
+    app.db.commit()
+
+    expected = list(range(23, 0, -1))
+    assert walk_cursor(client, '/api/study-sessions', 'items') == expected
+    assert walk_cursor(client, '/api/study-activities/1/sessions', 'items') == expected
+
+    # Only numbered pages have a page number
+    for url in ('/api/study-sessions', '/api/study-activities/1/sessions'):
+        assert json.loads(client.get(url).data)['page'] == 1
+        assert 'page' not in json.loads(client.get(f'{url}?cursor=').data)
+
+def test_invalid_cursor(client, app):
+    """Test that malformed cursors and cursors for another sort are rejected"""
+    create_words(app, 60)
+
+    response = client.get('/words?cursor=not-a-cursor')
+    assert response.status_code == 400
+
+    next_cursor = json.loads(client.get('/words?cursor=&sort_by=kanji').data)['next_cursor']
+    response = client.get(f'/words?cursor={next_cursor}&sort_by=romaji')
+    assert response.status_code == 400
+    assert 'sort order' in json.loads(response.data)['error']
+
+def test_cursor_with_unbindable_value(client, app):
+    """Test that a hand-made cursor with an object or list as sort value is a 400"""
+    import base64
+    create_words(app, 5)
+
+    for url, sort in (('/words', ['kanji', 'asc']), ('/api/study-sessions', ['created_at', 'desc'])):
+        for value in ({'a': 1}, [1, 2]):
+            payload = json.dumps([*sort, value, 1]).encode('utf-8')
+            page_cursor = base64.urlsafe_b64encode(payload).decode('ascii')
+            response = client.get(f'{url}?cursor={page_cursor}')
+            assert response.status_code == 400
+            assert json.loads(response.data)['error'] == 'Invalid cursor'
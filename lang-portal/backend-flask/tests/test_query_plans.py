@@ -0,0 +1,153 @@
+import pytest
+import os
+import re
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Tables that must never be scanned in full on the request path
+INDEXED_TABLES = ('word_review_items', 'word_groups', 'study_sessions', 'word_reviews')
+
+@pytest.fixture
+def app():
+    """Test app fixture with a small data set"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:'
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Test Activity', 'http://example.com/test'))
+    cursor.execute('''
+        INSERT INTO words (kanji, romaji, english, parts)
+        VALUES (?, ?, ?, ?)
+    ''', ('今日', 'kyou', 'today', '{"type": "noun"}'))
+    cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (1, 1)')
+    cursor.execute('INSERT INTO word_reviews (word_id, correct_count, wrong_count) VALUES (1, 1, 0)')
+    cursor.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)')
+    cursor.execute('INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (1, 1, 1)')
+    db.commit()
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def query_plans(app, client, url):
+    """Request url and return the EXPLAIN QUERY PLAN details of every SELECT it ran"""
+    connection = app.db.get()
+    statements = []
+    connection.set_trace_callback(statements.append)
+    try:
+        response = client.get(url)
+    finally:
+        connection.set_trace_callback(None)
+    assert response.status_code == 200
+
+    plans = []
+    for statement in statements:
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            rows = connection.execute('EXPLAIN QUERY PLAN ' + statement).fetchall()
+            plans.append([row['detail'] for row in rows])
+    return plans
+
+def assert_no_full_scans(plans):
+    """Fail if any plan scans one of the indexed tables or their aliases"""
+    aliases = {'wri': 'word_review_items', 'wg': 'word_groups', 'ss': 'study_sessions', 's': 'study_sessions', 'wr': 'word_reviews', 'r': 'word_reviews'}
+    for plan in plans:
+        for detail in plan:
+            match = re.match(r'SCAN (\w+)', detail)
+            if match:
+                table = aliases.get(match.group(1), match.group(1))
+                assert table not in INDEXED_TABLES, f'Full scan in plan: {plan}'
+
+def used_indexes(plans):
+    """Names of all indexes used across the plans"""
+    return {name for plan in plans for detail in plan for name in re.findall(r'INDEX (idx_\w+)', detail)}
+
+def test_migrations_are_recorded(app):
+    """Test that the migrations ran once and are recorded by version"""
+    cursor = app.db.cursor()
+    cursor.execute('SELECT version FROM schema_migrations ORDER BY version')
+    versions = [row['version'] for row in cursor.fetchall()]
+    assert versions[0] == '001'
+
+    # Running the migrations again is a no-op
+    assert app.db.migrate(cursor) == []
+
+def test_group_words_uses_indexes(app, client):
+    """Test that GET /groups/<id>/words searches word_groups and word_reviews by index"""
+    plans = query_plans(app, client, '/groups/1/words')
+    assert_no_full_scans(plans)
+    assert {'idx_word_groups_group_word', 'idx_word_reviews_word'} <= used_indexes(plans)
+
+def test_study_session_uses_indexes(app, client):
+    """Test that GET /api/study-sessions/<id> searches review items by session"""
+    plans = query_plans(app, client, '/api/study-sessions/1')
+    assert_no_full_scans(plans)
+    assert 'idx_word_review_items_session_word' in used_indexes(plans)
+
+def test_group_study_sessions_uses_indexes(app, client):
+    """Test that GET /groups/<id>/study_sessions is one indexed statement without review item lookups"""
+    plans = query_plans(app, client, '/groups/1/study_sessions')
+    assert len(plans) == 1
+    assert_no_full_scans(plans)
+    assert 'idx_study_sessions_group_created' in used_indexes(plans)
+    assert not any('word_review_items' in detail for detail in plans[0])
+
+def test_word_uses_indexes(app, client):
+    """Test that GET /words/<id> looks up word_reviews and word_groups by word"""
+    plans = query_plans(app, client, '/words/1')
+    assert_no_full_scans(plans)
+    assert {'idx_word_reviews_word', 'idx_word_groups_word_group'} <= used_indexes(plans)
+
+def test_study_activity_sessions_uses_indexes(app, client):
+    """Test that GET /api/study-activities/<id>/sessions searches sessions by activity"""
+    plans = query_plans(app, client, '/api/study-activities/1/sessions')
+    assert_no_full_scans(plans)
+    assert 'idx_study_sessions_activity_created' in used_indexes(plans)
+
+def test_recent_session_uses_indexes(app, client):
+    """Test that GET /dashboard/recent-session reads the newest session by index and none of the review items"""
+    plans = query_plans(app, client, '/dashboard/recent-session')
+    assert len(plans) == 1
+    # Sessions are walked in index order and LIMIT 1 stops at the first one,
+    # there is no sort over the whole table
+    assert 'SCAN study_sessions USING INDEX idx_study_sessions_created' in plans[0]
+    assert not any('TEMP B-TREE' in detail for detail in plans[0])
+    # Its results are counts kept on the session
+    assert not any('word_review_items' in detail for detail in plans[0])
+
+@pytest.mark.parametrize('sort_by', ['kanji', 'romaji', 'english', 'correct_count', 'wrong_count'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_word_pages_use_sort_indexes(app, client, sort_by, order):
+    """Test that GET /words keyset pages search the (column, id) index of the sort column without sorting"""
+    from lib.pagination import encode_cursor
+
+    value = 0 if sort_by.endswith('_count') else ''
+    for cursor in ('', encode_cursor(sort_by, order, value, 0)):
+        plans = query_plans(app, client, f'/words?sort_by={sort_by}&order={order}&cursor={cursor}')
+        assert_no_full_scans(plans)
+        assert f'idx_words_{sort_by}_id' in used_indexes(plans)
+        assert not any('TEMP B-TREE' in detail for plan in plans for detail in plan)
+        assert not any('word_reviews' in detail for plan in plans for detail in plan)
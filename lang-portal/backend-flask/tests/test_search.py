@@ -0,0 +1,145 @@
+import pytest
+import json
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+@pytest.fixture
+def app():
+    """Test app fixture with a small vocabulary"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:'
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+    cursor.executemany('''
+        INSERT INTO words (kanji, romaji, english, parts)
+        VALUES (?, ?, ?, ?)
+    ''', [
+        ('食べる', 'taberu', 'to eat', '[]'),
+        ('食べ物', 'tabemono', 'food', '[]'),
+        ('飲む', 'nomu', 'to drink', '[]'),
+        ('日本語', 'nihongo', 'Japanese language', '[]'),
+        ('日本', 'nihon', 'Japan', '[]'),
+        ('本', 'hon', 'book', '[]')
+    ])
+    db.commit()
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def search(client, query):
+    response = client.get('/words/search', query_string={'q': query})
+    assert response.status_code == 200
+    return json.loads(response.data)
+
+def test_search_romaji_and_english_prefixes(client):
+    """Test that latin queries match word prefixes in romaji and English"""
+    data = search(client, 'tabe')
+    assert sorted(word['english'] for word in data['words']) == ['food', 'to eat']
+    assert data['total_words'] == 2
+    assert data['current_page'] == 1
+
+    assert [word['romaji'] for word in search(client, 'japan lang')['words']] == ['nihongo']
+    assert search(client, 'dri')['words'][0]['kanji'] == '飲む'
+    assert search(client, 'xyz')['words'] == []
+
+def test_search_kanji_substrings(client):
+    """Test that kanji queries match anywhere in the word, short ones included"""
+    assert [word['romaji'] for word in search(client, '食べる')['words']] == ['taberu']
+    assert [word['romaji'] for word in search(client, '本語')['words']] == ['nihongo']
+
+    # Shorter words come first for one and two character queries
+    assert [word['romaji'] for word in search(client, '本')['words']] == ['hon', 'nihon', 'nihongo']
+
+def test_search_ignores_query_syntax(client):
+    """Test that FTS5 operators and LIKE wildcards are treated as text"""
+    assert search(client, 'tabe OR "nomu')['total_words'] == 0
+    assert search(client, '%')['total_words'] == 0
+    assert search(client, '"')['words'] == []
+
+def test_search_follows_word_changes(client, app):
+    """Test that the search tables are kept in sync with the words table"""
+    cursor = app.db.cursor()
+    cursor.execute("UPDATE words SET english = 'to consume' WHERE romaji = 'taberu'")
+    cursor.execute("DELETE FROM words WHERE romaji = 'nomu'")
+    app.db.commit()
+
+    assert [word['romaji'] for word in search(client, 'consum')['words']] == ['taberu']
+    assert search(client, 'drink')['words'] == []
+    assert search(client, 'to eat')['words'] == []
+
+    cursor.execute("UPDATE words SET kanji = '日本語学' WHERE romaji = 'nihongo'")
+    app.db.commit()
+    assert [word['kanji'] for word in search(client, '本語学')['words']] == ['日本語学']
+
+def test_search_without_trigram_tokenizer(monkeypatch):
+    """Test that an SQLite without the trigram tokenizer skips the kanji index and searches with LIKE"""
+    from app import create_app
+    from lib.db import Db
+
+    monkeypatch.setattr(Db, 'sqlite_features', lambda self, cursor: set())
+    app = create_app({'TESTING': True, 'DATABASE': ':memory:'})
+    with app.app_context():
+        cursor = app.db.cursor()
+        app.db.setup_tables(cursor)
+        cursor.execute('SELECT version FROM schema_migrations')
+        assert '008' not in {row['version'] for row in cursor.fetchall()}
+        cursor.executemany('INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)', [
+            ('日本語', 'nihongo', 'Japanese language', '[]'),
+            ('日本', 'nihon', 'Japan', '[]')
+        ])
+        app.db.commit()
+
+        client = app.test_client()
+        assert [word['romaji'] for word in search(client, '日本語')['words']] == ['nihongo']
+        assert [word['romaji'] for word in search(client, 'japan')['words']] == ['nihon', 'nihongo']
+
+        # Once SQLite supports it the skipped migration is applied
+        monkeypatch.undo()
+        assert app.db.migrate(cursor) == ['008_add_words_search_kanji.sql']
+        assert [word['romaji'] for word in search(client, '本語')['words']] == ['nihongo']
+
+def test_search_requires_query(client):
+    """Test that an empty query is rejected"""
+    response = client.get('/words/search?q=%20')
+    assert response.status_code == 400
+
+def test_search_pagination(client, app):
+    """Test that results are paginated 50 per page"""
+    cursor = app.db.cursor()
+    for i in range(60):
+        cursor.execute('''
+            INSERT INTO words (kanji, romaji, english, parts)
+            VALUES (?, ?, ?, ?)
+        ''', (f'語{i}', f'go{i}', f'word number {i}', '[]'))
+    app.db.commit()
+
+    first = search(client, 'word')
+    assert len(first['words']) == 50
+    assert first['total_pages'] == 2
+    second = json.loads(client.get('/words/search?q=word&page=2').data)
+    assert len(second['words']) == 10
+    assert not {word['id'] for word in first['words']} & {word['id'] for word in second['words']}
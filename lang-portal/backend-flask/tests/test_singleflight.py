@@ -0,0 +1,123 @@
+import pytest
+import json
+import os
+import sys
+import threading
+import time
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import jsonify
+
+@pytest.fixture
+def app(tmp_path):
+    """Test app fixture on a database file, so concurrent requests get connections of their own"""
+    from app import create_app
+
+    test_config = {
+        'TESTING': True,
+        'DATABASE': str(tmp_path / 'test.db')
+    }
+
+    app = create_app(test_config)
+
+    with app.app_context():
+        db = app.db
+        cursor = db.cursor()
+        db.setup_tables(cursor)
+        cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+        cursor.execute('''
+            INSERT INTO words (kanji, romaji, english, parts)
+            VALUES (?, ?, ?, ?)
+        ''', ('今日', 'kyou', 'today', '{}'))
+        cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (1, 1)')
+        db.commit()
+
+    # Views that block until released, counting how often they ran
+    app.release = threading.Event()
+    app.runs = []
+
+    @app.route('/test/slow')
+    @app.single_flight.coalesced
+    def slow():
+        app.runs.append(1)
+        app.release.wait(5)
+        return jsonify({'runs': len(app.runs)})
+
+    @app.route('/test/failing')
+    @app.single_flight.coalesced
+    def failing():
+        app.runs.append(1)
+        app.release.wait(5)
+        return jsonify({'error': 'failed'}), 500
+
+    yield app
+
+    app.db.pool.close_all()
+    app.db.read_pool.close_all()
+
+def request_concurrently(app, url, count):
+    """Send count identical requests at once, releasing the views once all but one wait"""
+    responses = [None] * count
+
+    def send(index):
+        responses[index] = app.test_client().get(url)
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.monotonic() + 5
+    while app.single_flight.status()['waiting'] < count - 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    app.release.set()
+    for thread in threads:
+        thread.join()
+    return responses
+
+def test_identical_requests_share_one_execution(app):
+    """Test that concurrent identical requests wait for one execution and get its response"""
+    responses = request_concurrently(app, '/test/slow?a=1', 5)
+
+    assert len(app.runs) == 1
+    assert all(response.status_code == 200 for response in responses)
+    assert {json.loads(response.data)['runs'] for response in responses} == {1}
+
+    status = app.single_flight.status()
+    assert status['in_flight'] == 0
+    assert status['routes']['/test/slow'] == {'executed': 1, 'coalesced': 4, 'fallbacks': 0}
+
+def test_errors_are_not_shared(app):
+    """Test that requests waiting on a failed execution run the view themselves"""
+    responses = request_concurrently(app, '/test/failing', 3)
+
+    assert len(app.runs) == 3
+    assert all(response.status_code == 500 for response in responses)
+    assert app.single_flight.status()['routes']['/test/failing'] == {'executed': 1, 'coalesced': 0, 'fallbacks': 2}
+
+def test_sequential_requests_run_again(app):
+    """Test that nothing is kept once the execution finished"""
+    app.release.set()
+    client = app.test_client()
+    client.get('/test/slow')
+    client.get('/test/slow')
+    assert len(app.runs) == 2
+
+def test_single_flight_disabled(app):
+    """Test that with the layer disabled every request runs the view"""
+    app.single_flight.enabled = False
+    app.release.set()
+    client = app.test_client()
+    client.get('/test/slow')
+    assert app.single_flight.status()['routes'] == {}
+
+def test_coalesced_routes_in_metrics(app):
+    """Test that the opted-in routes report their executions at /metrics"""
+    client = app.test_client()
+    response = client.get('/groups/1/words/raw')
+    assert response.status_code == 200
+    assert json.loads(response.data)['words'][0]['english'] == 'today'
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'lang_portal_single_flight_requests_total{route="/groups/<int:id>/words/raw",outcome="executed"} 1' in body
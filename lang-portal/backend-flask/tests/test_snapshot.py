@@ -0,0 +1,145 @@
+import pytest
+import json
+import os
+import random
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+SORTS = [(sort_by, order)
+         for sort_by in ('kanji', 'romaji', 'english', 'correct_count', 'wrong_count')
+         for order in ('asc', 'desc')]
+
+@pytest.fixture
+def app():
+    """Test app fixture serving /words from the snapshot"""
+    from app import create_app
+
+    # Use an in-memory SQLite database for testing
+    test_config = {
+        'TESTING': True,
+        'DATABASE': ':memory:',
+        'WORDS_SNAPSHOT': True
+    }
+
+    app = create_app(test_config)
+
+    # Create an application context
+    ctx = app.app_context()
+    ctx.push()
+
+    # Set up test database with words sharing values, so ids break many ties
+    db = app.db
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+    rng = random.Random(3)
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Test Activity', 'http://example.com/test'))
+    cursor.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)')
+    for i in range(130):
+        cursor.execute('''
+            INSERT INTO words (kanji, romaji, english, parts)
+            VALUES (?, ?, ?, ?)
+        ''', (f'語{rng.randint(0, 30)}', rng.choice(['go', 'Go', 'gō', 'ka']), f'word {i % 40}', '[]'))
+    for _ in range(300):
+        cursor.execute('''
+            INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, 1, ?)
+        ''', (rng.randint(1, 60), rng.random() < 0.6))
+    db.commit()
+
+    yield app
+
+    # Pop the application context
+    ctx.pop()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def pages(client, app, use_snapshot):
+    """Every page of every sort, by page number and by cursor"""
+    snapshot = app.snapshot
+    if not use_snapshot:
+        app.snapshot = None
+    try:
+        results = {}
+        for sort_by, order in SORTS:
+            query = f'sort_by={sort_by}&order={order}'
+            results[query] = [json.loads(client.get(f'/words?{query}&page={page}').data) for page in (1, 2, 3, 4)]
+            by_cursor = []
+            page_cursor = ''
+            while page_cursor is not None:
+                data = json.loads(client.get(f'/words?{query}&cursor={page_cursor}').data)
+                by_cursor.append(data)
+                page_cursor = data['next_cursor']
+            results[query + '&cursor'] = by_cursor
+        return results
+    finally:
+        app.snapshot = snapshot
+
+def test_snapshot_pages_match_sql(client, app):
+    """Test that every page in every order matches the SQL query"""
+    assert pages(client, app, True) == pages(client, app, False)
+    assert app.snapshot.status()['builds'] == 1
+
+def test_snapshot_applies_batch_reviews(client, app):
+    """Test that batch reviews move words within the snapshot without a rebuild"""
+    client.get('/words')
+
+    items = [{'word_id': word_id, 'correct': word_id % 3 != 0} for word_id in (5, 5, 5, 90, 120, 7, 7)]
+    response = client.post('/api/study-sessions/1/reviews:batch', json={'items': items})
+    assert response.status_code == 201
+
+    status = app.snapshot.status()
+    assert status['incremental_updates'] == 1
+    assert pages(client, app, True) == pages(client, app, False)
+    assert app.snapshot.status()['builds'] == 1
+    assert app.snapshot.status()['counter_reloads'] == 0
+
+def test_snapshot_reloads_after_other_writes(client, app):
+    """Test that reviews and words written elsewhere are picked up on the next page"""
+    client.get('/words')
+
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (100, 1, 1)')
+    app.db.commit()
+    assert pages(client, app, True) == pages(client, app, False)
+    assert app.snapshot.status()['counter_reloads'] == 1
+
+    cursor.execute('''
+        INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)
+    ''', ('新', 'shin', 'new', '[]'))
+    app.db.commit()
+    assert pages(client, app, True) == pages(client, app, False)
+    assert app.snapshot.status()['builds'] == 2
+
+def test_snapshot_reloads_after_reset_and_edits(client, app):
+    """Test that a reset followed by as many reviews, and an edited word, are picked up"""
+    from lib.stats import reset_rollups
+
+    client.get('/words')
+
+    # The same number of reviews as before, all on other words
+    cursor = app.db.cursor()
+    cursor.execute('DELETE FROM word_review_items')
+    reset_rollups(cursor)
+    for _ in range(300):
+        cursor.execute('INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (100, 1, 1)')
+    app.db.commit()
+    assert pages(client, app, True) == pages(client, app, False)
+    assert app.snapshot.status()['counter_reloads'] == 1
+
+    # Same count and highest id, different text
+    cursor.execute('UPDATE words SET kanji = ?, english = ? WHERE id = 3', ('変', 'changed'))
+    app.db.commit()
+    assert pages(client, app, True) == pages(client, app, False)
+    assert app.snapshot.status()['builds'] == 2
+
+def test_snapshot_rejects_mistyped_cursor(client, app):
+    """Test that a cursor value of the wrong type is rejected instead of compared"""
+    from lib.pagination import encode_cursor
+
+    response = client.get('/words?sort_by=correct_count&cursor=' + encode_cursor('correct_count', 'asc', 'x', 1))
+    assert response.status_code == 400
@@ -347,3 +347,87 @@ def test_create_study_session_review_duplicate(client, app):
     data = json.loads(response.data)
     assert 'error' in data
     assert 'already has a review' in data['error']
+
+def create_session_with_words(app, word_count):
+    """Create a group, activity, study session and word_count words"""
+    cursor = app.db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', ('Test Group',))
+    group_id = cursor.lastrowid
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('Test Activity', 'http://example.com/test'))
+    activity_id = cursor.lastrowid
+    cursor.execute('''
+        INSERT INTO study_sessions (group_id, study_activity_id)
+        VALUES (?, ?)
+    ''', (group_id, activity_id))
+    session_id = cursor.lastrowid
+    word_ids = []
+    for i in range(word_count):
+        cursor.execute('''
+            INSERT INTO words (kanji, romaji, english, parts)
+            VALUES (?, ?, ?, ?)
+        ''', (f'語{i}', f'go{i}', f'word {i}', '[]'))
+        word_ids.append(cursor.lastrowid)
+    app.db.commit()
+    return session_id, word_ids
+
+def test_create_study_session_reviews_batch_success(client, app):
+    """Test recording a whole quiz worth of answers in one request"""
+    session_id, word_ids = create_session_with_words(app, 50)
+    items = [{'word_id': word_ids[i % 50], 'correct': i % 4 != 0} for i in range(300)]
+
+    response = client.post(f'/api/study-sessions/{session_id}/reviews:batch', json={'items': items})
+
+    assert response.status_code == 201
+    data = json.loads(response.data)
+    assert data['items_count'] == 300
+    assert data['correct_count'] == 225
+    assert data['wrong_count'] == 75
+
+    # Review items are stored and the per word counters are updated
+    cursor = app.db.cursor()
+    cursor.execute('SELECT COUNT(*) FROM word_review_items WHERE study_session_id = ?', (session_id,))
+    assert cursor.fetchone()[0] == 300
+    cursor.execute('SELECT correct_count, wrong_count FROM word_reviews WHERE word_id = ?', (word_ids[0],))
+    review = cursor.fetchone()
+    assert (review['correct_count'], review['wrong_count']) == (3, 3)
+
+    # The session listing reflects the new review items
+    data = json.loads(client.get(f'/api/study-sessions/{session_id}').data)
+    assert data['session']['review_items_count'] == 300
+
+def test_create_study_session_reviews_batch_invalid_data(client, app):
+    """Test that invalid batches are rejected without writing anything"""
+    session_id, word_ids = create_session_with_words(app, 2)
+
+    invalid_test_cases = [
+        ({}, 'Missing required field: items'),
+        ({'items': []}, 'Missing required field: items'),
+        ({'items': [{'word_id': 'one', 'correct': True}]}, 'Invalid type for field word_id in item 0'),
+        ({'items': [{'word_id': word_ids[0], 'correct': True}, {'word_id': word_ids[1], 'correct': 1}]},
+         'Invalid type for field correct in item 1'),
+        ({'items': [{'word_id': word_ids[0], 'correct': True}] * 501}, 'At most 500 items'),
+    ]
+    for test_data, expected_error in invalid_test_cases:
+        response = client.post(f'/api/study-sessions/{session_id}/reviews:batch', json=test_data)
+        assert response.status_code == 400
+        assert expected_error in json.loads(response.data)['error']
+
+    # Unknown words fail the whole batch
+    response = client.post(f'/api/study-sessions/{session_id}/reviews:batch', json={
+        'items': [{'word_id': word_ids[0], 'correct': True}, {'word_id': 999, 'correct': False}]
+    })
+    assert response.status_code == 404
+    assert b'999' in response.data
+
+    cursor = app.db.cursor()
+    cursor.execute('SELECT COUNT(*) FROM word_review_items')
+    assert cursor.fetchone()[0] == 0
+
+def test_create_study_session_reviews_batch_nonexistent_session(client, app):
+    """Test recording reviews for a study session that does not exist"""
+    response = client.post('/api/study-sessions/999/reviews:batch', json={
+        'items': [{'word_id': 1, 'correct': True}]
+    })
+
+    assert response.status_code == 404
+    assert 'not found' in json.loads(response.data)['error'].lower()
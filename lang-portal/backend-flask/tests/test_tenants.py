@@ -0,0 +1,202 @@
+import pytest
+import json
+import os
+import sqlite3
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.generate import generate
+
+SIZES = {'words': 60, 'groups': 3, 'sessions': 40, 'reviews': 900}
+
+def create_tenant_app(tmp_path, **config):
+    """An app with a database per learner, cloned from a template with history"""
+    from app import create_app
+
+    template = str(tmp_path / 'template.db')
+    setup = create_app({'TESTING': True, 'DATABASE': template})
+    with setup.app_context():
+        cursor = setup.db.cursor()
+        setup.db.setup_tables(cursor)
+        generate(cursor, 'tiny', **SIZES)
+    setup.db.close_all()
+
+    return create_app({
+        'TESTING': True,
+        'DATABASE': template,
+        'TENANTS': True,
+        'TENANT_DIRECTORY': str(tmp_path / 'learners'),
+        'RESET_BATCH_SIZE': 37,
+        **config
+    })
+
+@pytest.fixture
+def app(tmp_path):
+    """Test app fixture in tenant mode"""
+    app = create_tenant_app(tmp_path)
+    yield app
+    app.jobs.shutdown()
+    app.db.close_all()
+
+@pytest.fixture
+def client(app):
+    """Test client fixture"""
+    return app.test_client()
+
+def as_learner(learner):
+    """Headers of a request on behalf of learner"""
+    return {'X-Learner-Id': learner}
+
+def count(path, table):
+    """Rows of a table in a database file"""
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    finally:
+        connection.close()
+
+def wait_for(client, location, learner, timeout=10):
+    """Poll a learner's job until it finished"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = json.loads(client.get(location, headers=as_learner(learner)).data)
+        if job['state'] in ('done', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'Job did not finish: {job}')
+
+def test_learner_header_is_required(client):
+    """Test that requests without a valid learner header are rejected"""
+    assert client.get('/words').status_code == 400
+    assert client.get('/words', headers=as_learner('../etc/passwd')).status_code == 400
+    assert client.get('/words', headers=as_learner('a' * 65)).status_code == 400
+    # Metrics are about the whole process
+    assert client.get('/metrics').status_code == 200
+
+def test_new_learner_is_cloned_without_history(app, client, tmp_path):
+    """Test that a new learner gets the vocabulary and none of the template's history"""
+    response = client.get('/dashboard/stats', headers=as_learner('alice'))
+    assert response.status_code == 200
+    stats = json.loads(response.data)
+    assert stats['total_vocabulary'] == 60
+    assert stats['total_sessions'] == 0
+    assert stats['total_words_studied'] == 0
+
+    path = app.db.path('alice')
+    assert os.path.exists(path)
+    assert count(path, 'words') == 60
+    assert count(path, 'word_review_items') == 0
+    assert count(path, 'word_reviews') == 0
+    # The template keeps its history
+    assert count(str(tmp_path / 'template.db'), 'word_review_items') == 900
+    assert app.db.status()['cloned'] == 1
+
+def test_learners_are_isolated(client):
+    """Test that a session recorded by one learner is not seen by another"""
+    response = client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1},
+                           headers=as_learner('alice'))
+    assert response.status_code == 200
+    session_id = json.loads(response.data)['id']
+    response = client.post(f'/api/study-sessions/{session_id}/reviews:batch',
+                           json={'items': [{'word_id': 1, 'correct': True}]}, headers=as_learner('alice'))
+    assert response.status_code == 201
+
+    alice = json.loads(client.get('/dashboard/stats', headers=as_learner('alice')).data)
+    bob = json.loads(client.get('/dashboard/stats', headers=as_learner('bob')).data)
+    assert alice['total_sessions'] == 1
+    assert alice['total_words_studied'] == 1
+    assert bob['total_sessions'] == 0
+    assert bob['total_words_studied'] == 0
+
+    sessions = json.loads(client.get('/api/study-sessions', headers=as_learner('bob')).data)
+    assert sessions['total'] == 0
+    assert sessions['items'] == []
+
+def test_least_recently_used_learner_is_closed(tmp_path):
+    """Test that no more than max_open learner databases stay open"""
+    app = create_tenant_app(tmp_path, TENANT_MAX_OPEN=2)
+    client = app.test_client()
+    try:
+        for learner in ('alice', 'bob', 'alice', 'carol'):
+            assert client.get('/words', headers=as_learner(learner)).status_code == 200
+        open_learners = {db.tenant for db in app.db.databases()}
+        assert open_learners == {'alice', 'carol'}
+        assert app.db.status()['evicted'] == 1
+
+        # An evicted learner is opened again from their file
+        assert client.get('/words', headers=as_learner('bob')).status_code == 200
+        assert app.db.status()['cloned'] == 3
+    finally:
+        app.db.close_all()
+
+def test_learner_in_use_by_a_request_is_not_closed(tmp_path):
+    """Test that a learner's Db is pinned from its first lookup until teardown, even before a connection is taken"""
+    app = create_tenant_app(tmp_path, TENANT_MAX_OPEN=1)
+    try:
+        with app.test_request_context('/words', headers=as_learner('alice')):
+            alice = app.db.current()
+            assert alice.in_use() == 0
+            app.db.open('bob')
+            assert alice in app.db.databases()
+            assert app.db.status()['evicted'] == 0
+
+        # Unpinned at teardown, the next open closes it
+        app.db.open('carol')
+        assert alice not in app.db.databases()
+    finally:
+        app.db.close_all()
+
+def test_idle_learner_is_closed(tmp_path):
+    """Test that learner databases unused for idle_seconds are closed"""
+    app = create_tenant_app(tmp_path, TENANT_IDLE_SECONDS=0.05)
+    client = app.test_client()
+    try:
+        client.get('/words', headers=as_learner('alice'))
+        time.sleep(0.1)
+        client.get('/words', headers=as_learner('bob'))
+        assert {db.tenant for db in app.db.databases()} == {'bob'}
+    finally:
+        app.db.close_all()
+
+def test_reset_only_clears_one_learner(app, client):
+    """Test that a background reset runs on the database of the learner who asked"""
+    for learner in ('alice', 'bob'):
+        response = client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1},
+                               headers=as_learner(learner))
+        assert response.status_code == 200
+
+    response = client.post('/api/study-sessions/reset', headers=as_learner('alice'))
+    assert response.status_code == 202
+    location = response.headers['Location']
+    # Jobs belong to a learner
+    assert client.get(location, headers=as_learner('bob')).status_code == 404
+    assert wait_for(client, location, 'alice')['state'] == 'done'
+
+    assert count(app.db.path('alice'), 'study_sessions') == 0
+    assert count(app.db.path('bob'), 'study_sessions') == 1
+
+def test_origins_are_read_from_the_shared_database(tmp_path):
+    """Test that CORS reads the shared database and hands its connection back"""
+    app = create_tenant_app(tmp_path)
+    client = app.test_client()
+    origin = {'Origin': 'http://localhost:8081'}
+    try:
+        response = client.get('/groups', headers=origin)
+        assert response.status_code == 400
+        assert response.headers['Access-Control-Allow-Origin'] == origin['Origin']
+
+        response = client.get('/groups', headers={**origin, **as_learner('alice')})
+        assert response.status_code == 200
+        assert response.headers['Access-Control-Allow-Origin'] == origin['Origin']
+
+        shared_db = app.allowed_origins.db
+        assert shared_db is not app.db.open('alice')
+        assert shared_db.read_pool.status()['created'] > 0
+        assert shared_db.read_pool.status()['in_use'] == 0
+        assert all(db.in_use() == 0 for db in app.db.databases())
+    finally:
+        app.db.close_all()
+        app.allowed_origins.db.close_all()